@@ -1,7 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-import psycopg2
-from database import get_db_connection
+import psycopg
+from database import get_db
 
 router = APIRouter()
 
@@ -29,9 +29,8 @@ class TeacherRegister(BaseModel):
 # --------------------------
 
 @router.post("/register/student")
-def register_student(student: StudentRegister):
+async def register_student(student: StudentRegister, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor()
         # UPDATED: Returns 'student_id' instead of 'id'
         query = """
@@ -39,27 +38,24 @@ def register_student(student: StudentRegister):
         VALUES (%s, %s, %s, %s, %s, %s, %s) 
         RETURNING student_id
         """
-        cursor.execute(query, (student.name, student.usn, student.year, student.sem, student.dept, student.email, student.password))
+        await cursor.execute(query, (student.name, student.usn, student.year, student.sem, student.dept, student.email, student.password))
         
         # UPDATED: Access 'student_id'
-        new_id = cursor.fetchone()['student_id']
-        conn.commit()
-        conn.close()
+        new_id = (await cursor.fetchone())['student_id']
+        await conn.commit()
         return {"message": "Student registered successfully", "id": new_id, "email": student.email}
-    except psycopg2.errors.UniqueViolation:
-        conn.close()
+    except psycopg.errors.UniqueViolation:
+        await conn.rollback()
         raise HTTPException(status_code=400, detail="Student with this Email or USN already exists")
     except Exception as e:
-        conn.close()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/login/student")
-def login_student(creds: LoginRequest):
-    conn = get_db_connection()
+async def login_student(creds: LoginRequest, conn=Depends(get_db)):
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM students WHERE email = %s AND password = %s", (creds.email, creds.password))
-    user = cursor.fetchone()
-    conn.close()
+    await cursor.execute("SELECT * FROM students WHERE email = %s AND password = %s", (creds.email, creds.password))
+    user = await cursor.fetchone()
     if user:
         # UPDATED: Access 'student_id'
         return {"message": "Student login successful", "user_id": user['student_id'], "name": user['name'], "role": "student"}
@@ -71,33 +67,29 @@ def login_student(creds: LoginRequest):
 # --------------------------
 
 @router.post("/register/teacher")
-def register_teacher(teacher: TeacherRegister):
+async def register_teacher(teacher: TeacherRegister, conn=Depends(get_db)):
     try:
-        conn = get_db_connection()
         cursor = conn.cursor()
         # UPDATED: Returns 'teacher_id' instead of 'id'
         query = "INSERT INTO teachers (name, dept, email, password) VALUES (%s, %s, %s, %s) RETURNING teacher_id"
-        cursor.execute(query, (teacher.name, teacher.dept, teacher.email, teacher.password))
+        await cursor.execute(query, (teacher.name, teacher.dept, teacher.email, teacher.password))
         
         # UPDATED: Access 'teacher_id'
-        new_id = cursor.fetchone()['teacher_id']
-        conn.commit()
-        conn.close()
+        new_id = (await cursor.fetchone())['teacher_id']
+        await conn.commit()
         return {"message": "Teacher registered successfully", "id": new_id, "email": teacher.email}
-    except psycopg2.errors.UniqueViolation:
-        conn.close()
+    except psycopg.errors.UniqueViolation:
+        await conn.rollback()
         raise HTTPException(status_code=400, detail="Teacher with this Email already exists")
     except Exception as e:
-        conn.close()
+        await conn.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/login/teacher")
-def login_teacher(creds: LoginRequest):
-    conn = get_db_connection()
+async def login_teacher(creds: LoginRequest, conn=Depends(get_db)):
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM teachers WHERE email = %s AND password = %s", (creds.email, creds.password))
-    user = cursor.fetchone()
-    conn.close()
+    await cursor.execute("SELECT * FROM teachers WHERE email = %s AND password = %s", (creds.email, creds.password))
+    user = await cursor.fetchone()
     if user:
         # UPDATED: Access 'teacher_id'
         return {"message": "Teacher login successful", "user_id": user['teacher_id'], "name": user['name'], "role": "teacher"}
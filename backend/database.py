@@ -1,81 +1,236 @@
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from fastapi import HTTPException
+import time
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool, ConnectionPool, PoolTimeout
+from fastapi import HTTPException, Request
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_db_connection():
+DB_CONNINFO = make_conninfo(
+    dbname=os.getenv("DB_NAME"),
+    user=os.getenv("DB_USER"),
+    password=os.getenv("DB_PASSWORD"),
+    host=os.getenv("DB_HOST"),
+    port=os.getenv("DB_PORT"),
+    client_encoding='UTF8',
+)
+# Connections held longer than this are reported (probably not released)
+DB_POOL_LEAK_SECONDS = float(os.getenv("DB_POOL_LEAK_SECONDS", "30"))
+
+# --- CONNECTION POOL (init_db, similarity workers) ---
+# Sync psycopg 3 pool for code that runs in threads; opened in main.py's lifespan
+db_pool = ConnectionPool(
+    DB_CONNINFO,
+    min_size=int(os.getenv("DB_POOL_MIN", "2")),
+    max_size=int(os.getenv("DB_POOL_MAX", "10")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    kwargs={"row_factory": dict_row},
+    # Health check on checkout; broken connections are replaced
+    check=ConnectionPool.check_connection,
+    open=False,
+    name="workers",
+)
+
+# --- ASYNC CONNECTION POOL (routers) ---
+# psycopg 3: waiting for Postgres no longer holds a threadpool thread, so one slow
+# route can't starve the others. Opened in main.py's lifespan.
+async_db_pool = AsyncConnectionPool(
+    DB_CONNINFO,
+    min_size=int(os.getenv("DB_ASYNC_POOL_MIN", "4")),
+    max_size=int(os.getenv("DB_ASYNC_POOL_MAX", "20")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "5")),
+    kwargs={"row_factory": dict_row},
+    check=AsyncConnectionPool.check_connection,
+    open=False,
+    name="routers",
+)
+# Connections handed out by get_db: id(conn) -> (acquired_at, holder)
+_async_in_use = {}
+_async_leak_warnings = 0
+
+async def get_db(request: Request):
+    """FastAPI dependency: a pooled async connection (rows as dicts) for the duration of the request."""
+    global _async_leak_warnings
+    holder = f"{request.method} {request.url.path}"
     try:
-        conn = psycopg2.connect(
-            dbname=os.getenv("DB_NAME"),
-            user=os.getenv("DB_USER"),
-            password=os.getenv("DB_PASSWORD"),
-            client_encoding='UTF8',
-            host=os.getenv("DB_HOST"),
-            port=os.getenv("DB_PORT"),
-            cursor_factory=RealDictCursor
-        )
-        return conn
-    except Exception as e:
-        print(f"Database connection failed: {e}")
-        raise HTTPException(status_code=500, detail="Database connection failed")
+        # Commits on success, rolls back if the route raises
+        async with async_db_pool.connection() as conn:
+            _async_in_use[id(conn)] = (time.monotonic(), holder)
+            try:
+                yield conn
+            finally:
+                acquired_at, _ = _async_in_use.pop(id(conn))
+                held = time.monotonic() - acquired_at
+                if held > DB_POOL_LEAK_SECONDS:
+                    _async_leak_warnings += 1
+                    print(f"⚠️ Database connection held {held:.1f}s by {holder}")
+    except PoolTimeout:
+        print(f"⚠️ No database connection free after {async_db_pool.timeout}s ({async_db_pool.max_size} in use)")
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+
+def async_pool_stats():
+    """psycopg_pool's counters plus connections get_db has handed out for too long."""
+    now = time.monotonic()
+    stats = async_db_pool.get_stats()
+    stats["leak_warnings"] = _async_leak_warnings
+    stats["held_too_long"] = [{"holder": holder, "seconds": round(now - acquired_at, 1)}
+                              for acquired_at, holder in sorted(_async_in_use.values())
+                              if now - acquired_at > DB_POOL_LEAK_SECONDS]
+    return stats
+
+# Bump whenever init_db() gains new DDL, so existing databases pick it up
+SCHEMA_VERSION = 3
+# Arbitrary key for pg_advisory_xact_lock while migrating
+SCHEMA_LOCK_ID = 7231001
+
+def _schema_version(cursor):
+    """Version recorded by the last init_db() run, 0 for a fresh database."""
+    cursor.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+    if not cursor.fetchone()['present']:
+        return 0
+    cursor.execute("SELECT MAX(version) AS version FROM schema_version")
+    return cursor.fetchone()['version'] or 0
 
 def init_db():
-    """Creates tables if they don't exist."""
+    """Creates tables if they don't exist. A single query when the schema is already current."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 1. Students Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS students (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                usn TEXT UNIQUE NOT NULL,
-                year INTEGER NOT NULL,
-                sem INTEGER NOT NULL,
-                dept TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
-            )
-        ''')
-        
-        # 2. Teachers Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS teachers (
-                id SERIAL PRIMARY KEY,
-                name TEXT NOT NULL,
-                dept TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
-            )
-        ''')
-
-        # 3. Teams Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS teams (
-                team_id SERIAL PRIMARY KEY,
-                team_name TEXT UNIQUE NOT NULL,
-                team_size INTEGER NOT NULL,
-                team_members JSONB NOT NULL
-            )
-        ''')
-
-        # 4. Submitted Projects Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS submitted_projects (
-                project_id SERIAL PRIMARY KEY,
-                team_id INTEGER REFERENCES teams(team_id),
-                project_title TEXT NOT NULL,
-                project_synopsis TEXT NOT NULL,
-                status TEXT DEFAULT 'not approved'
-            )
-        ''')
+        # Commits on success, rolls back whatever a failed run left open
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+
+            # Fast path: no DDL (and no DDL locks) on every worker start
+            if _schema_version(cursor) >= SCHEMA_VERSION:
+                return
+
+            # Several workers may start at once; only one runs the DDL
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+            if _schema_version(cursor) >= SCHEMA_VERSION:
+                conn.rollback()
+                return
+
+            # 1. Students Table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS students (
+                    id SERIAL PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    usn TEXT UNIQUE NOT NULL,
+                    year INTEGER NOT NULL,
+                    sem INTEGER NOT NULL,
+                    dept TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL
+                )
+            ''')
         
-        conn.commit()
-        conn.close()
-        print("Database initialized.")
+            # 2. Teachers Table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS teachers (
+                    id SERIAL PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    dept TEXT NOT NULL,
+                    email TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL
+                )
+            ''')
+
+            # 3. Teams Table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS teams (
+                    team_id SERIAL PRIMARY KEY,
+                    team_name TEXT UNIQUE NOT NULL,
+                    team_size INTEGER NOT NULL,
+                    team_members JSONB NOT NULL
+                )
+            ''')
+
+            # 4. Submitted Projects Table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS submitted_projects (
+                    project_id SERIAL PRIMARY KEY,
+                    team_id INTEGER REFERENCES teams(team_id),
+                    project_title TEXT NOT NULL,
+                    project_synopsis TEXT NOT NULL,
+                    status TEXT DEFAULT 'not approved'
+                )
+            ''')
+
+            # 5. Similarity Jobs Table (queue processed by similarity_jobs.py workers)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS similarity_jobs (
+                    job_id SERIAL PRIMARY KEY,
+                    submitted_project_id INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    started_at TIMESTAMPTZ,
+                    finished_at TIMESTAMPTZ
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_similarity_jobs_queued
+                ON similarity_jobs (job_id) WHERE status = 'queued'
+            ''')
+
+            # 6. Approved projects (the similarity corpus) with their search filter attributes
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS projects (
+                    project_id SERIAL PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    synopsis TEXT
+                )
+            ''')
+            cursor.execute('''
+                ALTER TABLE projects
+                    ADD COLUMN IF NOT EXISTS dept TEXT,
+                    ADD COLUMN IF NOT EXISTS year INTEGER,
+                    ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'approved'
+            ''')
+
+            # 7. Team members as rows, so "which team is this USN / email in" is an index lookup.
+            # teams.team_members (JSONB) is still written alongside and returned to clients.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS team_members (
+                    team_id INTEGER NOT NULL REFERENCES teams(team_id) ON DELETE CASCADE,
+                    position INTEGER NOT NULL,
+                    name TEXT,
+                    usn TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    dept TEXT,
+                    PRIMARY KEY (team_id, position)
+                )
+            ''')
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_team_members_usn ON team_members (usn)")
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_team_members_email ON team_members (email)")
+            # Backfill from the JSONB; if a student ended up in two teams, the older team keeps them
+            cursor.execute('''
+                INSERT INTO team_members (team_id, position, name, usn, email, dept)
+                SELECT t.team_id, m.position - 1, m.member->>'name', m.member->>'usn', m.member->>'email', m.member->>'dept'
+                FROM teams t, jsonb_array_elements(t.team_members) WITH ORDINALITY AS m(member, position)
+                WHERE m.member->>'usn' IS NOT NULL AND m.member->>'email' IS NOT NULL
+                ORDER BY t.team_id, m.position
+                ON CONFLICT DO NOTHING
+            ''')
+            cursor.execute('''
+                SELECT (SELECT COALESCE(SUM(jsonb_array_length(team_members)), 0) FROM teams)
+                     - (SELECT COUNT(*) FROM team_members) AS skipped
+            ''')
+            skipped = cursor.fetchone()['skipped']
+            if skipped:
+                print(f"⚠️ team_members: {skipped} JSONB member(s) not backfilled (duplicate USN/email or missing fields)")
+
+            # Recorded last, so a failed run is retried on the next start
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER NOT NULL,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                )
+            ''')
+            cursor.execute("INSERT INTO schema_version (version) VALUES (%s)", (SCHEMA_VERSION,))
+
+            conn.commit()
+            print("Database initialized.")
     except Exception as e:
         print(f"Initialization error: {e}")
@@ -0,0 +1,172 @@
+"""
+HTTP load test for the backend API.
+
+Point it at a running server (e.g. `uvicorn main:app`) and it fires a mix of
+requests from N concurrent clients per level, reporting throughput, p50/p95/p99
+latency and errors overall and per route:
+
+    python load_test.py run --concurrency 10,100,400 --users 8000 --json after.json
+    python load_test.py compare before.json after.json
+
+The mix pairs DB-heavy routes (/user/{email}, /projects) with /similarity/health,
+which does no I/O, so a slow DB route starving the others shows up as health latency.
+Run it against two checkouts (or settings) and compare the saved results.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+import httpx
+import numpy as np
+
+ROUTES = {
+    # name: (weight, path template)
+    "user": (6, "/user/{email}"),
+    "projects": (2, "/projects"),
+    "health": (2, "/similarity/health"),
+}
+
+def percentiles(samples_ms):
+    if not samples_ms:
+        return {"n": 0}
+    samples = np.asarray(samples_ms, dtype='float64')
+    return {
+        "n": int(len(samples)),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+    }
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+# --- LOAD ---
+async def run_level(base_url, concurrency, duration, emails, seed=7):
+    """`concurrency` clients sending back-to-back requests for `duration` seconds."""
+    names = [name for name in ROUTES if name != "user" or emails]
+    weights = [ROUTES[name][0] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def client_loop(i):
+            rng = random.Random(seed + i)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                path = ROUTES[name][1].format(email=rng.choice(emails) if emails else "")
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code < 500
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies[name].append((time.perf_counter() - start) * 1000)
+                else:
+                    errors[name] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    done = sum(len(samples) for samples in latencies.values())
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "requests": done,
+        "errors": sum(errors.values()),
+        "rps": round(done / elapsed, 1),
+        "latency": percentiles([ms for samples in latencies.values() for ms in samples]),
+        "routes": {name: dict(percentiles(latencies[name]), errors=errors[name]) for name in names},
+    }
+
+def print_run(run):
+    latency = run["latency"]
+    print(f"   {run['concurrency']:>5} clients {run['rps']:>9,.1f} req/s   p50 {latency.get('p50_ms', 0):>8.1f} ms"
+          f"   p99 {latency.get('p99_ms', 0):>8.1f} ms   errors {run['errors']}")
+    for name, route in run["routes"].items():
+        print(f"         {name:<10}{route['n']:>8} ok   p50 {route.get('p50_ms', 0):>8.1f} ms"
+              f"   p99 {route.get('p99_ms', 0):>8.1f} ms   errors {route['errors']}")
+
+# --- COMPARE ---
+def compare(baseline_path, candidate_path):
+    """Prints per-concurrency changes between two result files."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    print(f"📊 {baseline['label']} -> {candidate['label']}")
+    old_by_level = {r["concurrency"]: r for r in baseline["runs"]}
+    for new in candidate["runs"]:
+        old = old_by_level.get(new["concurrency"])
+        if old is None:
+            continue
+        print(f"\n{new['concurrency']} clients")
+        metrics = [("req/s", old["rps"], new["rps"]),
+                   ("p50 ms", old["latency"].get("p50_ms", 0), new["latency"].get("p50_ms", 0)),
+                   ("p99 ms", old["latency"].get("p99_ms", 0), new["latency"].get("p99_ms", 0)),
+                   ("errors", old["errors"], new["errors"])]
+        for name in new["routes"]:
+            if name in old["routes"]:
+                metrics.append((f"{name} p99 ms", old["routes"][name].get("p99_ms", 0),
+                                new["routes"][name].get("p99_ms", 0)))
+        for name, before, after in metrics:
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"   {name:<20}{before:>12}{after:>12}{change:>+9.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test a running backend.")
+    commands = parser.add_subparsers(dest="command")
+    run_cmd = commands.add_parser("run", help="Run the request mix at each concurrency level (default)")
+    run_cmd.add_argument("--base-url", default="http://localhost:8000")
+    run_cmd.add_argument("--concurrency", default="10,100,400", help="Comma separated client counts")
+    run_cmd.add_argument("--duration", type=float, default=15, help="Seconds per level")
+    run_cmd.add_argument("--emails-file", help="Student/teacher emails for /user/{email}, one per line")
+    run_cmd.add_argument("--email-template", default="s{i}@x.edu", help="Used with --users instead of a file")
+    run_cmd.add_argument("--users", type=int, default=0, help="Generate emails 1..N from --email-template")
+    run_cmd.add_argument("--label", help="Name for this run in compare output (default: git commit)")
+    run_cmd.add_argument("--json", help="Write results to this file")
+    compare_cmd = commands.add_parser("compare", help="Diff two result files")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("candidate")
+    args = parser.parse_args(sys.argv[1:] or ["run"])
+
+    if args.command == "compare":
+        compare(args.baseline, args.candidate)
+        return
+
+    emails = []
+    if args.emails_file:
+        with open(args.emails_file) as f:
+            emails = [line.strip() for line in f if line.strip()]
+    elif args.users:
+        emails = [args.email_template.format(i=i) for i in range(1, args.users + 1)]
+    if not emails:
+        print("⚠️ No emails given (--emails-file or --users); skipping the /user/{email} route.")
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    label = args.label or commit() or "run"
+    print(f"--- 🔥 LOAD TEST: {args.base_url}, {levels} clients, {args.duration:g}s each ({label}) ---")
+    runs = []
+    for concurrency in levels:
+        run = asyncio.run(run_level(args.base_url, concurrency, args.duration, emails))
+        print_run(run)
+        runs.append(run)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"label": label, "base_url": args.base_url, "duration": args.duration, "runs": runs}, f, indent=2)
+        print(f"✅ Results saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
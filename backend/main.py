@@ -1,6 +1,12 @@
+import startup_profile
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import init_db
+from startup_profile import profile_step
+from database import init_db, db_pool, async_db_pool, async_pool_stats
+from similarity_service import engine_registry
+from similarity_jobs import worker_pool
 
 # Import routers
 from auth import router as auth_router
@@ -9,8 +15,42 @@ from teams import router as teams_router
 from projects import router as projects_router
 from project_phases import router as phases_router
 from project_status import router as status_router
+from similarity import router as similarity_router
 
-app = FastAPI()
+# --- STARTUP / SHUTDOWN ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Async pool for the routers (Depends(get_db)), sync pool for init_db and the similarity workers
+    with profile_step("db pools"):
+        await async_db_pool.open()
+        try:
+            db_pool.open()
+        except Exception as e:
+            print(f"⚠️ Database pool starts empty: {e}")
+    with profile_step("init_db"):
+        init_db()
+    # Load the embedding model, FAISS index and judge once for all routers.
+    # 1 = in a background thread (default), sync = before serving, 0 = on first use
+    app.state.engine_registry = engine_registry
+    warmup = os.getenv("SIMILARITY_WARMUP", "1")
+    with profile_step("similarity warm-up"):
+        if warmup == "sync":
+            engine_registry.warm_up()
+        elif warmup == "1":
+            engine_registry.start_warm_up()
+    # Swap in index snapshots published by run_indexer.py or other workers
+    engine_registry.start_watcher()
+    # Drain queued similarity checks in background threads
+    with profile_step("similarity workers"):
+        worker_pool.start()
+    startup_profile.report()
+    yield
+    worker_pool.stop()
+    engine_registry.stop_watcher()
+    db_pool.close()
+    await async_db_pool.close()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",  # React default port
@@ -32,8 +72,9 @@ app.include_router(teams_router)
 app.include_router(projects_router)
 app.include_router(phases_router)
 app.include_router(status_router)
+app.include_router(similarity_router)
 
-# --- STARTUP ---
-@app.on_event("startup")
-def on_startup():
-    init_db()
+@app.get("/db/pool")
+async def db_pool_stats():
+    """Connection pool metrics: sizes, waiters, timeouts, wait times, connections held too long."""
+    return {"routers": async_pool_stats(), "workers": db_pool.get_stats()}
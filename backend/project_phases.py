@@ -1,7 +1,7 @@
 from typing import Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from database import get_db_connection
+from database import get_db
 
 router = APIRouter()
 
@@ -17,15 +17,14 @@ class ProjectPhaseUpdate(BaseModel):
 
 # --- API ENDPOINT ---
 @router.put("/update-project-phases")
-def update_project_phases(data: ProjectPhaseUpdate):
-    conn = get_db_connection()
+async def update_project_phases(data: ProjectPhaseUpdate, conn=Depends(get_db)):
     cursor = conn.cursor()
     
     try:
         # 1. Check if a phase record already exists
         check_query = "SELECT submitted_project_id FROM project_phases WHERE submitted_project_id = %s"
-        cursor.execute(check_query, (data.submitted_project_id,))
-        exists = cursor.fetchone()
+        await cursor.execute(check_query, (data.submitted_project_id,))
+        exists = await cursor.fetchone()
 
         if exists:
             # OPTION A: UPDATE (Preserve existing values if new ones are None)
@@ -40,7 +39,7 @@ def update_project_phases(data: ProjectPhaseUpdate):
                     phase3_remarks = COALESCE(%s, phase3_remarks)
                 WHERE submitted_project_id = %s
             """
-            cursor.execute(update_query, (
+            await cursor.execute(update_query, (
                 data.phase1_marks, data.phase1_remarks,
                 data.phase2_marks, data.phase2_remarks,
                 data.phase3_marks, data.phase3_remarks,
@@ -58,7 +57,7 @@ def update_project_phases(data: ProjectPhaseUpdate):
                     phase3_marks, phase3_remarks
                 ) VALUES (%s, %s, %s, %s, %s, %s, %s)
             """
-            cursor.execute(insert_query, (
+            await cursor.execute(insert_query, (
                 data.submitted_project_id,
                 data.phase1_marks or 0, data.phase1_remarks or "",
                 data.phase2_marks or 0, data.phase2_remarks or "",
@@ -66,13 +65,10 @@ def update_project_phases(data: ProjectPhaseUpdate):
             ))
             message = "Project phases created successfully."
 
-        conn.commit()
+        await conn.commit()
         return {"message": message, "submitted_project_id": data.submitted_project_id}
 
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         print(f"Error updating project phases: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-        
-    finally:
-        conn.close()
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from pydantic import BaseModel, field_validator
-from database import get_db_connection
+from database import get_db
+from similarity_service import engine_registry
 
 router = APIRouter()
 
@@ -17,21 +18,31 @@ class ProjectStatusUpdate(BaseModel):
             raise ValueError(f"Status must be one of: {allowed}")
         return v.lower()
 
+# --- INDEX UPDATE (runs after the response is sent) ---
+def index_approved_project(project_id: int, title: str, synopsis: str, dept=None, year=None, status=None):
+    """Adds one approved project to the similarity index (one embedding, no full rebuild)."""
+    try:
+        engine_registry.add_projects([(project_id, title, synopsis, dept, year, status)])
+    except Exception as e:
+        print(f"⚠️ Could not index approved project {project_id}: {e}")
+
 # --- API ENDPOINT ---
 @router.put("/update-project-status")
-def update_project_status(data: ProjectStatusUpdate):
-    conn = get_db_connection()
+async def update_project_status(data: ProjectStatusUpdate, background_tasks: BackgroundTasks, conn=Depends(get_db)):
     cursor = conn.cursor()
     
     try:
         # 1. Check if the project exists AND fetch its details (title, synopsis)
+        # (dept comes from the team's first member, like mentor assignment)
         check_query = """
-            SELECT submitted_project_id, project_title, project_synopsis 
-            FROM submitted_projects 
-            WHERE submitted_project_id = %s
+            SELECT sp.submitted_project_id, sp.project_title, sp.project_synopsis,
+                   t.team_members->0->>'dept' AS dept
+            FROM submitted_projects sp
+            LEFT JOIN teams t ON t.team_id = sp.team_id
+            WHERE sp.submitted_project_id = %s
         """
-        cursor.execute(check_query, (data.submitted_project_id,))
-        project = cursor.fetchone()
+        await cursor.execute(check_query, (data.submitted_project_id,))
+        project = await cursor.fetchone()
 
         if not project:
             raise HTTPException(status_code=404, detail="Project not found")
@@ -42,7 +53,7 @@ def update_project_status(data: ProjectStatusUpdate):
             SET status = %s
             WHERE submitted_project_id = %s
         """
-        cursor.execute(update_query, (data.status, data.submitted_project_id))
+        await cursor.execute(update_query, (data.status, data.submitted_project_id))
         
         # ---------------------------------------------------------
         # 3. NEW LOGIC: If 'approved', push to 'projects' table
@@ -50,13 +61,23 @@ def update_project_status(data: ProjectStatusUpdate):
         if data.status == "approved":
             # We insert the title and synopsis into the main projects table
             # used for similarity checks.
+            # dept / year / status are the similarity search filter attributes
             insert_query = """
-                INSERT INTO projects (title, synopsis)
-                VALUES (%s, %s)
+                INSERT INTO projects (title, synopsis, dept, year, status)
+                VALUES (%s, %s, %s, EXTRACT(YEAR FROM CURRENT_DATE), 'approved')
+                RETURNING project_id, dept, year, status
             """
-            cursor.execute(insert_query, (project['project_title'], project['project_synopsis']))
+            await cursor.execute(insert_query, (project['project_title'], project['project_synopsis'], project['dept']))
+            new_project = await cursor.fetchone()
+
+            # Keep the FAISS index in sync without rerunning run_indexer.py
+            background_tasks.add_task(
+                index_approved_project,
+                new_project['project_id'], project['project_title'], project['project_synopsis'],
+                new_project['dept'], new_project['year'], new_project['status']
+            )
 
-        conn.commit()
+        await conn.commit()
         
         return {
             "message": f"Project status updated to '{data.status}' successfully.",
@@ -67,9 +88,6 @@ def update_project_status(data: ProjectStatusUpdate):
     except HTTPException as he:
         raise he
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         print(f"Error updating project status: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-        
-    finally:
-        conn.close()
\ No newline at end of file
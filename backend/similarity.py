@@ -0,0 +1,74 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from similarity_service import get_engine_registry, IndexNotLoadedError
+from similarity_jobs import get_similarity_job
+from database import get_db
+
+router = APIRouter()
+
+# --- Pydantic Models ---
+class SimilarityFilters(BaseModel):
+    dept: Optional[List[str]] = None
+    status: Optional[List[str]] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+
+class SimilaritySearchRequest(BaseModel):
+    title: str
+    synopsis: str
+    top_k: int = Field(default=5, ge=1, le=50)
+    filters: Optional[SimilarityFilters] = None
+
+# --- ENGINE HEALTH ---
+@router.get("/similarity/health")
+def similarity_health(registry=Depends(get_engine_registry)):
+    return registry.health()
+
+# --- LOADED SNAPSHOT (per worker; each one hot-reloads on its own) ---
+@router.get("/similarity/index-info")
+def similarity_index_info(registry=Depends(get_engine_registry)):
+    return registry.index_info()
+
+# --- RELOAD INDEX (normally picked up automatically, see SNAPSHOT_POLL_S) ---
+@router.post("/similarity/reload")
+def reload_similarity_index(registry=Depends(get_engine_registry)):
+    try:
+        return registry.reload()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Reload failed: {e}")
+
+# --- FILTERED SEARCH (e.g. "similar CSE projects from the last three years") ---
+@router.post("/similarity/search")
+async def similarity_search(data: SimilaritySearchRequest, registry=Depends(get_engine_registry)):
+    try:
+        engine, _ = await run_in_threadpool(registry.get)
+    except IndexNotLoadedError:
+        raise HTTPException(status_code=503, detail="Similarity index not built yet")
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    filters = data.filters.model_dump(exclude_none=True) if data.filters else None
+    matches = await run_in_threadpool(engine.search, data.title, data.synopsis, data.top_k, filters)
+    return {"filters": filters, "matches_found": len(matches), "matches": matches}
+
+# --- JOB STATUS (queued by /create-team) ---
+@router.get("/similarity-jobs/{job_id}")
+async def similarity_job_status(job_id: int, conn=Depends(get_db)):
+    try:
+        job = await get_similarity_job(conn, job_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Similarity job not found")
+
+    job = dict(job)
+    # Results are only meaningful once the worker has written them back
+    if job['status'] != 'done':
+        for key in ('similarity_score', 'similar_projects_id', 'similar_project_titles', 'similarity_description'):
+            job[key] = None
+    return job
@@ -0,0 +1,218 @@
+import os
+import json
+import threading
+import time
+from database import db_pool
+from similarity_service import perform_similarity_check
+
+# Jobs stuck in 'running' longer than this are assumed to belong to a dead worker
+STALE_JOB_MINUTES = 10
+STALE_JOB_ERROR = "Worker stopped while running the similarity check"
+
+async def enqueue_similarity_job(cursor, submitted_project_id):
+    """Queues a check inside the caller's transaction. Returns the new job_id."""
+    await cursor.execute("""
+        INSERT INTO similarity_jobs (submitted_project_id)
+        VALUES (%s)
+        RETURNING job_id
+    """, (submitted_project_id,))
+    return (await cursor.fetchone())['job_id']
+
+async def enqueue_similarity_jobs(cursor, submitted_project_ids):
+    """Queues checks for many projects in one insert. Returns {submitted_project_id: job_id}."""
+    await cursor.execute("""
+        INSERT INTO similarity_jobs (submitted_project_id)
+        SELECT unnest(%s::int[])
+        RETURNING job_id, submitted_project_id
+    """, (list(submitted_project_ids),))
+    return {row['submitted_project_id']: row['job_id'] for row in await cursor.fetchall()}
+
+async def get_similarity_job(conn, job_id):
+    """Returns the job row joined with the stored results, or None."""
+    cursor = conn.cursor()
+    await cursor.execute("""
+        SELECT
+            j.job_id, j.submitted_project_id, j.status, j.attempts, j.error,
+            j.created_at, j.started_at, j.finished_at,
+            sp.similarity_score, sp.similar_projects_id,
+            sp.similar_project_titles, sp.similarity_description
+        FROM similarity_jobs j
+        LEFT JOIN submitted_projects sp ON sp.submitted_project_id = j.submitted_project_id
+        WHERE j.job_id = %s
+    """, (job_id,))
+    return await cursor.fetchone()
+
+
+class SimilarityWorkerPool:
+    """
+    Local threads that drain the similarity_jobs table.
+    Jobs are claimed with FOR UPDATE SKIP LOCKED, so several uvicorn workers can share the queue.
+    """
+
+    def __init__(self, workers=2, poll_interval=5.0, max_attempts=3, stale_after=STALE_JOB_MINUTES * 60):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+        self._threads = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = None
+
+    def start(self):
+        self._sweep_stale_jobs()
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"similarity-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"👷 Started {self.workers} similarity worker(s).")
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Wakes idle workers right away instead of waiting for the next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sweep_stale_jobs(throttle=True)
+            try:
+                job = self._claim()
+            except Exception as e:
+                print(f"❌ Could not claim similarity job: {e}")
+                job = None
+
+            if job:
+                try:
+                    self._process(job)
+                except Exception as e:
+                    # Job stays 'running' and is requeued by stale job recovery
+                    print(f"❌ Similarity worker error on job {job['job_id']}: {e}")
+                continue
+
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _sweep_stale_jobs(self, throttle=False):
+        """
+        Recovers jobs left 'running' by a dead worker (at most once per stale_after
+        seconds when throttled): requeued, or failed once they've used up their attempts.
+        """
+        with self._sweep_lock:
+            now = time.monotonic()
+            if throttle and self._last_sweep is not None and now - self._last_sweep < self.stale_after:
+                return
+            self._last_sweep = now
+        try:
+            with db_pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE similarity_jobs
+                    SET status = CASE WHEN attempts >= %(max_attempts)s THEN 'failed' ELSE 'queued' END,
+                        error = CASE WHEN attempts >= %(max_attempts)s THEN %(error)s ELSE error END,
+                        finished_at = CASE WHEN attempts >= %(max_attempts)s THEN now() ELSE NULL END
+                    WHERE status = 'running' AND started_at < now() - make_interval(secs => %(stale_after)s)
+                    RETURNING job_id, submitted_project_id, status
+                """, {"max_attempts": self.max_attempts, "error": STALE_JOB_ERROR, "stale_after": self.stale_after})
+                swept = cursor.fetchall()
+                failed = [job['submitted_project_id'] for job in swept if job['status'] == 'failed']
+                if failed:
+                    # Same as an out-of-attempts failure in _process
+                    cursor.execute("""
+                        UPDATE submitted_projects
+                        SET similarity_score = 0, similarity_description = %s
+                        WHERE submitted_project_id = ANY(%s)
+                    """, (json.dumps({"error": STALE_JOB_ERROR}), failed))
+                conn.commit()
+            if swept:
+                print(f"♻️ Recovered {len(swept)} stale similarity job(s), {len(failed)} failed.")
+        except Exception as e:
+            print(f"⚠️ Skipping stale job recovery: {e}")
+
+    def _claim(self):
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE similarity_jobs
+                SET status = 'running', attempts = attempts + 1, started_at = now()
+                WHERE job_id = (
+                    SELECT job_id FROM similarity_jobs
+                    WHERE status = 'queued'
+                    ORDER BY job_id
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                RETURNING job_id, submitted_project_id, attempts
+            """)
+            job = cursor.fetchone()
+            conn.commit()
+            return job
+
+    def _process(self, job):
+        try:
+            with db_pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT project_title, project_synopsis
+                    FROM submitted_projects
+                    WHERE submitted_project_id = %s
+                """, (job['submitted_project_id'],))
+                project = cursor.fetchone()
+            if not project:
+                raise ValueError(f"Submitted project {job['submitted_project_id']} not found")
+
+            # Slow part (embedding + LLM) runs without holding a pooled connection, locks or a transaction
+            # Errors are raised (not stored as a result) so they go through the retry/failed path below
+            results = perform_similarity_check(project['project_title'], project['project_synopsis'], raise_errors=True)
+
+            with db_pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE submitted_projects
+                    SET similarity_score = %s,
+                        similar_projects_id = %s,
+                        similar_project_titles = %s,
+                        similarity_description = %s
+                    WHERE submitted_project_id = %s
+                """, (
+                    results.get('similarity_score', 0),
+                    json.dumps(results.get('similar_projects_id', [])),
+                    json.dumps(results.get('similar_project_titles', [])),
+                    results.get('similarity_description', ""),
+                    job['submitted_project_id']
+                ))
+                cursor.execute("""
+                    UPDATE similarity_jobs
+                    SET status = 'done', error = NULL, finished_at = now()
+                    WHERE job_id = %s
+                """, (job['job_id'],))
+                conn.commit()
+
+        except Exception as e:
+            retry = job['attempts'] < self.max_attempts
+            print(f"❌ Similarity job {job['job_id']} failed (attempt {job['attempts']}): {e}")
+            with db_pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE similarity_jobs
+                    SET status = %s, error = %s, finished_at = CASE WHEN %s THEN NULL ELSE now() END
+                    WHERE job_id = %s
+                """, ('queued' if retry else 'failed', str(e), retry, job['job_id']))
+                if not retry:
+                    # Out of attempts: show the error on the project instead of leaving it blank
+                    cursor.execute("""
+                        UPDATE submitted_projects
+                        SET similarity_score = 0, similarity_description = %s
+                        WHERE submitted_project_id = %s
+                    """, (json.dumps({"error": str(e)}), job['submitted_project_id']))
+                conn.commit()
+
+# Shared by the /create-team router and main.py's lifespan
+worker_pool = SimilarityWorkerPool(workers=int(os.getenv("SIMILARITY_WORKERS", "2")))
@@ -1,6 +1,9 @@
 import sys
 import os
+import asyncio
 import json
+import threading
+import time
 from dotenv import load_dotenv
 
 # --- PATH SETUP ---
@@ -21,41 +24,323 @@ def remove_emojis(text):
     if not text: return ""
     return text.encode('ascii', 'ignore').decode('ascii')
 
-def perform_similarity_check(title: str, synopsis: str):
+class IndexNotLoadedError(Exception):
+    """Raised when the vector index files are missing on disk."""
+
+
+class EngineRegistry:
+    """
+    Process-wide holder for the warm VectorEngine and GeminiJudge.
+    Nothing heavy is loaded until warm_up() or the first get() call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engine = None
+        self._judge = None
+        self._llm_judge = None
+        self._model = None
+        self._cache = None
+        self._state = "cold"  # cold | warming | ready | no_index | failed
+        self._error = None
+        self._loaded_at = None
+        self._load_seconds = None
+        self._watcher = None
+        self._stop_watching = threading.Event()
+        self._judge_loop = None
+        self._judge_loop_lock = threading.Lock()
+
+    def _load(self):
+        """Builds a new (engine, judge) pair, reusing the embedding model if already loaded."""
+        from src.vector_engine import VectorEngine
+        from src.llm_judge import GeminiJudge
+        from src.async_judge import AsyncGeminiJudge
+        from src.verdict_gate import VerdictGate
+
+        engine = VectorEngine(model=self._model, cache=self._cache)
+        self._model, self._cache = engine.model, engine.cache
+        if not engine.load_index():
+            raise IndexNotLoadedError("Index not found")
+        if self._judge is None:
+            self._llm_judge = GeminiJudge()
+            # Clearly unique proposals get a local verdict instead of an LLM call;
+            # the async judge falls back to the same vector-only verdict when the provider is degraded
+            gate = VerdictGate(self._llm_judge)
+            gate.async_judge = AsyncGeminiJudge(fallback=gate.fallback_verdict)
+            return engine, gate
+        return engine, self._judge
+
+    def warm_up(self):
+        """Loads the model, index and judge once. Safe to call repeatedly."""
+        with self._lock:
+            if self._state == "ready":
+                return True
+            self._state = "warming"
+            start = time.perf_counter()
+            try:
+                self._engine, self._judge = self._load()
+            except IndexNotLoadedError as e:
+                self._state, self._error = "no_index", str(e)
+                print("⚠️ Index not found. Similarity checks are disabled until reload.")
+                return False
+            except Exception as e:
+                self._state, self._error = "failed", str(e)
+                print(f"❌ Engine warm-up failed: {e}")
+                return False
+
+            self._load_seconds = round(time.perf_counter() - start, 3)
+            self._loaded_at = time.time()
+            self._state, self._error = "ready", None
+            print(f"🔥 Similarity engine warm ({self._load_seconds}s).")
+            return True
+
+    def start_warm_up(self):
+        """Warms up in a daemon thread so the server starts serving other routes immediately."""
+        thread = threading.Thread(target=self.warm_up, name="similarity-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def get(self):
+        """Returns the shared (engine, judge), loading them on first use."""
+        if self._state != "ready" and not self.warm_up():
+            if self._state == "no_index":
+                raise IndexNotLoadedError(self._error)
+            raise RuntimeError(f"Similarity engine unavailable: {self._error}")
+        return self._engine, self._judge
+
+    def reload(self):
+        """Re-reads the index from disk and swaps it in, keeping the loaded model."""
+        start = time.perf_counter()
+        try:
+            engine, judge = self._load()
+        except Exception as e:
+            print(f"❌ Index reload failed: {e}")
+            # Keep serving the old index if we had one
+            if self._engine is None:
+                with self._lock:
+                    self._state = "no_index" if isinstance(e, IndexNotLoadedError) else "failed"
+                    self._error = str(e)
+            raise
+
+        with self._lock:
+            old_engine = self._engine
+            self._engine, self._judge = engine, judge
+            self._load_seconds = round(time.perf_counter() - start, 3)
+            self._loaded_at = time.time()
+            self._state, self._error = "ready", None
+        if old_engine is not None:
+            # Queued searches on the old engine are still served before its batcher stops
+            old_engine.close()
+        print(f"🔄 Similarity index reloaded ({self._load_seconds}s).")
+        return self.health()
+
+    # --- SNAPSHOT HOT RELOAD ---
+    def check_for_update(self):
+        """
+        Reloads when another process (run_indexer.py, another worker) published a
+        newer snapshot than the one being served. Returns True if it swapped.
+        """
+        from src import snapshots
+
+        if self._state not in ("ready", "no_index"):
+            return False  # not loaded yet (or loading): the first load picks up CURRENT anyway
+        on_disk = snapshots.current_version()
+        engine = self._engine
+        if on_disk is None or (engine is not None and engine.snapshot_version == on_disk):
+            return False
+        print(f"🆕 Snapshot {on_disk} published, reloading in the background...")
+        self.reload()
+        return True
+
+    def _watch(self, interval):
+        while not self._stop_watching.wait(interval):
+            try:
+                self.check_for_update()
+            except Exception as e:
+                print(f"⚠️ Snapshot watcher: {e}")
+
+    def start_watcher(self, interval=None):
+        """Polls CURRENT in a daemon thread; searches keep using the old engine until the swap."""
+        from src.config import Config
+
+        interval = Config.SNAPSHOT_POLL_S if interval is None else interval
+        if interval <= 0 or self._watcher is not None:
+            return None
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="similarity-snapshot-watcher", daemon=True
+        )
+        self._watcher.start()
+        return self._watcher
+
+    def stop_watcher(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def add_projects(self, rows):
+        """Embeds newly approved (id, title, synopsis) rows into the live index and saves it."""
+        from src import snapshots
+
+        # Write on top of the latest snapshot, not a stale one, or its changes would be lost.
+        # The writer lock is held from the check to the publish so no other process can
+        # publish in between (it's reentrant, so the engine's own publish still takes it).
+        with snapshots.writer_lock():
+            self.check_for_update()
+            try:
+                engine, _ = self.get()
+            except IndexNotLoadedError:
+                engine = None
+            if engine is None:
+                added = self._start_index(rows)
+            else:
+                added = engine.add_projects(rows)
+        # Verdicts that used an older version of these projects are stale
+        self._invalidate_verdicts([row[0] for row in rows])
+        return added
+
+    def _start_index(self, rows):
+        """Fresh deploy with no index on disk: builds one from `rows`, publishes it and serves it."""
+        from src.vector_engine import VectorEngine
+
+        print("🆕 No index yet, starting one from the approved project(s)...")
+        engine = VectorEngine(model=self._model, cache=self._cache)
+        self._model, self._cache = engine.model, engine.cache
+        added = engine.add_projects(rows)
+        engine.close()
+        self.reload()
+        return added
+
+    def remove_projects(self, project_ids):
+        from src import snapshots
+
+        with snapshots.writer_lock():
+            self.check_for_update()
+            try:
+                engine, _ = self.get()
+            except IndexNotLoadedError:
+                return 0  # nothing indexed yet, so nothing to remove
+            removed = engine.remove_projects(project_ids)
+        self._invalidate_verdicts(project_ids)
+        return removed
+
+    # --- VERDICTS FOR SYNC CALLERS ---
+    def _get_judge_loop(self):
+        """Event loop the async judge runs on for worker threads, started on first use."""
+        with self._judge_loop_lock:
+            if self._judge_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="judge-loop", daemon=True).start()
+                self._judge_loop = loop
+            return self._judge_loop
+
+    def get_verdict(self, judge, new_project, matches):
+        """
+        Blocking verdict through the async judge, so similarity workers share its
+        circuit breaker, in-flight cap and vector-only fallback.
+        """
+        if judge.async_judge is None:
+            return judge.get_verdict(new_project, matches)
+        future = asyncio.run_coroutine_threadsafe(
+            judge.get_verdict_async(new_project, matches), self._get_judge_loop()
+        )
+        # AsyncGeminiJudge enforces its own deadline and falls back instead of raising
+        return future.result()
+
+    def _invalidate_verdicts(self, project_ids):
+        cache = self._llm_judge.cache if self._llm_judge else None
+        if cache is not None:
+            cache.invalidate_projects(project_ids)
+
+    def index_info(self):
+        """Which snapshot this worker is serving, and whether a newer one is on disk."""
+        from src import snapshots
+
+        engine = self._engine
+        version = engine.snapshot_version if engine else None
+        on_disk = snapshots.current_version()
+        return {
+            "state": self._state,
+            "version": version,
+            "current_version": on_disk,
+            "stale": on_disk is not None and on_disk != version,
+            "vectors": engine.index.ntotal if engine and engine.index is not None else 0,
+            "index_type": engine.index_type() if engine and engine.index is not None else None,
+            "loaded_at": self._loaded_at,
+            "load_seconds": self._load_seconds,
+            "snapshot": snapshots.read_manifest(version) if version else None,
+            "watching": self._watcher is not None,
+        }
+
+    def health(self):
+        engine = self._engine
+        return {
+            "state": self._state,
+            "error": self._error,
+            "snapshot_version": engine.snapshot_version if engine else None,
+            "indexed_projects": engine.index.ntotal if engine and engine.index is not None else 0,
+            "index_type": engine.index_type() if engine and engine.index is not None else None,
+            "loaded_at": self._loaded_at,
+            "load_seconds": self._load_seconds,
+            "search_batching": engine.batcher.stats() if engine and engine.batcher else None,
+            "embedding_cache": engine.cache.stats() if engine and engine.cache else None,
+            "judge_gate": self._judge.stats() if self._judge else None,
+            "verdict_cache": self._llm_judge.cache.stats() if self._llm_judge and self._llm_judge.cache else None,
+            "async_judge": self._judge.async_judge.stats() if self._judge and self._judge.async_judge else None,
+        }
+
+
+# Shared by every router in this process (warmed up in main.py's lifespan)
+engine_registry = EngineRegistry()
+
+
+def get_engine_registry():
+    """FastAPI dependency returning the process-wide registry."""
+    return engine_registry
+
+
+def _error_result(message):
+    return {
+        "similarity_score": 0,
+        "similar_projects_id": [],
+        "similar_project_titles": [],
+        "similarity_description": json.dumps({"error": message})
+    }
+
+def perform_similarity_check(title: str, synopsis: str, raise_errors: bool = False):
+    """
+    Returns the similarity result dict. Failures come back as an error result,
+    or are re-raised with raise_errors=True (the job worker retries them).
+    """
     print(f"🔄 Starting Similarity Check for: {title}")
     
     try:
-        from src.vector_engine import VectorEngine
-        from src.llm_judge import GeminiJudge
+        # 1. Get the warm engine & judge (loaded once per process)
+        engine, judge = engine_registry.get()
     except ImportError as e:
         print(f"❌ Critical Import Error: {e}")
-        return {
-            "similarity_score": 0,
-            "similar_projects_id": [],
-            "similar_project_titles": [], # Added this
-            "similarity_description": json.dumps({"error": f"Import Failed: {e}"})
-        }
+        if raise_errors:
+            raise
+        return _error_result(f"Import Failed: {e}")
+    except IndexNotLoadedError:
+        print("⚠️ Index not found. Skipping check.")
+        if raise_errors:
+            raise
+        return _error_result("Index not found")
+    except Exception as e:
+        print(f"❌ Check Failed: {e}")
+        if raise_errors:
+            raise
+        return _error_result(str(e))
 
     try:
-        # 1. Initialize Vector Engine
-        engine = VectorEngine()
-        if not engine.load_index():
-            print("⚠️ Index not found. Skipping check.")
-            return {
-                "similarity_score": 0,
-                "similar_projects_id": [],
-                "similar_project_titles": [], # Added this
-                "similarity_description": json.dumps({"error": "Index not found"})
-            }
-            
-        # 2. Initialize Judge
-        judge = GeminiJudge()
-
-        # 3. Vector Search
+        # 2. Vector Search
         matches = engine.search(title, synopsis)
         
-        # 4. Extract IDs AND Titles directly from the matches
-        top_score = float(matches[0].get('similarity', 0)) if matches else 0.0
+        # 3. Extract IDs AND Titles directly from the matches
+        # Hybrid search orders by fused rank, so the first match isn't always the most similar
+        top_score = max((float(m.get('similarity', 0)) for m in matches), default=0.0)
         
         match_ids = []
         match_titles = []
@@ -67,9 +352,9 @@ def perform_similarity_check(title: str, synopsis: str):
                 # Get Title (key is 'name' in vector engine metadata)
                 match_titles.append(m.get('name', 'Unknown Title'))
 
-        # 5. Get AI Verdict
+        # 4. Get AI Verdict
         print("⚖️ Asking AI Judge...")
-        raw_verdict = judge.get_verdict({"title": title, "synopsis": synopsis}, matches)
+        raw_verdict = engine_registry.get_verdict(judge, {"title": title, "synopsis": synopsis}, matches)
         clean_verdict = remove_emojis(raw_verdict)
 
         print("✅ Check Complete.")
@@ -83,9 +368,6 @@ def perform_similarity_check(title: str, synopsis: str):
 
     except Exception as e:
         print(f"❌ Check Failed: {e}")
-        return {
-            "similarity_score": 0,
-            "similar_projects_id": [],
-            "similar_project_titles": [],
-            "similarity_description": json.dumps({"error": str(e)})
-        }
\ No newline at end of file
+        if raise_errors:
+            raise
+        return _error_result(str(e))
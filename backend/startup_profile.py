@@ -0,0 +1,97 @@
+"""
+Startup profiling.
+
+In the server: set STARTUP_PROFILE=1 and main.py reports how long each
+lifespan step took and when the app was ready to serve.
+
+Per-module import cost: `python startup_profile.py` boots main.py in a child
+process with `-X importtime` and prints the most expensive imports.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+ENABLED = os.getenv("STARTUP_PROFILE", "0") == "1"
+
+# Imported first by main.py, so this is (almost) process start
+_process_start = time.perf_counter()
+_steps = []
+
+@contextmanager
+def profile_step(name):
+    """Times one startup step when profiling is enabled."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if ENABLED:
+            _steps.append((name, time.perf_counter() - start))
+
+def report():
+    if not ENABLED:
+        return
+    print("⏱️  STARTUP PROFILE")
+    for name, seconds in _steps:
+        print(f"   {name:<28}{seconds * 1000:>10.1f} ms")
+    print(f"   {'ready (since main import)':<28}{(time.perf_counter() - _process_start) * 1000:>10.1f} ms")
+
+# --- IMPORT PROFILE (run as a script) ---
+BOOT_SNIPPET = (
+    "import asyncio, main\n"
+    "async def boot():\n"
+    "    async with main.app.router.lifespan_context(main.app):\n"
+    "        pass\n"
+    "asyncio.run(boot())\n"
+)
+
+def parse_importtime(stderr):
+    """Parses `-X importtime` output into (module, self_us, cumulative_us, depth)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def profile_imports(top=25, boot=True):
+    import subprocess
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, STARTUP_PROFILE="1")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", BOOT_SNIPPET if boot else "import main"],
+        cwd=backend_dir, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+
+    rows = parse_importtime(result.stderr)
+    by_package = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+
+    print(result.stdout.rstrip())
+    print(f"\n📦 Slowest imports (cumulative, top {top}):")
+    for name, _, cumulative_us, depth in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"   {cumulative_us / 1000:>9.1f} ms  {'  ' * depth}{name}")
+
+    print(f"\n📦 Import cost by top-level package (self time, top {top}):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"   {self_us / 1000:>9.1f} ms  {package}")
+
+    print(f"\n🚀 Total boot: {wall:.2f}s wall, {sum(r[1] for r in rows) / 1e6:.2f}s importing {len(rows)} modules")
+    if result.returncode != 0:
+        print(f"❌ Boot failed:\n{result.stderr[-2000:]}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profile backend import and startup cost.")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--imports-only", action="store_true", help="Only import main, skip the lifespan")
+    args = parser.parse_args()
+    profile_imports(args.top, boot=not args.imports_only)
@@ -1,15 +1,20 @@
+import csv
+import io
 import json
-import psycopg2
+import psycopg
 from typing import List
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from pydantic import BaseModel
-from database import get_db_connection
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from database import get_db
 
-# IMPORT THE NEW SERVICE
-from similarity_service import perform_similarity_check
+# Similarity checks run in the background job queue
+from similarity_jobs import enqueue_similarity_job, enqueue_similarity_jobs, worker_pool
 
 router = APIRouter()
 
+# A teacher mentors at most this many projects
+MAX_PROJECTS_PER_MENTOR = 5
+
 # --- MODELS ---
 class TeamMember(BaseModel):
     name: str
@@ -26,8 +31,7 @@ class TeamCreate(BaseModel):
 
 # --- CREATE TEAM ---
 @router.post("/create-team")
-def create_team(team_data: TeamCreate):
-    conn = get_db_connection()
+async def create_team(team_data: TeamCreate, conn=Depends(get_db)):
     cursor = conn.cursor()
 
     try:
@@ -35,104 +39,303 @@ def create_team(team_data: TeamCreate):
         input_usns = [m.usn for m in team_data.team_members]
         if len(input_usns) != len(set(input_usns)):
             raise HTTPException(status_code=400, detail="Duplicate USNs in request.")
+        input_emails = [m.email for m in team_data.team_members]
+        if len(input_emails) != len(set(input_emails)):
+            raise HTTPException(status_code=400, detail="Duplicate emails in request.")
 
-        # 2. VALIDATION (Global Uniqueness)
-        for member in team_data.team_members:
-            check_query = """
-                SELECT team_name 
-                FROM teams t, jsonb_array_elements(t.team_members) as m 
-                WHERE m->>'usn' = %s
-            """
-            cursor.execute(check_query, (member.usn,))
-            existing_team = cursor.fetchone()
-            if existing_team:
-                raise HTTPException(status_code=400, detail=f"Student {member.usn} is already in team '{existing_team['team_name']}'.")
+        # 2. VALIDATION (Global Uniqueness): one indexed lookup for the whole team
+        check_query = """
+            SELECT tm.usn, t.team_name
+            FROM team_members tm
+            JOIN teams t ON t.team_id = tm.team_id
+            WHERE tm.usn = ANY(%s) OR tm.email = ANY(%s)
+            LIMIT 1
+        """
+        await cursor.execute(check_query, (input_usns, input_emails))
+        existing_team = await cursor.fetchone()
+        if existing_team:
+            raise HTTPException(status_code=400, detail=f"Student {existing_team['usn']} is already in team '{existing_team['team_name']}'.")
 
         # 3. INSERT TEAM
         members_json = json.dumps([member.dict() for member in team_data.team_members])
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO teams (team_name, team_size, team_members)
             VALUES (%s, %s, %s)
             RETURNING team_id
         """, (team_data.team_name, team_data.team_size, members_json))
-        team_id = cursor.fetchone()['team_id']
+        team_id = (await cursor.fetchone())['team_id']
+        # The unique indexes also stop a concurrent request adding the same student
+        await cursor.executemany("""
+            INSERT INTO team_members (team_id, position, name, usn, email, dept)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, [(team_id, i, m.name, m.usn, m.email, m.dept) for i, m in enumerate(team_data.team_members)])
 
         # 4. INSERT PROJECT
-        cursor.execute("""
+        await cursor.execute("""
             INSERT INTO submitted_projects (team_id, project_title, project_synopsis)
             VALUES (%s, %s, %s)
             RETURNING submitted_project_id
         """, (team_id, team_data.project_title, team_data.project_synopsis))
-        project_id = cursor.fetchone()['submitted_project_id']
-
-        # ------------------------------------------------------------------
-        # 🌟 NEW: RUN SIMILARITY CHECK & UPDATE DB
-        # ------------------------------------------------------------------
-        # Perform the check
-        similarity_results = perform_similarity_check(team_data.project_title, team_data.project_synopsis)
-
-        if similarity_results:
-            # Extract data directly from the service results
-            # The service now ensures these lists match and are populated from the index
-            sim_ids = similarity_results.get('similar_projects_id', [])
-            sim_titles = similarity_results.get('similar_project_titles', [])
-
-            cursor.execute("""
-                UPDATE submitted_projects
-                SET similarity_score = %s,
-                    similar_projects_id = %s,
-                    similar_project_titles = %s,
-                    similarity_description = %s
-                WHERE submitted_project_id = %s
-            """, (
-                similarity_results.get('similarity_score', 0),
-                json.dumps(sim_ids),    # Direct list of IDs
-                json.dumps(sim_titles), # Direct list of Titles
-                similarity_results.get('similarity_description', ""),
-                project_id
-            ))
-        # ------------------------------------------------------------------
-
-        # 5. ASSIGN MENTOR
+        project_id = (await cursor.fetchone())['submitted_project_id']
+
+        # 5. QUEUE SIMILARITY CHECK (runs in similarity_jobs workers after commit)
+        job_id = await enqueue_similarity_job(cursor, project_id)
+
+        # 6. ASSIGN MENTOR
         if not team_data.team_members:
              raise HTTPException(status_code=400, detail="No members.")
         
         first_dept = team_data.team_members[0].dept
         
-        cursor.execute("""
+        await cursor.execute("""
             SELECT teacher_id, name, total_projects 
             FROM teachers 
-            WHERE dept = %s AND total_projects < 5 
+            WHERE dept = %s AND total_projects < %s 
             ORDER BY teacher_id ASC 
             LIMIT 1 
             FOR UPDATE
-        """, (first_dept,))
-        mentor = cursor.fetchone()
+        """, (first_dept, MAX_PROJECTS_PER_MENTOR))
+        mentor = await cursor.fetchone()
 
         if not mentor:
-            conn.rollback() 
+            await conn.rollback() 
             raise HTTPException(status_code=400, detail=f"No mentor available in {first_dept}.")
 
         mentor_id = mentor['teacher_id']
-        cursor.execute("UPDATE submitted_projects SET mentor_id = %s WHERE submitted_project_id = %s", (mentor_id, project_id))
-        cursor.execute("UPDATE teachers SET total_projects = total_projects + 1 WHERE teacher_id = %s", (mentor_id,))
+        await cursor.execute("UPDATE submitted_projects SET mentor_id = %s WHERE submitted_project_id = %s", (mentor_id, project_id))
+        await cursor.execute("UPDATE teachers SET total_projects = total_projects + 1 WHERE teacher_id = %s", (mentor_id,))
         
-        conn.commit()
+        await conn.commit()
+        worker_pool.notify()
         
         return {
             "message": "Team created and Project Submitted successfully",
             "team_id": team_id,
             "project_id": project_id,
             "mentor": mentor['name'],
-            "similarity_score": similarity_results['similarity_score'] if similarity_results else 0
+            "similarity_job_id": job_id,
+            "similarity_status": "queued"
         }
 
-    except psycopg2.errors.UniqueViolation:
-        conn.rollback()
+    except psycopg.errors.UniqueViolation as e:
+        await conn.rollback()
+        if e.diag.constraint_name in ("idx_team_members_usn", "idx_team_members_email"):
+            raise HTTPException(status_code=400, detail="A student in this team is already in another team.")
         raise HTTPException(status_code=400, detail="Team Name already exists")
+    except HTTPException:
+        await conn.rollback()
+        raise
     except Exception as e:
-        conn.rollback()
+        await conn.rollback()
         print(f"Error: {e}") 
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
\ No newline at end of file
+
+# --- BULK IMPORT ---
+# One CSV line per team member; the team and project columns repeat on each line
+CSV_COLUMNS = ("team_name", "project_title", "project_synopsis", "name", "usn", "email", "dept")
+
+def parse_import(content_type, body):
+    """
+    [(row, team, error)] from a JSON array of /create-team bodies or a CSV (row = array
+    position / first line). error is set for a CSV team whose lines disagree on its project.
+    """
+    if content_type.startswith("text/csv"):
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"CSV is missing columns: {', '.join(missing)}")
+        teams = {}
+        # Line 1 is the header
+        for line, record in enumerate(reader, start=2):
+            record = {key: (value or "").strip() for key, value in record.items() if key}
+            if record["team_name"] not in teams:
+                teams[record["team_name"]] = [line, {
+                    "team_name": record["team_name"],
+                    "project_title": record["project_title"],
+                    "project_synopsis": record["project_synopsis"],
+                    "team_members": [],
+                }, None]
+            first_line, team, error = teams[record["team_name"]]
+            changed = [key for key in ("project_title", "project_synopsis") if record[key] != team[key]]
+            if changed and error is None:
+                teams[record["team_name"]][2] = f"Line {line}: {', '.join(changed)} differs from line {first_line}."
+            team["team_members"].append({key: record[key] for key in ("name", "usn", "email", "dept")})
+        for _, team, _ in teams.values():
+            team["team_size"] = len(team["team_members"])
+        return [tuple(entry) for entry in teams.values()]
+
+    try:
+        items = json.loads(body)
+    except ValueError:
+        items = None
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Send a JSON array of teams or a text/csv body.")
+    return [(row, item, None) for row, item in enumerate(items, start=1)]
+
+def validate_import(rows):
+    """
+    Checks each team on its own and against the earlier teams of the same import.
+    Returns (results, [(result, team)] of teams that passed).
+    """
+    results, valid = [], []
+    names, usns, emails = {}, {}, {}
+    for row, data, error in rows:
+        result = {"row": row, "team_name": data.get("team_name") if isinstance(data, dict) else None, "status": "error"}
+        results.append(result)
+        if error:
+            result["error"] = error
+            continue
+        try:
+            team = TeamCreate.model_validate(data)
+        except ValidationError as e:
+            result["error"] = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" if err['loc'] else err['msg'] for err in e.errors()
+            )
+            continue
+
+        team_usns = [m.usn for m in team.team_members]
+        team_emails = [m.email for m in team.team_members]
+        if not team.team_members:
+            result["error"] = "No members."
+        elif len(team_usns) != len(set(team_usns)):
+            result["error"] = "Duplicate USNs in team."
+        elif len(team_emails) != len(set(team_emails)):
+            result["error"] = "Duplicate emails in team."
+        elif team.team_name in names:
+            result["error"] = f"Team name already used on row {names[team.team_name]}."
+        else:
+            taken = [(usn, usns[usn]) for usn in team_usns if usn in usns]
+            taken += [(email, emails[email]) for email in team_emails if email in emails]
+            if taken:
+                result["error"] = f"Student {taken[0][0]} is also in team '{taken[0][1]}' in this import."
+        if "error" in result:
+            continue
+
+        names[team.team_name] = row
+        usns.update((usn, team.team_name) for usn in team_usns)
+        emails.update((email, team.team_name) for email in team_emails)
+        valid.append((result, team))
+    return results, valid
+
+@router.post("/import-teams")
+async def import_teams(request: Request, conn=Depends(get_db)):
+    """
+    Creates many teams and their project submissions in one transaction, like
+    /create-team for each. Body: a JSON array of /create-team bodies, or text/csv
+    with the CSV_COLUMNS header. Teams that fail validation are reported and
+    skipped; the response has one result per team.
+    """
+    rows = parse_import(request.headers.get("content-type", ""), await request.body())
+    results, teams = validate_import(rows)
+    cursor = conn.cursor()
+
+    try:
+        # 1. VALIDATION against the database: one query for all names, one for all members
+        await cursor.execute("SELECT team_name FROM teams WHERE team_name = ANY(%s)",
+                             ([team.team_name for _, team in teams],))
+        existing_names = {row['team_name'] for row in await cursor.fetchall()}
+        await cursor.execute("""
+            SELECT tm.usn, tm.email, t.team_name
+            FROM team_members tm
+            JOIN teams t ON t.team_id = tm.team_id
+            WHERE tm.usn = ANY(%s) OR tm.email = ANY(%s)
+        """, ([m.usn for _, team in teams for m in team.team_members],
+              [m.email for _, team in teams for m in team.team_members]))
+        existing_members = {}
+        for row in await cursor.fetchall():
+            existing_members[row['usn']] = existing_members[row['email']] = row['team_name']
+
+        # 2. ASSIGN MENTORS in one pass: lock every teacher with room in the departments involved,
+        # then fill them in teacher_id order, as /create-team would one team at a time
+        depts = {team.team_members[0].dept for _, team in teams}
+        await cursor.execute("""
+            SELECT teacher_id, name, dept, total_projects
+            FROM teachers
+            WHERE dept = ANY(%s) AND total_projects < %s
+            ORDER BY teacher_id ASC
+            FOR UPDATE
+        """, (list(depts), MAX_PROJECTS_PER_MENTOR))
+        mentors = {}
+        for mentor in await cursor.fetchall():
+            mentors.setdefault(mentor['dept'], []).append(dict(mentor))
+
+        accepted = []
+        for result, team in teams:
+            taken = [m for m in team.team_members if m.usn in existing_members or m.email in existing_members]
+            dept = team.team_members[0].dept
+            available = [m for m in mentors.get(dept, []) if m['total_projects'] < MAX_PROJECTS_PER_MENTOR]
+            if team.team_name in existing_names:
+                result["error"] = "Team Name already exists"
+            elif taken:
+                member = taken[0]
+                result["error"] = (f"Student {member.usn} is already in team "
+                                   f"'{existing_members.get(member.usn) or existing_members[member.email]}'.")
+            elif not available:
+                result["error"] = f"No mentor available in {dept}."
+            else:
+                available[0]['total_projects'] += 1
+                accepted.append((result, team, available[0]))
+
+        if not accepted:
+            await conn.rollback()
+            return {"imported": 0, "failed": len(results), "results": results}
+
+        # 3. INSERT TEAMS (multi-row), then their members with COPY
+        await cursor.execute("""
+            INSERT INTO teams (team_name, team_size, team_members)
+            SELECT * FROM unnest(%s::text[], %s::int[], %s::jsonb[])
+            RETURNING team_id, team_name
+        """, ([team.team_name for _, team, _ in accepted],
+              [team.team_size for _, team, _ in accepted],
+              [json.dumps([m.model_dump() for m in team.team_members]) for _, team, _ in accepted]))
+        team_ids = {row['team_name']: row['team_id'] for row in await cursor.fetchall()}
+        async with cursor.copy("COPY team_members (team_id, position, name, usn, email, dept) FROM STDIN") as copy:
+            for _, team, _ in accepted:
+                for i, m in enumerate(team.team_members):
+                    await copy.write_row((team_ids[team.team_name], i, m.name, m.usn, m.email, m.dept))
+
+        # 4. INSERT PROJECTS with their mentors
+        await cursor.execute("""
+            INSERT INTO submitted_projects (team_id, project_title, project_synopsis, mentor_id)
+            SELECT * FROM unnest(%s::int[], %s::text[], %s::text[], %s::int[])
+            RETURNING submitted_project_id, team_id
+        """, ([team_ids[team.team_name] for _, team, _ in accepted],
+              [team.project_title for _, team, _ in accepted],
+              [team.project_synopsis for _, team, _ in accepted],
+              [mentor['teacher_id'] for _, _, mentor in accepted]))
+        project_ids = {row['team_id']: row['submitted_project_id'] for row in await cursor.fetchall()}
+
+        # 5. QUEUE SIMILARITY CHECKS for the whole batch, and count the mentors' new projects
+        job_ids = await enqueue_similarity_jobs(cursor, project_ids.values())
+        assigned = {}
+        for _, _, mentor in accepted:
+            assigned[mentor['teacher_id']] = assigned.get(mentor['teacher_id'], 0) + 1
+        await cursor.execute("""
+            UPDATE teachers t
+            SET total_projects = t.total_projects + a.projects
+            FROM unnest(%s::int[], %s::int[]) AS a(teacher_id, projects)
+            WHERE t.teacher_id = a.teacher_id
+        """, (list(assigned), list(assigned.values())))
+
+        await conn.commit()
+        worker_pool.notify()
+
+    except psycopg.errors.UniqueViolation:
+        # A concurrent /create-team or import took a name or student after validation
+        await conn.rollback()
+        raise HTTPException(status_code=409, detail="Teams or students changed during the import, please retry.")
+    except Exception as e:
+        await conn.rollback()
+        print(f"Error importing teams: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    for result, team, mentor in accepted:
+        team_id = team_ids[team.team_name]
+        result.update({
+            "status": "created",
+            "team_id": team_id,
+            "project_id": project_ids[team_id],
+            "mentor": mentor['name'],
+            "similarity_job_id": job_ids[project_ids[team_id]],
+        })
+    return {"imported": len(accepted), "failed": len(results) - len(accepted), "results": results}
@@ -2,7 +2,10 @@ import sys
 import os
 import json
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
@@ -26,9 +29,9 @@ if similarity_dir not in sys.path:
 
 # --- 2. IMPORT MODULES ---
 try:
-    from src.vector_engine import VectorEngine
-    from src.llm_judge import GeminiJudge
-    print("✅ Successfully imported VectorEngine and GeminiJudge")
+    # The engine and judge are loaded by the shared registry, not at import time
+    from similarity_service import engine_registry, IndexNotLoadedError
+    print("✅ Successfully imported the similarity service")
 except ImportError as e:
     print(f"❌ Critical Import Error: {e}")
     sys.exit(1) # Stop app if we can't import
@@ -38,8 +41,25 @@ def remove_emojis(text):
     if not text: return ""
     return text.encode('ascii', 'ignore').decode('ascii')
 
+def sse_event(event, data):
+    """Formats one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def parse_verdict(raw_verdict):
+    clean_verdict = remove_emojis(raw_verdict)
+    try:
+        return json.loads(clean_verdict)
+    except json.JSONDecodeError:
+        return {"raw_text": clean_verdict}
+
 # --- 4. FASTAPI APP SETUP ---
-app = FastAPI(title="AI Similarity Test API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the shared engine once instead of per request
+    engine_registry.warm_up()
+    yield
+
+app = FastAPI(title="AI Similarity Test API", lifespan=lifespan)
 
 # Define Request Model
 class ProjectRequest(BaseModel):
@@ -48,54 +68,87 @@ class ProjectRequest(BaseModel):
 
 @app.get("/")
 def health_check():
-    return {"status": "active", "message": "AI Test API is up and running"}
+    return {"status": "active", "message": "AI Test API is up and running", "engine": engine_registry.health()}
 
 @app.post("/test-similarity")
-def check_similarity_endpoint(request: ProjectRequest):
+async def check_similarity_endpoint(request: ProjectRequest):
     """
     Endpoint to trigger the full AI Check manually.
     """
     print(f"\n📨 Received Request: {request.title}")
     
     try:
-        # A. Initialize Engine
-        engine = VectorEngine()
-        if not engine.load_index():
+        # A. Get the warm Engine & Judge
+        try:
+            engine, judge = await run_in_threadpool(engine_registry.get)
+        except IndexNotLoadedError:
             raise HTTPException(status_code=500, detail="Vector Index not found in similarity_check folder")
 
-        # B. Initialize Judge
-        judge = GeminiJudge()
-
-        # C. Perform Search
-        matches = engine.search(request.title, request.synopsis)
+        # B. Perform Search (CPU-bound, keep it off the event loop)
+        matches = await run_in_threadpool(engine.search, request.title, request.synopsis)
         
-        # D. Get AI Verdict
+        # C. Get AI Verdict (bounded async call with deadline, retries and circuit breaker)
         print("⚖️ Asking AI Judge...")
-        raw_verdict = judge.get_verdict(
+        raw_verdict = await judge.get_verdict_async(
             {"title": request.title, "synopsis": request.synopsis}, 
             matches
         )
         
-        # E. Clean and Return
-        clean_verdict = remove_emojis(raw_verdict)
-        
-        # Parse JSON string back to Object for cleaner API response
-        try:
-            verdict_json = json.loads(clean_verdict)
-        except json.JSONDecodeError:
-            verdict_json = {"raw_text": clean_verdict}
-
+        # D. Clean and Return (JSON string back to Object for cleaner API response)
         return {
             "status": "success",
             "matches_found": len(matches),
-            "top_match_score": matches[0]['similarity'] if matches else 0,
-            "ai_response": verdict_json
+            "top_match_score": max((m['similarity'] for m in matches), default=0),
+            "ai_response": parse_verdict(raw_verdict)
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error processing request: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/test-similarity/stream")
+async def stream_similarity_endpoint(request: ProjectRequest):
+    """
+    Same check as /test-similarity, streamed as Server-Sent Events:
+    `matches` as soon as the vector search finishes, `token` while the AI judge
+    writes its answer, then the parsed `verdict` (or an `error`).
+    """
+    print(f"\n📨 Received Stream Request: {request.title}")
+
+    try:
+        engine, judge = await run_in_threadpool(engine_registry.get)
+    except IndexNotLoadedError:
+        raise HTTPException(status_code=500, detail="Vector Index not found in similarity_check folder")
+
+    new_project = {"title": request.title, "synopsis": request.synopsis}
+
+    async def events():
+        try:
+            matches = await run_in_threadpool(engine.search, request.title, request.synopsis)
+            yield sse_event("matches", {
+                "matches_found": len(matches),
+                "top_match_score": max((m['similarity'] for m in matches), default=0),
+                "matches": matches
+            })
+
+            async for kind, text in judge.stream_verdict(new_project, matches):
+                if kind == "token":
+                    yield sse_event("token", {"text": text})
+                else:
+                    yield sse_event("verdict", {"status": "success", "ai_response": parse_verdict(text)})
+        except Exception as e:
+            print(f"❌ Error streaming request: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # --- 5. RUN SERVER ---
 if __name__ == "__main__":
     # Runs on http://localhost:8000
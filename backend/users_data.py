@@ -1,21 +1,20 @@
-from fastapi import APIRouter, HTTPException
-from database import get_db_connection
+from fastapi import APIRouter, Depends, HTTPException
+from database import get_db
 
 router = APIRouter()
 
 @router.get("/user/{email}")
-def get_user_details(email: str):
-    conn = get_db_connection()
+async def get_user_details(email: str, conn=Depends(get_db)):
     cursor = conn.cursor()
     try:
         # ---------------------------------------------------------
         # 1. Check if user is a STUDENT
         # ---------------------------------------------------------
-        cursor.execute("SELECT * FROM students WHERE email = %s", (email,))
-        student_row = cursor.fetchone()
+        await cursor.execute("SELECT * FROM students WHERE email = %s", (email,))
+        student_row = await cursor.fetchone()
         
         if student_row:
-            # Convert RealDictRow to dict
+            # Copy the row so fields can be removed
             student = dict(student_row)
             
             # Remove password for security
@@ -38,12 +37,13 @@ def get_user_details(email: str):
 
             # --- A. Find Team ---
             query_team = """
-                SELECT t.team_id, t.team_members 
-                FROM teams t, jsonb_array_elements(t.team_members) as member 
-                WHERE member->>'email' = %s
+                SELECT t.team_id, t.team_members
+                FROM team_members tm
+                JOIN teams t ON t.team_id = tm.team_id
+                WHERE tm.email = %s
             """
-            cursor.execute(query_team, (email,))
-            team_row = cursor.fetchone()
+            await cursor.execute(query_team, (email,))
+            team_row = await cursor.fetchone()
             
             if team_row:
                 student['team_members'] = team_row['team_members']
@@ -64,8 +64,8 @@ def get_user_details(email: str):
                     LEFT JOIN project_phases pp ON sp.submitted_project_id = pp.submitted_project_id
                     WHERE sp.team_id = %s
                 """
-                cursor.execute(query_project, (team_row['team_id'],))
-                project_row = cursor.fetchone()
+                await cursor.execute(query_project, (team_row['team_id'],))
+                project_row = await cursor.fetchone()
                 
                 if project_row:
                     student['project_title'] = project_row['project_title']
@@ -96,8 +96,8 @@ def get_user_details(email: str):
         # ---------------------------------------------------------
         # 2. Check if user is a TEACHER
         # ---------------------------------------------------------
-        cursor.execute("SELECT * FROM teachers WHERE email = %s", (email,))
-        teacher_row = cursor.fetchone()
+        await cursor.execute("SELECT * FROM teachers WHERE email = %s", (email,))
+        teacher_row = await cursor.fetchone()
         
         if teacher_row:
             teacher = dict(teacher_row)
@@ -129,8 +129,8 @@ def get_user_details(email: str):
                 LEFT JOIN project_phases pp ON sp.submitted_project_id = pp.submitted_project_id
                 WHERE sp.mentor_id = %s
             """
-            cursor.execute(query_mentored, (teacher['teacher_id'],))
-            projects_rows = cursor.fetchall()
+            await cursor.execute(query_mentored, (teacher['teacher_id'],))
+            projects_rows = await cursor.fetchall()
 
             teacher['mentored_projects'] = []
             
@@ -184,5 +184,3 @@ def get_user_details(email: str):
     except Exception as e:
         print(f"Error in get_user_details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
\ No newline at end of file
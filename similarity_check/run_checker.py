@@ -1,7 +1,16 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import markdown
+import numpy as np
 from xhtml2pdf import pisa
+from src.config import Config
 from src.vector_engine import VectorEngine
 from src.llm_judge import GeminiJudge
+from src.verdict_gate import VerdictGate
 
 def save_to_pdf(markdown_text, filename="Similarity_Report.pdf"):
     """Converts Markdown verdict to a styled PDF."""
@@ -59,20 +68,23 @@ def save_to_pdf(markdown_text, filename="Similarity_Report.pdf"):
     except Exception as e:
         print(f"❌ Failed to save PDF: {e}")
 
-def check_proposal(title, synopsis):
+def load_engine():
+    """Loads the index and judge once so several proposals can share them."""
+    engine = VectorEngine()
+    if not engine.load_index():
+        raise FileNotFoundError("Index files not found. Please run 'run_indexer.py' first.")
+    return engine, VerdictGate(GeminiJudge())
+
+def check_proposal(title, synopsis, engine=None, judge=None):
     print(f"\n🔎 Analyzing Proposal: '{title}'...")
 
     # 1. Initialize Engines
-    try:
-        engine = VectorEngine()
-        if not engine.load_index():
-            print("❌ Error: Index files not found. Please run 'run_indexer.py' first.")
+    if engine is None:
+        try:
+            engine, judge = load_engine()
+        except Exception as e:
+            print(f"❌ Initialization Error: {e}")
             return
-        
-        judge = GeminiJudge()
-    except Exception as e:
-        print(f"❌ Initialization Error: {e}")
-        return
 
     # 2. Vector Search
     print("   ...Searching database for similarities...")
@@ -82,8 +94,11 @@ def check_proposal(title, synopsis):
     for i, m in enumerate(matches):
         print(f"   Match #{i+1}: {m['name']} (Similarity: {m['similarity']}%)")
 
-    # 3. AI Verdict
-    print("\n⚖️  Sending evidence to AI Judge (DeepSeek)...")
+    # 3. AI Verdict (skipped for clearly unique proposals)
+    if judge.should_skip(matches):
+        print(f"\n✅ Best match is below {judge.threshold}% similarity. Skipping AI Judge.")
+    else:
+        print("\n⚖️  Sending evidence to AI Judge (DeepSeek)...")
     verdict = judge.get_verdict({"title": title, "synopsis": synopsis}, matches)
     
     # Print to Console
@@ -96,9 +111,140 @@ def check_proposal(title, synopsis):
     # 4. Save to PDF
     save_to_pdf(verdict, f"Report_{title.replace(' ', '_')}.pdf")
 
+# --- BATCH MODE ---
+def read_proposals(path):
+    """Reads proposals from a CSV (title,synopsis[,id] header) or JSONL file."""
+    proposals = []
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith(('.jsonl', '.ndjson')):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            title = (row.get('title') or '').strip()
+            synopsis = (row.get('synopsis') or '').strip()
+            if title or synopsis:
+                proposals.append({"id": row.get('id'), "title": title, "synopsis": synopsis})
+    return proposals
+
+def parse_verdict(raw_verdict):
+    try:
+        return json.loads(raw_verdict)
+    except (TypeError, json.JSONDecodeError):
+        return {"raw_text": raw_verdict}
+
+def check_batch(input_path, output_path, top_k=3, workers=None, encode_batch_size=256):
+    """
+    Screens many proposals at once: batched encoding, one matrix index.search,
+    judge calls fanned out over a bounded thread pool, and a single JSON report.
+    """
+    timings = {}
+    workers = workers or Config.LLM_MAX_CONCURRENCY
+
+    start = time.perf_counter()
+    engine, judge = load_engine()
+    timings['load_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proposals = read_proposals(input_path)
+    timings['read_s'] = time.perf_counter() - start
+    print(f"📥 Loaded {len(proposals)} proposals from {input_path}")
+    if not proposals:
+        print("⚠️ Nothing to check.")
+        return None
+
+    # 1. Encode in large batches
+    start = time.perf_counter()
+    queries = [(p['title'], p['synopsis']) for p in proposals]
+    vectors = [
+        engine.encode_queries(queries[i:i + encode_batch_size])
+        for i in range(0, len(queries), encode_batch_size)
+    ]
+    query_vectors = vectors[0] if len(vectors) == 1 else np.vstack(vectors)
+    timings['encode_s'] = time.perf_counter() - start
+
+    # 2. One search for the whole matrix
+    start = time.perf_counter()
+    all_matches = engine.search_vectors(query_vectors, top_k, queries=queries)
+    timings['search_s'] = time.perf_counter() - start
+    print(f"🔍 Searched {len(proposals)} proposals in {timings['search_s']:.2f}s")
+
+    # 3. Judge in parallel (the gate answers clearly unique proposals locally)
+    def judge_one(item):
+        proposal, matches = item
+        started = time.perf_counter()
+        try:
+            raw = judge.get_verdict({"title": proposal['title'], "synopsis": proposal['synopsis']}, matches)
+            verdict = parse_verdict(raw)
+        except Exception as e:
+            verdict = {"error": str(e), "verdict": {"status": "Error", "score": 0}}
+        return verdict, time.perf_counter() - started
+
+    start = time.perf_counter()
+    print(f"⚖️  Judging with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        judged = list(pool.map(judge_one, zip(proposals, all_matches)))
+    timings['judge_s'] = time.perf_counter() - start
+
+    # 4. Consolidated report
+    results = []
+    status_counts = {}
+    judge_latencies = []
+    for row, (proposal, matches, (verdict, latency)) in enumerate(zip(proposals, all_matches, judged)):
+        status = (verdict.get('verdict') or {}).get('status', 'Unknown')
+        status_counts[status] = status_counts.get(status, 0) + 1
+        judge_latencies.append(latency)
+        results.append({
+            "row": row,
+            "id": proposal['id'],
+            "title": proposal['title'],
+            "top_match_score": max((m['similarity'] for m in matches), default=0),
+            "matches": matches,
+            "verdict": verdict,
+            "judge_seconds": round(latency, 4),
+        })
+
+    judge_latencies.sort()
+    report = {
+        "input": input_path,
+        "proposals": len(proposals),
+        "statuses": status_counts,
+        "judge_gate": judge.stats(),
+        "timing": {
+            **{name: round(value, 4) for name, value in timings.items()},
+            "judge_p50_s": round(judge_latencies[len(judge_latencies) // 2], 4),
+            "judge_max_s": round(judge_latencies[-1], 4),
+            "proposals_per_s": round(len(proposals) / max(sum(timings.values()), 1e-9), 2),
+        },
+        "results": results,
+    }
+
+    start = time.perf_counter()
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    report['timing']['write_s'] = round(time.perf_counter() - start, 4)
+
+    print(f"\n📊 Statuses: {status_counts}")
+    print(f"⏱️  Timing: {report['timing']}")
+    print(f"✅ Report saved to: {output_path}")
+    return report
+
 if __name__ == "__main__":
-    # --- TEST INPUT ---
-    new_title = "Smart Traffic Control System"
-    new_synopsis = "A system that uses cameras and AI to change traffic lights based on vehicle density."
-    
-    check_proposal(new_title, new_synopsis)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Check project proposals for similarity.")
+    parser.add_argument("--batch", metavar="FILE", help="CSV (title,synopsis[,id]) or JSONL file of proposals")
+    parser.add_argument("--output", default="batch_report.json", help="Where to write the batch report")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="Parallel judge calls (default: LLM_MAX_CONCURRENCY)")
+    parser.add_argument("--encode-batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    if args.batch:
+        check_batch(args.batch, args.output, args.top_k, args.workers, args.encode_batch_size)
+    else:
+        # --- TEST INPUT ---
+        new_title = "Smart Traffic Control System"
+        new_synopsis = "A system that uses cameras and AI to change traffic lights based on vehicle density."
+        
+        check_proposal(new_title, new_synopsis)
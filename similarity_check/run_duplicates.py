@@ -0,0 +1,49 @@
+import argparse
+import json
+import time
+from src.database import DatabaseHandler
+from src.vector_engine import VectorEngine
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate projects already in the index.")
+    parser.add_argument("--threshold", type=float, default=90.0, help="Minimum similarity %% for a duplicate pair")
+    parser.add_argument("--block-size", type=int, default=2048, help="Vectors range-searched per block (bounds memory)")
+    parser.add_argument("--output", default="duplicates_report.json", help="JSON report path")
+    parser.add_argument("--save-db", action="store_true", help="Also write clusters to the project_duplicates table")
+    args = parser.parse_args()
+
+    print("--- 🔁 STARTING DUPLICATE SCAN ---")
+    engine = VectorEngine()
+    if not engine.load_index():
+        print("❌ Error: Index files not found. Please run 'run_indexer.py' first.")
+        return
+
+    start = time.perf_counter()
+    clusters, pair_count = engine.find_duplicates(args.threshold, args.block_size)
+    seconds = time.perf_counter() - start
+
+    print(f"🔍 Scanned {engine.index.ntotal} projects in {seconds:.2f}s: "
+          f"{pair_count} pairs, {len(clusters)} clusters at >= {args.threshold}% similarity")
+    for members in clusters[:10]:
+        print(f"   • {len(members)} projects: " + ", ".join(f"{m['id']} ({m['name']})" for m in members[:5]))
+
+    report = {
+        "threshold": args.threshold,
+        "index_type": engine.index_type(),
+        "projects_scanned": engine.index.ntotal,
+        "duplicate_pairs": pair_count,
+        "cluster_count": len(clusters),
+        "seconds": round(seconds, 3),
+        "clusters": clusters,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"✅ Report saved to: {args.output}")
+
+    if args.save_db:
+        DatabaseHandler.save_duplicate_clusters(clusters, args.threshold)
+
+    engine.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import inspect
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import numpy as np
+from src.config import Config
+from src.encoders import ENCODER_SPEC_FILE, OnnxEncoder, SentenceTransformerEncoder
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+SAMPLE_TEXTS = [
+    "Smart Traffic Control System: A system that uses cameras and AI to change traffic lights based on vehicle density.",
+    "Library Management System: Track book loans, returns and fines for a college library.",
+    "Crop Disease Detection: Identify plant diseases from leaf photos using a convolutional neural network.",
+    "Online Voting Platform: Secure web based elections for student council with OTP verification.",
+    "Hostel Mess Feedback App: Students rate daily meals and the warden sees weekly trends.",
+    "Blockchain Certificates: Tamper-proof academic certificates stored on a permissioned ledger.",
+    "Smart Irrigation: IoT soil moisture sensors switch water pumps automatically.",
+    "Attendance with Face Recognition: Classroom camera marks attendance without roll call.",
+]
+
+def export(model_name, output_dir, quantize, opset):
+    """Exports the SentenceTransformer's transformer to ONNX plus the files OnnxEncoder needs."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    print(f"📦 Exporting {model_name} to {output_dir}...")
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+
+    pooling = next((m for m in st_model if isinstance(m, Pooling)), None)
+    if pooling is None or pooling.get_pooling_mode_str() != "mean":
+        raise ValueError("Only mean-pooling SentenceTransformer models can be exported")
+    normalize = any(isinstance(m, Normalize) for m in st_model)
+
+    transformer = st_model[0]
+    hf_model = transformer.auto_model.eval()
+    tokenizer = transformer.tokenizer
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class LastHiddenState(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = hf_model
+
+        def forward(self, *inputs):
+            return self.model(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    # Newer torch defaults to the dynamo exporter; the TorchScript one handles dynamic_axes directly
+    extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            LastHiddenState(),
+            tuple(sample[name] for name in input_names),
+            os.path.join(output_dir, MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            **extra
+        )
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, TOKENIZER_FILE))
+
+    quantized_file = None
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        print("🗜️  Quantizing weights to int8...")
+        quantize_dynamic(
+            os.path.join(output_dir, MODEL_FILE),
+            os.path.join(output_dir, QUANTIZED_FILE),
+            weight_type=QuantType.QInt8
+        )
+        quantized_file = QUANTIZED_FILE
+
+    spec = {
+        "model_name": model_name,
+        "model_file": MODEL_FILE,
+        "quantized_file": quantized_file,
+        "tokenizer_file": TOKENIZER_FILE,
+        "max_seq_length": st_model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "normalize": normalize,
+    }
+    with open(os.path.join(output_dir, ENCODER_SPEC_FILE), "w", encoding="utf-8") as f:
+        json.dump(spec, f, indent=2)
+    print(f"✅ Export complete. Set EMBEDDING_BACKEND=onnx{' and ONNX_QUANTIZED=1' if quantize else ''} to use it.")
+
+def _normalize(vectors):
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+def check_parity(model_dir, quantized, tolerance, texts):
+    """
+    Compares the ONNX encoder with the reference model: each text's embedding
+    must stay close to the reference one, and so must every pairwise cosine
+    similarity (what the index ranking depends on).
+    """
+    reference = _normalize(SentenceTransformerEncoder().encode(texts))
+    candidate = _normalize(OnnxEncoder(model_dir, quantized=quantized).encode(texts))
+
+    self_cosine = np.sum(reference * candidate, axis=1)
+    pairwise_error = np.abs(reference @ reference.T - candidate @ candidate.T)
+
+    result = {
+        "backend": "onnx-int8" if quantized else "onnx",
+        "texts": len(texts),
+        "min_self_cosine": round(float(self_cosine.min()), 5),
+        "max_pairwise_error": round(float(pairwise_error.max()), 5),
+        "tolerance": tolerance,
+    }
+    result["passed"] = bool(1 - result["min_self_cosine"] <= tolerance and result["max_pairwise_error"] <= tolerance)
+    print(json.dumps(result, indent=2))
+    print("✅ Parity check passed." if result["passed"] else "❌ Parity check FAILED.")
+    return result["passed"]
+
+def _measure_backend(backend, model_dir, texts, repeats):
+    """Runs in a fresh process so import time and peak RSS belong to one backend only."""
+    start = time.perf_counter()
+    if backend == "sentence_transformers":
+        encoder = SentenceTransformerEncoder()
+    else:
+        encoder = OnnxEncoder(model_dir, quantized=(backend == "onnx-int8"))
+    load_seconds = time.perf_counter() - start
+
+    encoder.encode(texts[:1])  # warm-up
+    single = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        encoder.encode([texts[i % len(texts)]])
+        single.append((time.perf_counter() - t0) * 1000)
+
+    batch = (texts * (32 // len(texts) + 1))[:32]
+    t0 = time.perf_counter()
+    for _ in range(max(1, repeats // 10)):
+        encoder.encode(batch)
+    batch_ms = (time.perf_counter() - t0) * 1000 / max(1, repeats // 10)
+
+    return {
+        "backend": backend,
+        "load_seconds": round(load_seconds, 3),
+        "single_p50_ms": round(float(np.percentile(single, 50)), 3),
+        "single_p95_ms": round(float(np.percentile(single, 95)), 3),
+        "batch32_ms": round(batch_ms, 3),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+def benchmark(model_dir, backends, repeats):
+    results = []
+    for backend in backends:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "measure", backend,
+             "--model-dir", model_dir, "--repeats", str(repeats)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"\n{'backend':<22}{'load s':>9}{'p50 ms':>10}{'p95 ms':>10}{'batch32 ms':>12}{'RSS MB':>9}")
+    for r in results:
+        print(f"{r['backend']:<22}{r['load_seconds']:>9}{r['single_p50_ms']:>10}{r['single_p95_ms']:>10}"
+              f"{r['batch32_ms']:>12}{r['peak_rss_mb']:>9}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, verify and benchmark the ONNX embedding backend.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Export the embedding model to ONNX")
+    export_cmd.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    export_cmd.add_argument("--output-dir", default=Config.ONNX_MODEL_DIR)
+    export_cmd.add_argument("--quantize", action="store_true", help="Also write an int8 dynamically quantized model")
+    export_cmd.add_argument("--opset", type=int, default=14)
+
+    check_cmd = commands.add_parser("check", help="Parity check against the reference model")
+    check_cmd.add_argument("--model-dir", default=Config.ONNX_MODEL_DIR)
+    check_cmd.add_argument("--quantized", action="store_true")
+    check_cmd.add_argument("--tolerance", type=float, default=None,
+                           help="Max cosine deviation (default 0.001 fp32, 0.02 int8)")
+
+    bench_cmd = commands.add_parser("benchmark", help="Compare latency and memory of the backends")
+    bench_cmd.add_argument("--model-dir", default=Config.ONNX_MODEL_DIR)
+    bench_cmd.add_argument("--backends", default="sentence_transformers,onnx,onnx-int8")
+    bench_cmd.add_argument("--repeats", type=int, default=100)
+    bench_cmd.add_argument("--json", help="Write results to this file")
+
+    # Internal: one backend per process for the benchmark
+    measure_cmd = commands.add_parser("measure")
+    measure_cmd.add_argument("backend")
+    measure_cmd.add_argument("--model-dir", default=Config.ONNX_MODEL_DIR)
+    measure_cmd.add_argument("--repeats", type=int, default=100)
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(args.model, args.output_dir, args.quantize, args.opset)
+    elif args.command == "check":
+        tolerance = args.tolerance if args.tolerance is not None else (0.02 if args.quantized else 0.001)
+        if not check_parity(args.model_dir, args.quantized, tolerance, SAMPLE_TEXTS):
+            sys.exit(1)
+    elif args.command == "benchmark":
+        results = benchmark(args.model_dir, [b.strip() for b in args.backends.split(",") if b.strip()], args.repeats)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"✅ Results saved to {args.json}")
+    else:
+        print(json.dumps(_measure_backend(args.backend, args.model_dir, SAMPLE_TEXTS, args.repeats)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import json
+import random
+import time
+import numpy as np
+from src.config import Config
+from src.vector_engine import VectorEngine
+
+def make_queries(entries, n_queries, seed=7):
+    """
+    Resubmissions of existing projects, each paired with the project it copies:
+    - retitled: a different project's title on top of the original synopsis
+    - excerpt:  a new title and only the second half of the original synopsis
+    """
+    rng = random.Random(seed)
+    picks = rng.sample(entries, min(n_queries, len(entries)))
+    queries = []
+    for entry in picks:
+        other = rng.choice(entries)
+        words = (entry.get('synopsis') or '').split()
+        queries.append(("retitled", entry['id'], (other['name'], entry.get('synopsis') or '')))
+        queries.append(("excerpt", entry['id'], (other['name'], " ".join(words[len(words) // 2:]))))
+    return queries
+
+def run_mode(engine, mode, queries, top_k):
+    Config.SEARCH_MODE = mode
+    latencies = []
+    stats = {}
+    for kind, source_id, query in queries:
+        start = time.perf_counter()
+        matches = engine.search_many([query], top_k=top_k)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = [m['id'] for m in matches]
+        rank = ranked.index(source_id) + 1 if source_id in ranked else None
+        kind_stats = stats.setdefault(kind, {"queries": 0, "hit@1": 0, f"hit@{top_k}": 0, "mrr": 0.0})
+        kind_stats["queries"] += 1
+        kind_stats["hit@1"] += rank == 1
+        kind_stats[f"hit@{top_k}"] += rank is not None
+        kind_stats["mrr"] += 1.0 / rank if rank else 0.0
+
+    for kind_stats in stats.values():
+        n = kind_stats.pop("queries")
+        for key in list(kind_stats):
+            kind_stats[key] = round(kind_stats[key] / n, 4)
+    return {
+        "mode": mode,
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "quality": stats,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare semantic-only and hybrid (BM25 + vector) retrieval.")
+    parser.add_argument("--queries", type=int, default=200, help="Projects to resubmit (2 queries each)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    # One query per call, like the API, without the micro-batching delay
+    Config.SEARCH_MAX_BATCH_SIZE = 1
+    engine = VectorEngine()
+    if not engine.load_index():
+        print("❌ Error: Index files not found. Please run 'run_indexer.py' first.")
+        return
+
+    entries = [entry for _, entry in engine.metadata.items()]
+    queries = make_queries(entries, args.queries)
+    print(f"📊 {len(queries)} queries over {len(entries)} projects (top_k={args.top_k})")
+
+    results = [run_mode(engine, mode, queries, args.top_k) for mode in ("semantic", "hybrid")]
+
+    print(f"\n{'mode':<10}{'p50 ms':>9}{'p95 ms':>9}   quality")
+    for r in results:
+        quality = "  ".join(
+            f"{kind}: " + ", ".join(f"{k}={v}" for k, v in values.items()) for kind, values in r["quality"].items()
+        )
+        print(f"{r['mode']:<10}{r['latency_p50_ms']:>9}{r['latency_p95_ms']:>9}   {quality}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved to {args.json}")
+    engine.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import json
+import time
+import faiss
+import numpy as np
+from src import snapshots
+from src.config import Config
+from src.index_factory import INDEX_TYPES, create_index, train_index, index_type_of, all_vectors
+
+def load_corpus_vectors():
+    """Reads every vector out of the saved project index."""
+    _, paths = snapshots.resolve()
+    _, vectors = all_vectors(faiss.read_index(paths["index"]))
+    return vectors
+
+def synthetic_vectors(n, dimension, seed=42):
+    """Clustered gaussian vectors, roughly shaped like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    n_topics = max(8, int(np.sqrt(n)))
+    centers = rng.normal(size=(n_topics, dimension)).astype('float32')
+    topics = rng.integers(0, n_topics, size=n)
+    vectors = centers[topics] + 0.5 * rng.normal(size=(n, dimension)).astype('float32')
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype('float32')
+
+def make_queries(corpus, n_queries, seed=7):
+    """Perturbed corpus vectors: a resubmitted proposal looks like an existing one."""
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(corpus), size=n_queries)
+    queries = corpus[picks] + 0.05 * rng.normal(size=(n_queries, corpus.shape[1])).astype('float32')
+    return queries.astype('float32')
+
+def benchmark(index_type, corpus, queries, k, exact_ids=None):
+    ids = np.arange(len(corpus), dtype='int64')
+
+    start = time.perf_counter()
+    index = create_index(corpus.shape[1], len(corpus), index_type)
+    train_index(index, corpus)
+    index.add_with_ids(corpus, ids)
+    build_seconds = time.perf_counter() - start
+
+    # One query at a time, like the API does
+    latencies = []
+    found = np.empty((len(queries), k), dtype='int64')
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        _, found[i] = index.search(queries[i:i + 1], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    recall = 1.0
+    if exact_ids is not None:
+        hits = sum(len(set(found[i]) & set(exact_ids[i])) for i in range(len(queries)))
+        recall = hits / (len(queries) * k)
+
+    return {
+        "requested_type": index_type,
+        "actual_type": index_type_of(index),
+        "vectors": len(corpus),
+        f"recall@{k}": round(recall, 4),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "build_seconds": round(build_seconds, 3),
+        "index_bytes": int(faiss.serialize_index(index).size),
+    }, found
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare FAISS index types against the exact Flat baseline.")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of the saved index")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", default=",".join(INDEX_TYPES))
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        corpus = synthetic_vectors(args.synthetic, args.dim)
+    else:
+        corpus = load_corpus_vectors()
+    queries = make_queries(corpus, args.queries)
+    print(f"--- 📊 INDEX BENCHMARK: {len(corpus)} vectors, {len(queries)} queries, k={args.k} ---")
+    if len(corpus) < Config.ANN_MIN_VECTORS:
+        print(f"⚠️ Corpus is below ANN_MIN_VECTORS={Config.ANN_MIN_VECTORS}; approximate types will fall back to flat.")
+
+    baseline, exact_ids = benchmark("flat", corpus, queries, args.k)
+    results = [baseline]
+    for index_type in args.types.split(","):
+        index_type = index_type.strip()
+        if index_type and index_type != "flat":
+            results.append(benchmark(index_type, corpus, queries, args.k, exact_ids)[0])
+
+    columns = list(results[0].keys())
+    print(" | ".join(columns))
+    for row in results:
+        print(" | ".join(str(row[c]) for c in columns))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,42 @@
+import argparse
+from src.config import Config
 from src.database import DatabaseHandler
+from src.parallel_encoder import ParallelEncoder
 from src.vector_engine import VectorEngine
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the similarity index from the projects table.")
+    parser.add_argument("--chunk-size", type=int, default=Config.INDEX_CHUNK_SIZE, help="Rows per server-side cursor fetch")
+    parser.add_argument("--in-memory", action="store_true", help="Fetch everything first, then build (previous behaviour)")
+    parser.add_argument("--workers", type=int, default=Config.INDEX_WORKERS,
+                        help="Encoder processes (0 = one per core)")
+    args = parser.parse_args()
+
     print("--- 🚀 STARTING INDEXER ---")
-    
-    # 1. Fetch Data from AWS RDS
-    projects = DatabaseHandler.fetch_projects()
-    
-    if not projects:
-        print("⚠️ No projects found. Exiting.")
-        return
+    # Several encoder processes, each with its own model copy, for big rebuilds
+    model = ParallelEncoder(args.workers or None) if args.workers != 1 else None
+    engine = VectorEngine(model=model)
+
+    if args.in_memory:
+        # 1. Fetch Data from AWS RDS
+        projects = DatabaseHandler.fetch_projects()
+        if not projects:
+            print("⚠️ No projects found. Exiting.")
+            return
+        # 2. Build and Save Vector Index
+        engine.build_index(projects)
+    else:
+        # Fetch, encode and index overlap chunk by chunk in constant memory
+        total = DatabaseHandler.count_projects()
+        if not total:
+            print("⚠️ No projects found. Exiting.")
+            return
+        engine.build_index_streaming(DatabaseHandler.iter_projects(args.chunk_size), total=total)
+
+    if model is not None:
+        model.print_stats()
+        model.close()
 
-    # 2. Build and Save Vector Index
-    engine = VectorEngine()
-    engine.build_index(projects)
-    
     print("\n✅ INDEXING COMPLETE. You can now run 'run_checker.py'")
 
 if __name__ == "__main__":
@@ -0,0 +1,426 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.config import Config
+
+BACKEND_DIR = os.path.join(os.path.dirname(Config.BASE_DIR), "backend")
+
+# --- SYNTHETIC CORPUS ---
+TOPICS = {
+    "agriculture": "crop soil irrigation farmer yield pest drone greenhouse moisture harvest",
+    "health": "patient hospital diagnosis ecg wearable appointment medicine symptom clinic ambulance",
+    "traffic": "vehicle signal congestion camera parking lane toll accident route junction",
+    "education": "student attendance exam course quiz classroom teacher grading timetable library",
+    "finance": "payment loan budget expense fraud ledger invoice wallet stock credit",
+    "security": "intrusion malware password phishing encryption firewall authentication audit botnet vault",
+    "energy": "solar battery grid meter consumption turbine charging inverter load outage",
+    "retail": "inventory billing customer recommendation cart warehouse supplier discount checkout barcode",
+}
+TECHNIQUES = (
+    "machine learning", "deep learning", "computer vision", "iot sensors", "blockchain",
+    "a mobile app", "a web dashboard", "natural language processing", "cloud services", "edge devices",
+)
+DEPTS = ("CSE", "ISE", "ECE", "EEE", "MECH", "CIVIL")
+STATUSES = ("approved", "completed", "archived")
+
+def synthetic_projects(n, seed=42):
+    """(id, title, synopsis, dept, year, status) rows shaped like real proposals."""
+    rng = random.Random(seed)
+    topics = [(name, words.split()) for name, words in TOPICS.items()]
+    rows = []
+    for pid in range(1, n + 1):
+        topic, words = topics[rng.randrange(len(topics))]
+        picked = rng.sample(words, 4)
+        technique = rng.choice(TECHNIQUES)
+        title = f"{picked[0].title()} {picked[1].title()} {topic.title()} using {technique.title()}"
+        synopsis = (
+            f"A {topic} platform that tracks {picked[0]} and {picked[1]} with {technique}. "
+            f"It flags {picked[2]} issues early and reports {picked[3]} trends to administrators. "
+            f"Reference {pid}."
+        )
+        rows.append((pid, title, synopsis, rng.choice(DEPTS), rng.randint(2015, 2025), rng.choice(STATUSES)))
+    return rows
+
+def synthetic_queries(rows, n, seed=7):
+    """Resubmission-style queries: an existing project's synopsis under a fresh title."""
+    rng = random.Random(seed)
+    return [(f"Improved {row[1]}", row[2]) for row in rng.sample(rows, min(n, len(rows)))]
+
+# --- HELPERS ---
+def use_data_dir(data_dir):
+    """Points every index/cache path at `data_dir`, so benchmarks never touch data/."""
+    Config.DATA_DIR = data_dir
+    for name in ("INDEX_PATH", "METADATA_PATH", "METADATA_STORE_PATH", "LEXICAL_INDEX_PATH",
+                 "EMBEDDING_CACHE_PATH", "VERDICT_CACHE_PATH"):
+        setattr(Config, name, os.path.join(data_dir, os.path.basename(getattr(Config, name))))
+    Config.SNAPSHOT_DIR = os.path.join(data_dir, "snapshots")
+    Config.CURRENT_SNAPSHOT_PATH = os.path.join(data_dir, "CURRENT")
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def percentiles(samples_ms):
+    samples = np.asarray(samples_ms, dtype='float64')
+    return {
+        "n": int(len(samples)),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "mean_ms": round(float(samples.mean()), 3),
+    }
+
+def timed(fn, items):
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def quiet():
+    """Silences the per-check progress prints of the service while timing it."""
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+def throughput(fn, queries, concurrency):
+    latencies = [0.0] * len(queries)
+
+    def run(i):
+        start = time.perf_counter()
+        fn(queries[i])
+        latencies[i] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, range(len(queries))))
+    elapsed = time.perf_counter() - start
+    return dict(concurrency=concurrency, qps=round(len(queries) / elapsed, 2), **percentiles(latencies))
+
+def _child(args, env=None):
+    """Runs one measurement in a fresh interpreter and returns its JSON result (last stdout line)."""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__)] + args,
+        capture_output=True, text=True, env=env
+    )
+    if output.returncode != 0:
+        raise RuntimeError(f"{' '.join(args[:2])} failed:\n{output.stderr[-2000:]}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+# --- MEASUREMENTS (each in its own process) ---
+def measure_start(data_dir, queries):
+    """
+    Process start to first answered search: imports, encoder load, index load
+    (mmapped), and the first query, which pays every lazy initialisation.
+    """
+    t0 = time.perf_counter()
+    from src.vector_engine import VectorEngine
+    import_seconds = time.perf_counter() - t0
+
+    use_data_dir(data_dir)
+    t1 = time.perf_counter()
+    engine = VectorEngine()
+    model_seconds = time.perf_counter() - t1
+
+    t2 = time.perf_counter()
+    engine.load_index()
+    load_seconds = time.perf_counter() - t2
+
+    queries = synthetic_queries(synthetic_projects(max(queries, 50)), queries)
+    first = timed(lambda q: engine.search(*q), queries[:1])[0]
+    ready_seconds = time.perf_counter() - t0
+    warm = timed(lambda q: engine.search(*q), queries[1:])
+    engine.close()
+    return {
+        "import_seconds": round(import_seconds, 3),
+        "encoder_load_seconds": round(model_seconds, 3),
+        "index_load_seconds": round(load_seconds, 3),
+        "first_query_ms": round(first, 3),
+        "ready_seconds": round(ready_seconds, 3),
+        "warm_query": percentiles(warm),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def measure_build_scaling(rows, worker_counts, chunk_size=2000):
+    """Streaming rebuild throughput with 1..N encoder processes (speedup vs the first count)."""
+    from src.parallel_encoder import ParallelEncoder
+    from src.vector_engine import VectorEngine
+
+    runs = []
+    for workers in worker_counts:
+        model = ParallelEncoder(workers)
+        engine = VectorEngine(model=model)
+        start = time.perf_counter()
+        with quiet():
+            engine.build_index_streaming(
+                (rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)), total=len(rows)
+            )
+        seconds = time.perf_counter() - start
+        runs.append({
+            "workers": workers,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(len(rows) / seconds, 1),
+            "per_worker": model.stats(),
+        })
+        engine.close()
+        model.close()
+    for run in runs:
+        run["speedup"] = round(run["rows_per_sec"] / runs[0]["rows_per_sec"], 2)
+    return runs
+
+def measure_size(n_rows, queries, concurrency, judge_latency_ms, build_workers=()):
+    from stub_llm_server import make_server
+    from src.vector_engine import VectorEngine
+
+    data_dir = tempfile.mkdtemp(prefix="pipeline-bench-")
+    use_data_dir(data_dir)
+    # Measure the work itself, not cache hits
+    Config.EMBEDDING_CACHE_ENABLED = False
+    Config.VERDICT_CACHE_ENABLED = False
+    try:
+        rows = synthetic_projects(n_rows)
+        query_pairs = synthetic_queries(rows, queries)
+        result = {"rows": n_rows}
+
+        # 1. Build (peak RSS covers the encoder, the embeddings and the index)
+        engine = VectorEngine()
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        with quiet():
+            engine.build_index(rows)
+        build_seconds = time.perf_counter() - start
+        result["build"] = {
+            "seconds": round(build_seconds, 3),
+            "rows_per_sec": round(n_rows / build_seconds, 1),
+            "index_type": engine.index_type(),
+            "rss_before_mb": rss_before,
+            "peak_rss_mb": peak_rss_mb(),
+            "snapshot_bytes": sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(Config.SNAPSHOT_DIR) for name in names
+            ),
+        }
+        engine.close()
+
+        # 2. Cold start in fresh processes: the second one finds the files in the page cache
+        result["start"] = {}
+        for run in ("first_process", "second_process"):
+            start = time.perf_counter()
+            result["start"][run] = _child(["measure-start", "--data-dir", data_dir, "--queries", str(max(2, min(queries, 50)))])
+            # Includes interpreter start-up, which the child can't see
+            result["start"][run]["wall_seconds"] = round(time.perf_counter() - start, 3)
+
+        # 3. Stage latencies on a warm engine, one query at a time, no micro-batching
+        engine = VectorEngine()
+        engine.load_index()
+        engine.search_vectors(engine.encode_queries(query_pairs[:1]), queries=query_pairs[:1])
+        vectors = engine.encode_queries(query_pairs)
+        result["encode"] = percentiles(timed(lambda q: engine.encode_queries([q]), query_pairs))
+        result["search"] = percentiles(timed(
+            lambda i: engine.search_vectors(vectors[i:i + 1], top_k=3, queries=query_pairs[i:i + 1]),
+            range(len(query_pairs))
+        ))
+        result["search"]["mode"] = Config.SEARCH_MODE
+        result["filtered_search"] = percentiles(timed(
+            lambda i: engine.search_vectors(vectors[i:i + 1], top_k=3, filters={"dept": ["CSE"], "year_from": 2020}),
+            range(len(query_pairs))
+        ))
+        engine.close()
+
+        # 4. Judge and the full service pipeline, against a local stub LLM
+        server = make_server(port=0, latency_ms=judge_latency_ms)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        Config.OPENROUTER_BASE_URL = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        Config.OPENROUTER_API_KEY = Config.OPENROUTER_API_KEY or "benchmark"
+        # Every check goes to the (stub) LLM instead of the local verdict
+        Config.JUDGE_SKIP_BELOW = 0
+
+        if BACKEND_DIR not in sys.path:
+            sys.path.append(BACKEND_DIR)
+        from similarity_service import engine_registry, perform_similarity_check
+
+        with quiet():
+            engine_registry.warm_up()
+        engine, judge = engine_registry.get()
+        matches = [engine.search(*q) for q in query_pairs]
+        result["judge"] = percentiles(timed(
+            lambda i: judge.get_verdict({"title": query_pairs[i][0], "synopsis": query_pairs[i][1]}, matches[i]),
+            range(len(query_pairs))
+        ))
+        result["judge"]["stub_latency_ms"] = judge_latency_ms
+        with quiet():
+            result["pipeline"] = percentiles(timed(lambda q: perform_similarity_check(*q), query_pairs))
+
+        # 5. Throughput: the API's threadpool calling into one shared engine
+        result["throughput"] = {"search": [], "pipeline": []}
+        for level in concurrency:
+            result["throughput"]["search"].append(throughput(lambda q: engine.search(*q), query_pairs, level))
+            with quiet():
+                result["throughput"]["pipeline"].append(
+                    throughput(lambda q: perform_similarity_check(*q), query_pairs, level)
+                )
+        server.shutdown()
+        result["peak_rss_mb"] = peak_rss_mb()
+
+        # 6. Parallel rebuild scaling (run_indexer.py --workers)
+        if build_workers:
+            result["build_scaling"] = measure_build_scaling(rows, build_workers)
+        return result
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+# --- REPORTING ---
+def environment():
+    import faiss
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Config.BASE_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "faiss": faiss.__version__,
+        "cpu_count": os.cpu_count(),
+        "embedding_backend": Config.EMBEDDING_BACKEND,
+        "index_type": Config.INDEX_TYPE,
+        "search_mode": Config.SEARCH_MODE,
+    }
+
+def print_summary(results):
+    print(f"\n{'rows':>9}{'build s':>9}{'RSS MB':>8}{'start s':>9}{'enc p50':>9}{'srch p50':>10}"
+          f"{'srch p95':>10}{'judge p50':>11}{'pipe p95':>10}{'best qps':>10}")
+    for r in results:
+        best_qps = max(t["qps"] for t in r["throughput"]["pipeline"])
+        print(f"{r['rows']:>9}{r['build']['seconds']:>9}{r['build']['peak_rss_mb']:>8}"
+              f"{r['start']['first_process']['ready_seconds']:>9}{r['encode']['p50_ms']:>9}"
+              f"{r['search']['p50_ms']:>10}{r['search']['p95_ms']:>10}{r['judge']['p50_ms']:>11}"
+              f"{r['pipeline']['p95_ms']:>10}{best_qps:>10}")
+
+# Lower is better for all of these except qps
+COMPARED = (
+    ("build", "seconds"), ("build", "peak_rss_mb"), ("start.first_process", "ready_seconds"),
+    ("encode", "p50_ms"), ("search", "p50_ms"), ("search", "p95_ms"),
+    ("filtered_search", "p95_ms"), ("judge", "p50_ms"), ("pipeline", "p95_ms"),
+)
+
+def compare(baseline_path, candidate_path):
+    """Prints per-size changes between two result files (e.g. two commits)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(candidate_path) as f:
+        candidate = json.load(f)
+    print(f"📊 {baseline['environment']['commit']} -> {candidate['environment']['commit']}")
+    old_by_rows = {r["rows"]: r for r in baseline["results"]}
+
+    def lookup(result, section, key):
+        for part in section.split("."):
+            result = result[part]
+        return result[key]
+
+    for new in candidate["results"]:
+        old = old_by_rows.get(new["rows"])
+        if old is None:
+            continue
+        print(f"\n{new['rows']} rows")
+        metrics = [(f"{section}.{key}", lookup(old, section, key), lookup(new, section, key)) for section, key in COMPARED]
+        old_qps = max(t["qps"] for t in old["throughput"]["pipeline"])
+        new_qps = max(t["qps"] for t in new["throughput"]["pipeline"])
+        metrics.append(("pipeline best qps", old_qps, new_qps))
+        for name, before, after in metrics:
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"   {name:<34}{before:>12}{after:>12}{change:>+9.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the similarity pipeline.")
+    commands = parser.add_subparsers(dest="command")
+
+    run_cmd = commands.add_parser("run", help="Benchmark one or more synthetic corpus sizes (default)")
+    run_cmd.add_argument("--sizes", default="1000,10000", help="Comma separated corpus sizes, e.g. 1000,100000,1000000")
+    run_cmd.add_argument("--queries", type=int, default=200)
+    run_cmd.add_argument("--concurrency", default="1,8,32", help="Thread counts for the throughput runs")
+    run_cmd.add_argument("--judge-latency-ms", type=float, default=50, help="Simulated LLM latency of the stub server")
+    run_cmd.add_argument("--build-workers", default="", help="Also time rebuilds with these encoder process counts, e.g. 1,2,4,8")
+    run_cmd.add_argument("--embedding-backend", help="Override EMBEDDING_BACKEND (hashing skips the model)")
+    run_cmd.add_argument("--index-type", help="Override INDEX_TYPE")
+    run_cmd.add_argument("--json", help="Write results to this file")
+
+    compare_cmd = commands.add_parser("compare", help="Diff two result files")
+    compare_cmd.add_argument("baseline")
+    compare_cmd.add_argument("candidate")
+
+    # Internal: one measurement per process, so peak RSS and start time belong to it alone
+    size_cmd = commands.add_parser("measure-size")
+    size_cmd.add_argument("rows", type=int)
+    size_cmd.add_argument("--queries", type=int, default=200)
+    size_cmd.add_argument("--concurrency", default="1,8,32")
+    size_cmd.add_argument("--judge-latency-ms", type=float, default=50)
+    size_cmd.add_argument("--build-workers", default="")
+    start_cmd = commands.add_parser("measure-start")
+    start_cmd.add_argument("--data-dir", required=True)
+    start_cmd.add_argument("--queries", type=int, default=50)
+
+    args = parser.parse_args(sys.argv[1:] or ["run"])
+
+    if args.command == "measure-size":
+        concurrency = [int(c) for c in args.concurrency.split(",") if c.strip()]
+        build_workers = [int(w) for w in args.build_workers.split(",") if w.strip()]
+        result = measure_size(args.rows, args.queries, concurrency, args.judge_latency_ms, build_workers)
+        print(json.dumps(result))
+        return
+    if args.command == "measure-start":
+        print(json.dumps(measure_start(args.data_dir, args.queries)))
+        return
+    if args.command == "compare":
+        compare(args.baseline, args.candidate)
+        return
+
+    env = dict(os.environ)
+    if args.embedding_backend:
+        env["EMBEDDING_BACKEND"] = Config.EMBEDDING_BACKEND = args.embedding_backend
+    if args.index_type:
+        env["INDEX_TYPE"] = Config.INDEX_TYPE = args.index_type
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"--- 📊 PIPELINE BENCHMARK: sizes={sizes}, {args.queries} queries, "
+          f"backend={Config.EMBEDDING_BACKEND}, index={Config.INDEX_TYPE} ---")
+    if max(sizes) >= 100_000 and Config.EMBEDDING_BACKEND != "hashing":
+        print("⚠️ Encoding this many projects with a real model takes a long time; "
+              "--embedding-backend hashing measures everything but the model.")
+
+    results = []
+    for n_rows in sizes:
+        print(f"⏱️  {n_rows} rows...")
+        results.append(_child(
+            ["measure-size", str(n_rows), "--queries", str(args.queries),
+             "--concurrency", args.concurrency, "--judge-latency-ms", str(args.judge_latency_ms),
+             "--build-workers", args.build_workers],
+            env=env
+        ))
+    print_summary(results)
+    for r in results:
+        for run in r.get("build_scaling", []):
+            print(f"   {r['rows']} rows, {run['workers']} encoder process(es): "
+                  f"{run['rows_per_sec']:,.0f} rows/s (x{run['speedup']})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"✅ Results saved to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import random
+import threading
+import time
+import openai
+from openai import AsyncOpenAI
+from src.config import Config
+from src.llm_judge import build_messages
+from src.verdict_cache import VerdictCache
+
+# Errors worth retrying: the request may succeed if sent again
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a degraded provider.
+    Opens after `failure_threshold` consecutive failed calls, lets a single
+    probe through after `reset_timeout` seconds (half-open), and closes again
+    on the first success.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.rejected = 0
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def abandon(self):
+        """A call was cancelled before finishing; let another probe through."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def stats(self):
+        return {"state": self.state, "consecutive_failures": self._failures, "rejected": self.rejected}
+
+
+class AsyncGeminiJudge:
+    """
+    Async counterpart of GeminiJudge for the FastAPI event loop.
+
+    Every call has a deadline (LLM_TIMEOUT_S, retries included), transient
+    errors are retried with jittered exponential backoff, at most
+    LLM_MAX_CONCURRENCY calls are in flight per process, and a circuit breaker
+    returns `fallback(new_project, matches, reason)` while the provider is degraded.
+    """
+
+    def __init__(self, fallback, base_url=None, api_key=None):
+        api_key = api_key or Config.OPENROUTER_API_KEY
+        if not api_key:
+            raise ValueError("OPENROUTER_API_KEY missing. Check src/config.py pathing.")
+
+        # Retries are handled here so they share the per-call deadline
+        self.client = AsyncOpenAI(
+            base_url=base_url or Config.OPENROUTER_BASE_URL,
+            api_key=api_key,
+            timeout=Config.LLM_TIMEOUT_S,
+            max_retries=0,
+        )
+        self.model_name = Config.LLM_MODEL
+        self.fallback = fallback
+        self.breaker = CircuitBreaker(Config.LLM_BREAKER_FAILURES, Config.LLM_BREAKER_RESET_S)
+        self._semaphore = asyncio.Semaphore(Config.LLM_MAX_CONCURRENCY)
+        self.in_flight = 0
+
+        self.cache = None
+        if Config.VERDICT_CACHE_ENABLED:
+            self.cache = VerdictCache(Config.VERDICT_CACHE_PATH, Config.VERDICT_CACHE_TTL_S)
+
+    @staticmethod
+    def _is_transient(error):
+        if isinstance(error, TRANSIENT_ERRORS):
+            return True
+        return isinstance(error, openai.APIStatusError) and error.status_code in (408, 409, 429, 502, 503, 504)
+
+    async def _call(self, messages, timeout):
+        response = await asyncio.wait_for(
+            self.client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                response_format={"type": "json_object"},
+                extra_headers={"HTTP-Referer": "http://localhost:3000"}
+            ),
+            timeout=timeout
+        )
+        return response.choices[0].message.content
+
+    async def get_verdict(self, new_project, similar_projects):
+        """Returns the verdict JSON string, or the fallback verdict if the LLM is unavailable."""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = VerdictCache.key(self.model_name, new_project, similar_projects)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        if not self.breaker.allow():
+            return self.fallback(new_project, similar_projects, "LLM circuit breaker open")
+
+        messages = build_messages(new_project, similar_projects)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.LLM_TIMEOUT_S
+        last_error = None
+
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    for attempt in range(Config.LLM_MAX_RETRIES + 1):
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            last_error = asyncio.TimeoutError("LLM deadline exceeded")
+                            break
+                        try:
+                            content = await self._call(messages, remaining)
+                            json.loads(content)  # a non-JSON reply counts as a failure
+                        except Exception as e:
+                            last_error = e
+                            if not self._is_transient(e) or attempt == Config.LLM_MAX_RETRIES:
+                                break
+                            # Full jitter keeps retries from many requests from lining up
+                            backoff = random.uniform(0, Config.LLM_RETRY_BASE_S * (2 ** attempt))
+                            await asyncio.sleep(min(backoff, max(0.0, deadline - loop.time())))
+                            continue
+
+                        self.breaker.record_success()
+                        if cache_key is not None:
+                            self.cache.put(cache_key, content, [p.get('id') for p in similar_projects])
+                        return content
+                finally:
+                    self.in_flight -= 1
+        except asyncio.CancelledError:
+            # Client went away; don't count it against the provider
+            self.breaker.abandon()
+            raise
+
+        self.breaker.record_failure()
+        reason = f"AI Check Failed: {type(last_error).__name__}: {last_error}"
+        print(f"⚠️ {reason}")
+        return self.fallback(new_project, similar_projects, reason)
+
+    async def stream_verdict(self, new_project, similar_projects):
+        """
+        Async generator yielding ("token", text) as the LLM generates its answer,
+        then ("verdict", full_json). Retries only happen before the first token;
+        on failure the fallback verdict is yielded instead.
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = VerdictCache.key(self.model_name, new_project, similar_projects)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield "verdict", cached
+                return
+
+        if not self.breaker.allow():
+            yield "verdict", self.fallback(new_project, similar_projects, "LLM circuit breaker open")
+            return
+
+        messages = build_messages(new_project, similar_projects)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + Config.LLM_TIMEOUT_S
+        last_error = None
+        content = None
+        settled = False
+
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    for attempt in range(Config.LLM_MAX_RETRIES + 1):
+                        parts = []
+                        try:
+                            stream = await asyncio.wait_for(
+                                self.client.chat.completions.create(
+                                    model=self.model_name,
+                                    messages=messages,
+                                    response_format={"type": "json_object"},
+                                    extra_headers={"HTTP-Referer": "http://localhost:3000"},
+                                    stream=True
+                                ),
+                                timeout=max(0.0, deadline - loop.time())
+                            )
+                            iterator = stream.__aiter__()
+                            while True:
+                                try:
+                                    chunk = await asyncio.wait_for(
+                                        iterator.__anext__(), timeout=max(0.0, deadline - loop.time())
+                                    )
+                                except StopAsyncIteration:
+                                    break
+                                delta = chunk.choices[0].delta.content if chunk.choices else None
+                                if delta:
+                                    parts.append(delta)
+                                    yield "token", delta
+                            content = "".join(parts)
+                            json.loads(content)
+                        except Exception as e:
+                            last_error = e
+                            content = None
+                            # Once tokens reached the client a retry would duplicate them
+                            if parts or not self._is_transient(e) or attempt == Config.LLM_MAX_RETRIES:
+                                break
+                            backoff = random.uniform(0, Config.LLM_RETRY_BASE_S * (2 ** attempt))
+                            await asyncio.sleep(min(backoff, max(0.0, deadline - loop.time())))
+                            continue
+                        break
+                finally:
+                    self.in_flight -= 1
+
+            if content is not None:
+                self.breaker.record_success()
+                if cache_key is not None:
+                    self.cache.put(cache_key, content, [p.get('id') for p in similar_projects])
+                settled = True
+                yield "verdict", content
+                return
+
+            self.breaker.record_failure()
+            settled = True
+            reason = f"AI Check Failed: {type(last_error).__name__}: {last_error}"
+            print(f"⚠️ {reason}")
+            yield "verdict", self.fallback(new_project, similar_projects, reason)
+        finally:
+            if not settled:
+                # Client disconnected mid-stream; don't count it against the provider
+                self.breaker.abandon()
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": Config.LLM_MAX_CONCURRENCY,
+            "breaker": self.breaker.stats(),
+        }
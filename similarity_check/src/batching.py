@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+_STOP = object()
+
+class _SearchRequest:
+    __slots__ = ("title", "synopsis", "top_k", "future")
+
+    def __init__(self, title, synopsis, top_k):
+        self.title = title
+        self.synopsis = synopsis
+        self.top_k = top_k
+        self.future = Future()
+
+
+class SearchBatcher:
+    """
+    Coalesces concurrent VectorEngine.search calls into one batched encode
+    and one index.search over the whole query matrix.
+
+    A batch is dispatched when it reaches max_batch_size or when max_wait_ms
+    has passed since its first request. While a batch is being encoded, new
+    requests pile up in the queue and form the next batch.
+    """
+
+    def __init__(self, search_many, max_batch_size=32, max_wait_ms=2.0):
+        self._search_many = search_many
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+
+        # Counters for /similarity/health
+        self.batches = 0
+        self.requests = 0
+
+    def submit(self, title, synopsis, top_k=3):
+        """Queues one query. Returns a Future resolving to its list of matches."""
+        self._ensure_started()
+        request = _SearchRequest(title, synopsis, top_k)
+        with self._start_lock:
+            if not self._closed:
+                self._queue.put(request)
+                return request.future
+        # Engine was swapped out while this caller still held it: serve it directly
+        try:
+            request.future.set_result(self._search_many([(title, synopsis)], top_k=top_k)[0])
+        except Exception as e:
+            request.future.set_exception(e)
+        return request.future
+
+    def close(self):
+        """Stops the worker once everything already queued has been served."""
+        with self._start_lock:
+            self._closed = True
+            if self._thread is not None:
+                self._queue.put(_STOP)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0,
+        }
+
+    def _ensure_started(self):
+        if self._thread is not None or self._closed:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="search-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first):
+        """Gathers up to max_batch_size requests, waiting at most max_wait for stragglers."""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Serve this batch, then stop
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = self._collect(first)
+            top_k = max(req.top_k for req in batch)
+            try:
+                results = self._search_many([(req.title, req.synopsis) for req in batch], top_k=top_k)
+            except Exception as e:
+                for req in batch:
+                    req.future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.requests += len(batch)
+            for req, matches in zip(batch, results):
+                req.future.set_result(matches[:req.top_k])
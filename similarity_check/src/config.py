@@ -1,49 +1,158 @@
 import os
-from dotenv import load_dotenv
+import threading
+
+# --- PATH SETUP ---
+# 1. Get the directory of THIS file (src/)
+_SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+# 2. Go up one level to 'similarity_check/'
+_BASE_DIR = os.path.dirname(_SRC_DIR)
+_DATA_DIR = os.path.join(_BASE_DIR, "data")
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+def _load_env():
+    """Loads similarity_check/.env into os.environ once, on first setting access."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            env_path = os.path.join(_BASE_DIR, '.env')
+            if os.path.exists(env_path):
+                from dotenv import load_dotenv
+                load_dotenv(env_path)
+            _env_loaded = True
+
+
+class _Lazy:
+    """
+    Class attribute computed on first access (after .env is loaded) and then
+    cached on the class, so importing Config reads nothing and prints nothing.
+    Assigning Config.X = value still overrides it as before.
+    """
+
+    def __init__(self, compute):
+        self.compute = compute
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        _load_env()
+        value = self.compute()
+        setattr(owner, self.name, value)
+        return value
+
+def _env(name, default=None, cast=str):
+    def compute():
+        value = os.getenv(name, default)
+        return value if value is None else cast(value)
+    return _Lazy(compute)
+
+def _flag(name, default):
+    return _Lazy(lambda: os.getenv(name, default) == "1")
+
 
 class Config:
-    # --- PATH SETUP ---
-    # 1. Get the directory of THIS file (src/)
-    SRC_DIR = os.path.dirname(os.path.abspath(__file__))
-    # 2. Go up one level to 'similarity_check/'
-    BASE_DIR = os.path.dirname(SRC_DIR)
-    # 3. Define path to .env file explicitly
-    ENV_PATH = os.path.join(BASE_DIR, '.env')
-    
-    # --- LOAD ENVIRONMENT VARIABLES ---
-    # This loads the vars from .env into Python's os.environ
-    if os.path.exists(ENV_PATH):
-        load_dotenv(ENV_PATH)
-    else:
-        print(f"⚠️ Warning: .env file not found at {ENV_PATH}")
+    SRC_DIR = _SRC_DIR
+    BASE_DIR = _BASE_DIR
+    ENV_PATH = os.path.join(_BASE_DIR, '.env')
 
     # Database Config
-    DB_PARAMS = {
+    DB_PARAMS = _Lazy(lambda: {
         "dbname": os.getenv("DB_NAME", "truedb"),
         "user": os.getenv("DB_USER", "postgres"),
         "password": os.getenv("DB_PASSWORD"),
         "host": os.getenv("DB_HOST"),
         "port": os.getenv("DB_PORT", "5432")
-    }
+    })
 
     # API Config - OPENROUTER
-    OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-    OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+    OPENROUTER_API_KEY = _env("OPENROUTER_API_KEY")
+    # Override to point the judge at a local stub server (see stub_llm_server.py)
+    OPENROUTER_BASE_URL = _env("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+    # LLM call budget
+    LLM_TIMEOUT_S = _env("LLM_TIMEOUT_S", "30", float)  # whole call, retries included
+    LLM_MAX_RETRIES = _env("LLM_MAX_RETRIES", "2", int)
+    LLM_RETRY_BASE_S = _env("LLM_RETRY_BASE_S", "0.5", float)
+    LLM_MAX_CONCURRENCY = _env("LLM_MAX_CONCURRENCY", "8", int)
+    LLM_BREAKER_FAILURES = _env("LLM_BREAKER_FAILURES", "5", int)
+    LLM_BREAKER_RESET_S = _env("LLM_BREAKER_RESET_S", "30", float)
     
-    # Paths
-    DATA_DIR = os.path.join(BASE_DIR, "data")
-    os.makedirs(DATA_DIR, exist_ok=True) 
+    # Paths (created by whatever writes there first, not at import)
+    DATA_DIR = _DATA_DIR
 
+    # Flat index files from before snapshots; only read when there is no CURRENT snapshot
     INDEX_PATH = os.path.join(DATA_DIR, "project_vectors.index")
-    METADATA_PATH = os.path.join(DATA_DIR, "project_metadata.pkl")
+    METADATA_PATH = os.path.join(DATA_DIR, "project_metadata.pkl")  # legacy, read-only
+    METADATA_STORE_PATH = os.path.join(DATA_DIR, "project_metadata.bin")
+    LEXICAL_INDEX_PATH = os.path.join(DATA_DIR, "project_lexical.npz")
+
+    EMBEDDING_CACHE_PATH = os.path.join(DATA_DIR, "embedding_cache.sqlite")
+    VERDICT_CACHE_PATH = os.path.join(DATA_DIR, "verdict_cache.sqlite")
+
+    # Streaming indexer: rows per server-side cursor fetch, and chunks buffered between pipeline stages
+    INDEX_CHUNK_SIZE = _env("INDEX_CHUNK_SIZE", "2000", int)
+    INDEX_QUEUE_DEPTH = _env("INDEX_QUEUE_DEPTH", "4", int)
+    # Encoder processes for full rebuilds (1 = encode in the indexer process)
+    INDEX_WORKERS = _env("INDEX_WORKERS", "1", int)
+
+    # Index snapshots: each save is a new snapshots/<version>/ dir, CURRENT names the live one
+    SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+    CURRENT_SNAPSHOT_PATH = os.path.join(DATA_DIR, "CURRENT")
+    SNAPSHOT_KEEP = _env("SNAPSHOT_KEEP", "3", int)
+    # How often running workers check CURRENT for a newer snapshot (0 disables hot reload)
+    SNAPSHOT_POLL_S = _env("SNAPSHOT_POLL_S", "5", float)
 
     # Models
     EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
     LLM_MODEL = 'xiaomi/mimo-v2-flash:free'
 
-# --- DEBUG CHECK ---
-if not Config.OPENROUTER_API_KEY:
-    print(f"❌ ERROR: Could not read OPENROUTER_API_KEY from {Config.ENV_PATH}")
-    print("Make sure your .env file has: OPENROUTER_API_KEY=sk-or-v1-...")
-else:
-    print(f"✅ Config Loaded. Key found in .env: {Config.OPENROUTER_API_KEY[:5]}...")
\ No newline at end of file
+    # Embedding backend: sentence_transformers | onnx (export first with run_export_onnx.py) | hashing (benchmarks only)
+    EMBEDDING_BACKEND = _env("EMBEDDING_BACKEND", "sentence_transformers")
+    ONNX_MODEL_DIR = _env("ONNX_MODEL_DIR", os.path.join(_DATA_DIR, "onnx", EMBEDDING_MODEL))
+    ONNX_QUANTIZED = _flag("ONNX_QUANTIZED", "0")  # use the int8 model
+    ONNX_THREADS = _env("ONNX_THREADS", "0", int)  # 0 = onnxruntime default
+
+    # Memory-map the index file on load (shared page cache across workers)
+    INDEX_MMAP = _flag("INDEX_MMAP", "1")
+
+    # FAISS index type: flat | ivf_flat | ivf_pq | hnsw
+    INDEX_TYPE = _env("INDEX_TYPE", "flat")
+    # Below this many vectors approximate indexes fall back to exact flat search
+    ANN_MIN_VECTORS = _env("ANN_MIN_VECTORS", "10000", int)
+    IVF_NLIST = _env("IVF_NLIST", "0", int)  # 0 = auto (~4 * sqrt(N))
+    IVF_NPROBE = _env("IVF_NPROBE", "16", int)
+    PQ_M = _env("PQ_M", "48", int)  # must divide the embedding dimension (384)
+    PQ_NBITS = _env("PQ_NBITS", "8", int)
+    HNSW_M = _env("HNSW_M", "32", int)
+    HNSW_EF_CONSTRUCTION = _env("HNSW_EF_CONSTRUCTION", "200", int)
+    HNSW_EF_SEARCH = _env("HNSW_EF_SEARCH", "64", int)
+
+    # Retrieval: semantic (FAISS only) | hybrid (FAISS + BM25 fused with reciprocal rank fusion).
+    # Hybrid is opt-in until run_hybrid_benchmark.py shows it winning with the real model on the real corpus.
+    # The BM25 index is still saved with every snapshot, so switching needs no rebuild.
+    SEARCH_MODE = _env("SEARCH_MODE", "semantic")
+    HYBRID_CANDIDATES = _env("HYBRID_CANDIDATES", "50", int)  # taken from each retriever before fusion
+    RRF_K = _env("RRF_K", "60", int)
+
+    # Filtered searches matching at most this many projects are scored exactly over just those vectors
+    FILTER_EXACT_MAX = _env("FILTER_EXACT_MAX", "20000", int)
+
+    # Skip the LLM judge when the best match is below this similarity % (0 = always judge)
+    JUDGE_SKIP_BELOW = _env("JUDGE_SKIP_BELOW", "30", float)
+
+    # LLM verdict cache
+    VERDICT_CACHE_ENABLED = _flag("VERDICT_CACHE_ENABLED", "1")
+    VERDICT_CACHE_TTL_S = _env("VERDICT_CACHE_TTL_S", str(7 * 24 * 3600), int)
+
+    # Search micro-batching (1 disables batching)
+    SEARCH_MAX_BATCH_SIZE = _env("SEARCH_MAX_BATCH_SIZE", "32", int)
+    SEARCH_MAX_WAIT_MS = _env("SEARCH_MAX_WAIT_MS", "2", float)
+
+    # Embedding cache (shared by the indexer and online checks)
+    EMBEDDING_CACHE_ENABLED = _flag("EMBEDDING_CACHE_ENABLED", "1")
+    EMBEDDING_CACHE_MEMORY_ITEMS = _env("EMBEDDING_CACHE_MEMORY_ITEMS", "4096", int)
+    EMBEDDING_CACHE_MAX_ENTRIES = _env("EMBEDDING_CACHE_MAX_ENTRIES", "500000", int)
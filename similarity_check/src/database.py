@@ -1,10 +1,11 @@
 import psycopg2
+from psycopg2.extras import execute_values
 from src.config import Config
 
 class DatabaseHandler:
     @staticmethod
     def fetch_projects():
-        """Fetches (id, title, synopsis) from AWS RDS."""
+        """Fetches (id, title, synopsis, dept, year, status) from AWS RDS."""
         print(f"📡 Connecting to Database at {Config.DB_PARAMS['host']}...")
         
         conn = None
@@ -13,7 +14,8 @@ class DatabaseHandler:
             cur = conn.cursor()
             
             # Fetching data
-            query = "SELECT project_id, title, synopsis FROM projects"
+            # dept / year / status are stored in the index metadata as search filters
+            query = "SELECT project_id, title, synopsis, dept, year, status FROM projects"
             cur.execute(query)
             rows = cur.fetchall()
             
@@ -27,3 +29,89 @@ class DatabaseHandler:
         finally:
             if conn:
                 conn.close()
+
+    @staticmethod
+    def count_projects():
+        """Number of rows the indexer will stream (for progress and IVF sizing)."""
+        conn = None
+        try:
+            conn = psycopg2.connect(**Config.DB_PARAMS)
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*) FROM projects")
+            return cur.fetchone()[0]
+
+        except Exception as e:
+            print(f"❌ Database Error: {e}")
+            return 0
+
+        finally:
+            if conn:
+                conn.close()
+
+    @staticmethod
+    def iter_projects(chunk_size=None):
+        """
+        Yields lists of up to chunk_size (id, title, synopsis, dept, year, status)
+        rows in project_id order. A named cursor keeps the result set on the
+        server, so only one chunk is ever held here. Errors are raised (not
+        swallowed like fetch_projects) so a partial index is never published.
+        """
+        chunk_size = chunk_size or Config.INDEX_CHUNK_SIZE
+        print(f"📡 Streaming projects from {Config.DB_PARAMS['host']} in chunks of {chunk_size}...")
+
+        conn = psycopg2.connect(**Config.DB_PARAMS)
+        try:
+            with conn.cursor(name="indexer_projects") as cur:
+                cur.itersize = chunk_size
+                cur.execute("SELECT project_id, title, synopsis, dept, year, status FROM projects ORDER BY project_id")
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+        finally:
+            conn.close()
+
+    @staticmethod
+    def save_duplicate_clusters(clusters, threshold):
+        """Replaces the project_duplicates table with the latest duplicate clusters."""
+        conn = None
+        try:
+            conn = psycopg2.connect(**Config.DB_PARAMS)
+            cur = conn.cursor()
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS project_duplicates (
+                    cluster_id INTEGER NOT NULL,
+                    project_id INTEGER NOT NULL,
+                    max_similarity REAL NOT NULL,
+                    threshold REAL NOT NULL,
+                    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (cluster_id, project_id)
+                );
+            """)
+            # One transaction: readers see either the old or the new clusters
+            cur.execute("DELETE FROM project_duplicates")
+            rows = [
+                (cluster_id, member["id"], member["max_similarity"], threshold)
+                for cluster_id, members in enumerate(clusters, start=1)
+                for member in members
+            ]
+            execute_values(
+                cur,
+                "INSERT INTO project_duplicates (cluster_id, project_id, max_similarity, threshold) VALUES %s",
+                rows,
+                page_size=1000
+            )
+            conn.commit()
+            print(f"✅ Saved {len(clusters)} duplicate clusters ({len(rows)} projects) to project_duplicates.")
+            return True
+
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            print(f"❌ Database Error: {e}")
+            return False
+
+        finally:
+            if conn:
+                conn.close()
@@ -0,0 +1,101 @@
+import numpy as np
+from src.index_factory import stored_ids
+
+def similarity_to_distance(similarity_percent):
+    """Inverse of the similarity % shown in search results (see VectorEngine._to_matches)."""
+    return 1.5 * (1 - similarity_percent / 100.0)
+
+def distance_to_similarity(distance):
+    return round(max(0.0, (1.5 - float(distance)) / 1.5 * 100), 2)
+
+
+class UnionFind:
+    """Disjoint sets over project_ids (path halving + union by size)."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, x):
+        parent = self.parent
+        if x not in parent:
+            parent[x] = x
+            self.size[x] = 1
+            return x
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    def groups(self):
+        groups = {}
+        for x in self.parent:
+            groups.setdefault(self.find(x), []).append(x)
+        return list(groups.values())
+
+
+def duplicate_pairs(index, threshold, block_size=2048):
+    """
+    Yields (ids_a, ids_b, distances) arrays of near-duplicate pairs with ids_a < ids_b.
+
+    Each block of stored vectors is range-searched against the index, so memory
+    is bounded by block_size plus the neighbours found for that block (never an
+    N x N matrix). IVF/HNSW indexes make this approximate, like search().
+    """
+    radius = similarity_to_distance(threshold)
+    ids = stored_ids(index)
+    for start in range(0, len(ids), block_size):
+        block_ids = ids[start:start + block_size]
+        vectors = index.reconstruct_batch(block_ids)
+        lims, distances, neighbours = index.range_search(vectors, radius)
+
+        # Row number of every result, so the filtering below stays vectorised
+        rows = np.repeat(np.arange(len(block_ids)), np.diff(lims.astype('int64')))
+        sources = block_ids[rows]
+        keep = (neighbours != -1) & (sources < neighbours)
+        if keep.any():
+            yield sources[keep], neighbours[keep], distances[keep]
+
+
+def find_duplicates(index, metadata, threshold, block_size=2048):
+    """
+    Clusters near-duplicate projects (similarity >= threshold %) with union-find.
+    Returns (clusters, pair_count); each cluster is a list of members sorted by id,
+    largest clusters first.
+    """
+    sets = UnionFind()
+    # Best similarity each project reached inside its cluster
+    best = {}
+    pair_count = 0
+
+    for ids_a, ids_b, distances in duplicate_pairs(index, threshold, block_size):
+        pair_count += len(ids_a)
+        for a, b, d in zip(ids_a.tolist(), ids_b.tolist(), distances.tolist()):
+            sets.union(a, b)
+            similarity = distance_to_similarity(d)
+            if similarity > best.get(a, -1):
+                best[a] = similarity
+            if similarity > best.get(b, -1):
+                best[b] = similarity
+
+    clusters = []
+    for members in sets.groups():
+        clusters.append([
+            {
+                "id": pid,
+                "name": (metadata.get(pid) or {}).get("name", "Unknown Title"),
+                "max_similarity": best.get(pid, 0)
+            }
+            for pid in sorted(members)
+        ])
+    clusters.sort(key=lambda c: (-len(c), c[0]["id"]))
+    return clusters, pair_count
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+import numpy as np
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache.
+    Keys are sha256(model name + normalised text), so a model change never serves stale vectors.
+    A small in-memory LRU sits in front of an on-disk SQLite table bounded to `max_entries`.
+    """
+
+    def __init__(self, path, model_name, memory_items=4096, max_entries=500_000):
+        self.path = path
+        self.model_name = model_name
+        self.memory_items = memory_items
+        self.max_entries = max_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # WAL lets the indexer and several API workers share one cache file
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        # Upper bound on the row count, so eviction doesn't COUNT(*) on every write
+        self._approx_entries = self._count()
+
+    @staticmethod
+    def normalize(text):
+        """Collapses whitespace and unicode variants that don't change the embedding input."""
+        return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+    def key(self, text):
+        payload = f"{self.model_name}\0{self.normalize(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def encode(self, texts, encode_fn):
+        """
+        Returns a float32 matrix for `texts`, calling `encode_fn` only for
+        texts that are not cached yet (each distinct text is encoded once).
+        """
+        keys = [self.key(t) for t in texts]
+        found = self._lookup(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            fresh = np.asarray(encode_fn(list(missing.values())), dtype='float32')
+            computed = dict(zip(missing.keys(), fresh))
+            self._store(computed)
+            found.update(computed)
+
+        with self._lock:
+            self.misses += len(missing)
+
+        return np.stack([found[key] for key in keys]).astype('float32')
+
+    def _lookup(self, keys):
+        found = {}
+        disk_keys = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+                else:
+                    disk_keys[key] = None
+            disk_keys = list(disk_keys)
+
+            if not disk_keys:
+                return found
+
+            now = time.time()
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(disk_keys), 500):
+                chunk = disk_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype='float32')
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows]
+                    )
+            self._conn.commit()
+        return found
+
+    def _store(self, vectors):
+        now = time.time()
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype='float32').tobytes(), now) for key, vector in vectors.items()]
+            )
+            self._approx_entries += len(vectors)
+            if self._approx_entries > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Drops the least recently used rows once the table exceeds max_entries (keeps 90%)."""
+        count = self._count()
+        if count > self.max_entries:
+            overflow = count - int(self.max_entries * 0.9)
+            self._conn.execute("""
+                DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+                )
+            """, (overflow,))
+            count -= overflow
+        self._approx_entries = count
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self):
+        with self._lock:
+            entries = self._count()
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0,
+                "memory_entries": len(self._memory),
+                "disk_entries": entries,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,146 @@
+import json
+import os
+import zlib
+import numpy as np
+from src.config import Config
+
+ENCODER_BACKENDS = ("sentence_transformers", "onnx", "hashing")
+
+# Written next to the exported model by run_export_onnx.py
+ENCODER_SPEC_FILE = "encoder.json"
+
+
+class SentenceTransformerEncoder:
+    """Reference PyTorch encoder (the original behaviour)."""
+    backend = "sentence_transformers"
+
+    def __init__(self, model_name=None):
+        # torch is only imported when this backend is actually used
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        print(f"🧠 Loading Embedding Model ({self.model_name})...")
+        self.model = SentenceTransformer(self.model_name)
+        # Same cache identity as before the backends existed, so cached embeddings stay valid
+        self.identity = self.model_name
+
+    def encode(self, texts, batch_size=32):
+        return np.asarray(self.model.encode(texts, batch_size=batch_size), dtype='float32')
+
+
+class OnnxEncoder:
+    """
+    ONNX Runtime encoder for CPU-only servers: no torch import, optional int8 weights.
+    Reproduces the SentenceTransformer pipeline (tokenize, transformer, mean pooling,
+    L2 normalisation) from the files written by run_export_onnx.py.
+    """
+    backend = "onnx"
+
+    def __init__(self, model_dir=None, quantized=None, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = model_dir or Config.ONNX_MODEL_DIR
+        quantized = Config.ONNX_QUANTIZED if quantized is None else quantized
+        threads = Config.ONNX_THREADS if threads is None else threads
+
+        spec_path = os.path.join(model_dir, ENCODER_SPEC_FILE)
+        if not os.path.exists(spec_path):
+            raise FileNotFoundError(f"No exported ONNX model in {model_dir}. Run 'run_export_onnx.py export' first.")
+        with open(spec_path, encoding="utf-8") as f:
+            spec = json.load(f)
+
+        model_file = spec["quantized_file"] if quantized else spec["model_file"]
+        if not model_file or not os.path.exists(os.path.join(model_dir, model_file)):
+            raise FileNotFoundError(f"{'Quantized' if quantized else 'ONNX'} model missing in {model_dir}.")
+
+        print(f"🧠 Loading ONNX Embedding Model ({spec['model_name']}, {'int8' if quantized else 'fp32'})...")
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, spec["tokenizer_file"]))
+        self.tokenizer.enable_truncation(max_length=spec["max_seq_length"])
+        # Padded per batch in encode(), after grouping texts of similar length
+        self.tokenizer.no_padding()
+        self.pad_id = spec["pad_token_id"]
+
+        self.normalize = spec["normalize"]
+        self.model_name = spec["model_name"]
+        self.identity = f"{self.model_name}|onnx{'-int8' if quantized else ''}"
+
+    def encode(self, texts, batch_size=32):
+        if not texts:
+            return np.empty((0, 0), dtype='float32')
+
+        # Batches of similar token length waste little compute on padding
+        encodings = self.tokenizer.encode_batch(list(texts))
+        order = np.argsort([len(e.ids) for e in encodings], kind='stable')
+
+        outputs = [None] * len(encodings)
+        for start in range(0, len(order), batch_size):
+            batch = [encodings[i] for i in order[start:start + batch_size]]
+            width = max(len(e.ids) for e in batch)
+            input_ids = np.full((len(batch), width), self.pad_id, dtype='int64')
+            mask = np.zeros((len(batch), width), dtype='int64')
+            type_ids = np.zeros((len(batch), width), dtype='int64')
+            for row, e in enumerate(batch):
+                input_ids[row, :len(e.ids)] = e.ids
+                mask[row, :len(e.ids)] = 1
+                type_ids[row, :len(e.ids)] = e.type_ids
+
+            feeds = {"input_ids": input_ids, "attention_mask": mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = type_ids
+
+            hidden = self.session.run(None, feeds)[0]
+
+            # Mean pooling over real (non-padding) tokens, as SentenceTransformer's Pooling layer does
+            weights = mask[..., None].astype('float32')
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for row, i in enumerate(order[start:start + batch_size]):
+                outputs[i] = pooled[row]
+
+        return np.vstack(outputs).astype('float32')
+
+
+class HashingEncoder:
+    """
+    Model-free bag-of-words hashing encoder for benchmarks (run_pipeline_benchmark.py):
+    texts sharing words get close vectors, at a tiny fraction of a transformer's cost.
+    Not meant for real similarity checks.
+    """
+    backend = "hashing"
+
+    def __init__(self, dimension=384):
+        from src.lexical_index import tokenize
+
+        self._tokenize = tokenize
+        self.dimension = dimension
+        self.identity = f"hashing-{dimension}"
+
+    def encode(self, texts, batch_size=32):
+        vectors = np.zeros((len(texts), self.dimension), dtype='float32')
+        for row, text in enumerate(texts):
+            for token in self._tokenize(text):
+                digest = zlib.crc32(token.encode("utf-8"))
+                vectors[row, digest % self.dimension] += 1.0 if digest & 0x80000000 else -1.0
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def create_encoder(backend=None):
+    """Builds the encoder selected by Config.EMBEDDING_BACKEND."""
+    backend = (backend or Config.EMBEDDING_BACKEND).lower()
+    if backend == "sentence_transformers":
+        return SentenceTransformerEncoder()
+    if backend == "onnx":
+        return OnnxEncoder()
+    if backend == "hashing":
+        return HashingEncoder()
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Choose one of: {', '.join(ENCODER_BACKENDS)}")
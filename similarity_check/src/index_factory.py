@@ -0,0 +1,123 @@
+import math
+import faiss
+import numpy as np
+from src.config import Config
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+def resolve_index_type(n_vectors, index_type=None):
+    """Picks the configured index type, falling back to flat for small corpora."""
+    index_type = (index_type or Config.INDEX_TYPE).lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown INDEX_TYPE '{index_type}'. Choose one of: {', '.join(INDEX_TYPES)}")
+
+    if index_type != "flat" and n_vectors < Config.ANN_MIN_VECTORS:
+        # Brute force is exact and just as fast at this size (and IVF can't train on it)
+        return "flat"
+    return index_type
+
+def _nlist_for(n_vectors):
+    nlist = Config.IVF_NLIST or int(4 * math.sqrt(n_vectors))
+    # FAISS wants ~39 training points per centroid
+    return max(1, min(nlist, n_vectors // 39))
+
+def create_index(dimension, n_vectors, index_type=None):
+    """
+    Returns an empty index whose vectors are addressed by project_id.
+    Flat and HNSW are wrapped in IndexIDMap2; IVF indexes store ids natively
+    (IndexIDMap can't remove from them). Call train_index() before adding vectors.
+    """
+    index_type = resolve_index_type(n_vectors, index_type)
+
+    if index_type == "flat":
+        base = faiss.IndexFlatL2(dimension)
+    elif index_type == "ivf_flat":
+        quantizer = faiss.IndexFlatL2(dimension)
+        base = faiss.IndexIVFFlat(quantizer, dimension, _nlist_for(n_vectors))
+    elif index_type == "ivf_pq":
+        if dimension % Config.PQ_M != 0:
+            raise ValueError(f"PQ_M={Config.PQ_M} must divide the embedding dimension {dimension}")
+        quantizer = faiss.IndexFlatL2(dimension)
+        base = faiss.IndexIVFPQ(quantizer, dimension, _nlist_for(n_vectors), Config.PQ_M, Config.PQ_NBITS)
+    else:
+        base = faiss.IndexHNSWFlat(dimension, Config.HNSW_M)
+        base.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+
+    if isinstance(base, faiss.IndexIVF):
+        # Hashtable direct map keeps reconstruct(project_id) working after removals
+        base.set_direct_map_type(faiss.DirectMap.Hashtable)
+        index = base
+    else:
+        index = faiss.IndexIDMap2(base)
+    apply_search_params(index)
+    return index
+
+def base_index(index):
+    """The index doing the actual search (unwraps IndexIDMap2)."""
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else faiss.downcast_index(index)
+
+def stored_ids(index):
+    """All project_ids currently held by the index."""
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.vector_to_array(index.id_map).astype('int64')
+    invlists = faiss.extract_index_ivf(index).invlists
+    chunks = [
+        faiss.rev_swig_ptr(invlists.get_ids(list_no), invlists.list_size(list_no)).copy()
+        for list_no in range(invlists.nlist) if invlists.list_size(list_no)
+    ]
+    return np.concatenate(chunks).astype('int64') if chunks else np.empty(0, dtype='int64')
+
+def all_vectors(index):
+    """Returns (project_ids, vectors) for everything in the index (PQ vectors are approximate)."""
+    ids = stored_ids(index)
+    if not len(ids):
+        return ids, np.empty((0, index.d), dtype='float32')
+    return ids, index.reconstruct_batch(ids)
+
+def remove_ids(index, ids):
+    """Removes project_ids. IDSelectorArray is the one selector every index type accepts."""
+    ids = np.ascontiguousarray(ids, dtype='int64')
+    return index.remove_ids(faiss.IDSelectorArray(len(ids), faiss.swig_ptr(ids)))
+
+def train_index(index, vectors):
+    """Trains IVF quantizers on the given vectors. No-op for flat and HNSW."""
+    if not index.is_trained:
+        print(f"🏋️  Training {index_type_of(index)} index on {len(vectors)} vectors...")
+        index.train(vectors)
+
+def apply_search_params(index):
+    """Applies nprobe / efSearch from Config (they aren't tied to the saved file)."""
+    base = base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = Config.IVF_NPROBE
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = Config.HNSW_EF_SEARCH
+
+def filtered_search_params(index, selector, widen=False):
+    """
+    SearchParameters restricting results to `selector` (project_ids).
+    Per-call parameters replace the index's own nprobe / efSearch, so they are
+    copied over; `widen` searches every IVF list and a much deeper HNSW beam for
+    when a selective filter left the normal search short of top_k.
+    """
+    base = base_index(index)
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=base.nlist if widen else base.nprobe)
+    if isinstance(base, faiss.IndexHNSW):
+        ef = base.hnsw.efSearch
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef * 8 if widen else ef)
+    return faiss.SearchParameters(sel=selector)
+
+def index_type_of(index):
+    base = base_index(index)
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+def supports_remove(index):
+    """HNSW graphs can't delete vectors in place; those indexes are rebuilt instead."""
+    return index_type_of(index) != "hnsw"
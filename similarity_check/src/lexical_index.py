@@ -0,0 +1,268 @@
+import math
+import re
+from array import array
+from collections import Counter
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MAX_TOKEN_LEN = 32
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or that the this to using
+uses use was were which will with system based project
+""".split())
+
+
+def tokenize(text):
+    """Lowercased alphanumeric tokens without stopwords (same rules for documents and queries)."""
+    return [
+        token for token in TOKEN_RE.findall((text or "").lower())
+        if token not in STOPWORDS and len(token) <= MAX_TOKEN_LEN
+    ]
+
+def entry_text(entry):
+    return f"{entry.get('name') or ''}: {entry.get('synopsis') or ''}"
+
+
+class LexicalIndex:
+    """
+    BM25 inverted index over project titles and synopses, stored next to
+    project_vectors.index. Catches verbatim copy-paste that embeddings can miss.
+
+    The saved part is a CSR posting list (term -> doc rows + term frequencies).
+    Incremental changes live in a small overlay, like MetadataStore, until the
+    next save() merges them. Document frequencies ignore overlay deletions
+    until then, which only nudges idf slightly.
+    """
+
+    def __init__(self, path=None, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._vocab = []
+        self._term_index = {}
+        self._offsets = np.zeros(1, dtype='int64')
+        self._post_docs = np.empty(0, dtype='int32')
+        self._post_tf = np.empty(0, dtype='float32')
+        # Row -> project_id (sorted) and token count
+        self._doc_ids = np.empty(0, dtype='int64')
+        self._doc_lens = np.empty(0, dtype='float32')
+        self._deleted = np.zeros(0, dtype=bool)
+        # project_id -> Counter of tokens, for documents added since the last save
+        self._added = {}
+        if path is not None:
+            self._open(path)
+        self._base_length = float(self._doc_lens.sum())
+
+    def _open(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self._vocab = data["vocab"].tolist()
+            self._offsets = data["offsets"]
+            self._post_docs = data["post_docs"]
+            self._post_tf = data["post_tf"]
+            self._doc_ids = data["doc_ids"]
+            self._doc_lens = data["doc_lens"]
+        self._term_index = {term: i for i, term in enumerate(self._vocab)}
+        self._deleted = np.zeros(len(self._doc_ids), dtype=bool)
+
+    def _base_row(self, pid):
+        row = int(np.searchsorted(self._doc_ids, pid))
+        if row < len(self._doc_ids) and self._doc_ids[row] == pid:
+            return row
+        return None
+
+    # --- Updates ---
+    @classmethod
+    def from_entries(cls, entries):
+        """In-memory index over metadata entries, compacted on the next save()."""
+        index = cls()
+        index.add(entries)
+        return index
+
+    def add(self, entries):
+        """Adds or replaces documents for {"id", "name", "synopsis"} entries."""
+        for entry in entries:
+            pid = int(entry["id"])
+            self.remove([pid])
+            self._added[pid] = Counter(tokenize(entry_text(entry)))
+
+    def remove(self, project_ids):
+        for pid in project_ids:
+            pid = int(pid)
+            row = self._base_row(pid)
+            if row is not None and not self._deleted[row]:
+                self._deleted[row] = True
+                self._base_length -= float(self._doc_lens[row])
+            self._added.pop(pid, None)
+
+    def __len__(self):
+        return int(len(self._doc_ids) - self._deleted.sum()) + len(self._added)
+
+    # --- Search ---
+    def search(self, text, top_n=50, allowed_ids=None):
+        """Returns up to top_n (project_id, bm25_score) pairs, best first."""
+        terms = set(tokenize(text))
+        n_docs = len(self)
+        if not terms or n_docs == 0:
+            return []
+
+        added_length = sum(sum(counts.values()) for counts in self._added.values())
+        avg_length = max((self._base_length + added_length) / n_docs, 1e-9)
+        k1, b = self.k1, self.b
+
+        base_scores = np.zeros(len(self._doc_ids), dtype='float32')
+        added_scores = {}
+        for term in terms:
+            row = self._term_index.get(term)
+            base_df = int(self._offsets[row + 1] - self._offsets[row]) if row is not None else 0
+            added_df = sum(1 for counts in self._added.values() if term in counts)
+            df = base_df + added_df
+            if df == 0:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            if base_df:
+                start, end = self._offsets[row], self._offsets[row + 1]
+                docs, tf = self._post_docs[start:end], self._post_tf[start:end]
+                norm = k1 * (1 - b + b * self._doc_lens[docs] / avg_length)
+                # Each doc appears once per term, so plain fancy-index += is safe
+                base_scores[docs] += idf * tf * (k1 + 1) / (tf + norm)
+            if added_df:
+                for pid, counts in self._added.items():
+                    tf = counts.get(term)
+                    if tf:
+                        norm = k1 * (1 - b + b * sum(counts.values()) / avg_length)
+                        added_scores[pid] = added_scores.get(pid, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        base_scores[self._deleted] = 0
+        if allowed_ids is not None:
+            base_scores[~np.isin(self._doc_ids, allowed_ids)] = 0
+            allowed = set(np.asarray(allowed_ids).tolist())
+            added_scores = {pid: s for pid, s in added_scores.items() if pid in allowed}
+
+        hits = np.flatnonzero(base_scores > 0)
+        if len(hits) > top_n:
+            hits = hits[np.argpartition(-base_scores[hits], top_n - 1)[:top_n]]
+        results = [(int(self._doc_ids[row]), float(base_scores[row])) for row in hits]
+        results.extend(added_scores.items())
+        results.sort(key=lambda item: -item[1])
+        return results[:top_n]
+
+    # --- Persistence ---
+    def save(self, path):
+        """Writes base + overlay as one compact index and returns it freshly loaded."""
+        self.write(path)
+        return LexicalIndex(path, self.k1, self.b)
+
+    def write(self, path):
+        """Merges base + overlay into the compact file format at `path`."""
+        # Live saved postings, renumbered to their new rows
+        live = ~self._deleted
+        new_row = np.cumsum(live) - 1
+        posting_terms = np.repeat(np.arange(len(self._vocab), dtype='int32'), np.diff(self._offsets))
+        keep = live[self._post_docs]
+
+        builder = LexicalIndexBuilder(self._vocab)
+        builder.add_postings(
+            posting_terms[keep], new_row[self._post_docs[keep]], self._post_tf[keep],
+            self._doc_ids[live], self._doc_lens[live]
+        )
+        # Overlay documents go after them
+        for pid, counts in self._added.items():
+            builder.add_counts(pid, counts)
+        builder.write(path)
+
+
+class LexicalIndexBuilder:
+    """
+    Collects postings as flat int32/float32 arrays (about 12 bytes each, instead
+    of a Counter per document) and writes them in the LexicalIndex file format.
+    Used for streaming index builds and by LexicalIndex.write().
+    """
+
+    # Typed arrays are moved into numpy parts every this many postings
+    FLUSH_POSTINGS = 1 << 20
+
+    def __init__(self, vocab=()):
+        self._vocab = list(vocab)
+        self._term_index = {term: i for i, term in enumerate(self._vocab)}
+        self._rows = 0
+        self._parts = []  # (terms, rows, tf, doc_ids, doc_lens) numpy chunks
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self._terms, self._doc_rows, self._tfs = array('i'), array('i'), array('f')
+        self._ids, self._lens = array('q'), array('f')
+
+    def _flush(self):
+        if not len(self._ids):
+            return
+        self._parts.append((
+            np.frombuffer(self._terms, dtype='int32'),
+            np.frombuffer(self._doc_rows, dtype='int32'),
+            np.frombuffer(self._tfs, dtype='float32'),
+            np.frombuffer(self._ids, dtype='int64'),
+            np.frombuffer(self._lens, dtype='float32'),
+        ))
+        self._reset_buffers()
+
+    def add(self, entries):
+        """Adds {"id", "name", "synopsis"} entries (each project_id once)."""
+        for entry in entries:
+            self.add_counts(int(entry["id"]), Counter(tokenize(entry_text(entry))))
+
+    def add_counts(self, pid, counts):
+        """Adds one document from its token -> count mapping."""
+        for term, tf in counts.items():
+            term_id = self._term_index.get(term)
+            if term_id is None:
+                term_id = self._term_index[term] = len(self._vocab)
+                self._vocab.append(term)
+            self._terms.append(term_id)
+            self._doc_rows.append(self._rows)
+            self._tfs.append(tf)
+        self._ids.append(pid)
+        self._lens.append(sum(counts.values()))
+        self._rows += 1
+        if len(self._terms) >= self.FLUSH_POSTINGS:
+            self._flush()
+
+    def add_postings(self, terms, rows, tf, doc_ids, doc_lens):
+        """Adds documents whose postings use term ids of this builder's vocab and rows 0..len(doc_ids)-1."""
+        self._flush()
+        self._parts.append((
+            np.asarray(terms, dtype='int32'), np.asarray(rows, dtype='int32') + self._rows,
+            np.asarray(tf, dtype='float32'), np.asarray(doc_ids, dtype='int64'), np.asarray(doc_lens, dtype='float32')
+        ))
+        self._rows += len(doc_ids)
+
+    def __len__(self):
+        return self._rows
+
+    def write(self, path):
+        self._flush()
+        if self._parts:
+            terms, rows, tfs, all_ids, all_lens = (np.concatenate(column) for column in zip(*self._parts))
+        else:
+            terms, rows, tfs = np.empty(0, 'int32'), np.empty(0, 'int32'), np.empty(0, 'float32')
+            all_ids, all_lens = np.empty(0, 'int64'), np.empty(0, 'float32')
+
+        # Rows sorted by project_id so lookups can binary-search
+        order = np.argsort(all_ids, kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        rows = rank[rows] if len(rows) else rows
+
+        postings = np.lexsort((rows, terms))
+        offsets = np.zeros(len(self._vocab) + 1, dtype='int64')
+        if len(terms):
+            np.cumsum(np.bincount(terms, minlength=len(self._vocab)), out=offsets[1:])
+
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                vocab=np.array(self._vocab, dtype=f"<U{MAX_TOKEN_LEN}"),
+                offsets=offsets,
+                post_docs=rows[postings].astype('int32'),
+                post_tf=tfs[postings].astype('float32'),
+                doc_ids=all_ids[order],
+                doc_lens=all_lens[order],
+            )
@@ -2,6 +2,52 @@ import os
 import json
 from openai import OpenAI
 from src.config import Config
+from src.verdict_cache import VerdictCache
+
+def build_messages(new_project, similar_projects):
+    """Chat messages for the judge (shared by the sync and async clients)."""
+    evidence_text = ""
+    for i, proj in enumerate(similar_projects):
+        evidence_text += f"\n[MATCH #{i+1}]\nTitle: {proj['name']}\nSynopsis: {proj['synopsis']}\n"
+
+    # --- UPDATED PROMPT FOR JSON OUTPUT ---
+    system_prompt = (
+        "You are an expert Project Reviewer. "
+        "Analyze the plagiarism risk and return the result strictly as a JSON object."
+    )
+    
+    user_prompt = f"""
+    Compare this NEW PROPOSAL against EXISTING MATCHES.
+
+    === NEW PROPOSAL ===
+    Title: {new_project['title']}
+    Synopsis: {new_project['synopsis']}
+
+    === EXISTING MATCHES ===
+    {evidence_text}
+
+    === OUTPUT FORMAT ===
+    Return ONLY a valid JSON object with this exact structure (no markdown formatting):
+    {{
+        "analysis": "Brief conceptual analysis of the new project.",
+        "comparison": [
+            {{
+                "match_name": "Name of Match 1",
+                "similarity_note": "How it is similar or different"
+            }}
+        ],
+        "verdict": {{
+            "status": "Unique" | "Suspicious" | "Plagiarized",
+            "score": 0 to 100,
+            "reasoning": "Final conclusion"
+        }}
+    }}
+    """
+
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
 
 class GeminiJudge:
     def __init__(self):
@@ -11,61 +57,37 @@ class GeminiJudge:
         self.client = OpenAI(
             base_url=Config.OPENROUTER_BASE_URL,
             api_key=Config.OPENROUTER_API_KEY,
+            timeout=Config.LLM_TIMEOUT_S,
+            max_retries=Config.LLM_MAX_RETRIES,
         )
         self.model_name = Config.LLM_MODEL
 
+        # Resubmissions against unchanged matches reuse the stored verdict
+        self.cache = None
+        if Config.VERDICT_CACHE_ENABLED:
+            self.cache = VerdictCache(Config.VERDICT_CACHE_PATH, Config.VERDICT_CACHE_TTL_S)
+
     def get_verdict(self, new_project, similar_projects):
         """Sends data to the LLM and returns a JSON string."""
+        cache_key = None
+        if self.cache is not None:
+            cache_key = VerdictCache.key(self.model_name, new_project, similar_projects)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         
-        evidence_text = ""
-        for i, proj in enumerate(similar_projects):
-            evidence_text += f"\n[MATCH #{i+1}]\nTitle: {proj['name']}\nSynopsis: {proj['synopsis']}\n"
-
-        # --- UPDATED PROMPT FOR JSON OUTPUT ---
-        system_prompt = (
-            "You are an expert Project Reviewer. "
-            "Analyze the plagiarism risk and return the result strictly as a JSON object."
-        )
-        
-        user_prompt = f"""
-        Compare this NEW PROPOSAL against EXISTING MATCHES.
-
-        === NEW PROPOSAL ===
-        Title: {new_project['title']}
-        Synopsis: {new_project['synopsis']}
-
-        === EXISTING MATCHES ===
-        {evidence_text}
-
-        === OUTPUT FORMAT ===
-        Return ONLY a valid JSON object with this exact structure (no markdown formatting):
-        {{
-            "analysis": "Brief conceptual analysis of the new project.",
-            "comparison": [
-                {{
-                    "match_name": "Name of Match 1",
-                    "similarity_note": "How it is similar or different"
-                }}
-            ],
-            "verdict": {{
-                "status": "Unique" | "Suspicious" | "Plagiarized",
-                "score": 0 to 100,
-                "reasoning": "Final conclusion"
-            }}
-        }}
-        """
+        messages = build_messages(new_project, similar_projects)
 
         try:
             response = self.client.chat.completions.create(
                 model=self.model_name,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=messages,
                 response_format={"type": "json_object"}, # Hints to model to output JSON
                 extra_headers={"HTTP-Referer": "http://localhost:3000"}
             )
             content = response.choices[0].message.content
+            if cache_key is not None and content:
+                self.cache.put(cache_key, content, [p.get('id') for p in similar_projects])
             # Ensure it's valid JSON (or return raw if parsing fails)
             return content
             
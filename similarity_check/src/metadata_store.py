@@ -0,0 +1,374 @@
+import io
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import numpy as np
+
+MAGIC = b"PMETA001"
+ALIGN = 8
+
+# Entry fields stored as variable-length UTF-8 strings (offsets + one byte blob each)
+STRING_FIELDS = ("name", "synopsis")
+# Filter attributes: low-cardinality strings stored as int32 codes into a per-field dictionary
+CATEGORY_FIELDS = ("dept", "status")
+# Filter attributes stored as plain int32 columns
+INT_FIELDS = ("year",)
+# Code / value meaning "not set" in the int32 columns
+MISSING = -1
+
+
+def normalize_filters(filters):
+    """
+    Cleans API filters into {"dept": [...], "status": [...], "year_from": int, "year_to": int}.
+    Category values match case-insensitively; a single string is accepted for one value.
+    Returns None when nothing is filtered.
+    """
+    if not filters:
+        return None
+    clean = {}
+    for field in CATEGORY_FIELDS:
+        values = filters.get(field)
+        if isinstance(values, str):
+            values = [values]
+        values = [str(v).strip().lower() for v in (values or []) if str(v).strip()]
+        if values:
+            clean[field] = values
+    for bound in ("year_from", "year_to"):
+        if filters.get(bound) is not None:
+            clean[bound] = int(filters[bound])
+    return clean or None
+
+def entry_matches(entry, filters):
+    """Python version of the column filter, for entries that only exist in the overlay."""
+    for field in CATEGORY_FIELDS:
+        if field in filters and str(entry.get(field) or "").lower() not in filters[field]:
+            return False
+    year = entry.get("year")
+    if "year_from" in filters and (year is None or year < filters["year_from"]):
+        return False
+    if "year_to" in filters and (year is None or year > filters["year_to"]):
+        return False
+    return True
+
+
+class MetadataStore:
+    """
+    Compact, memory-mapped replacement for project_metadata.pkl.
+
+    One file holds sorted project ids plus one offsets array and one UTF-8 blob
+    per string field. Opening it only maps the file, so every worker process
+    shares the same page-cache copy and load time doesn't grow with the corpus.
+    Entries are decoded lazily on lookup.
+
+    Filter attributes (dept, status, year) are stored as int32 columns so
+    matching_ids() can evaluate filters with numpy without decoding any strings.
+
+    Incremental changes are kept in a small in-memory overlay until the next save().
+    Behaves like a dict of project_id -> {"id", "name", "synopsis", "dept", "year", "status"}.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._mm = None
+        self._ids = np.empty(0, dtype='int64')
+        self._offsets = {}
+        self._blobs = {}
+        # field -> int32 column (None for stores written before the field existed)
+        self._columns = {}
+        # category field -> list of values (the codes index into it)
+        self._categories = {}
+        # project_id -> entry (added/updated) or None (deleted)
+        self._overlay = {}
+
+        if path is not None:
+            self._open(path)
+
+    # --- Reading ---
+    def _open(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a metadata store file")
+        (header_len,) = struct.unpack_from("<Q", self._mm, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mm[header_start:header_start + header_len].decode("utf-8"))
+        self._data_start = _data_start(header_len)
+
+        sections = header["sections"]
+        count = header["count"]
+        self._ids = self._view(sections["ids"], 'int64', count)
+        for field in STRING_FIELDS:
+            self._offsets[field] = self._view(sections[f"{field}_offsets"], 'int64', count + 1)
+            start, length = sections[f"{field}_blob"]
+            self._blobs[field] = (self._data_start + start, length)
+        for field in CATEGORY_FIELDS + INT_FIELDS:
+            if field in sections:
+                self._columns[field] = self._view(sections[field], 'int32', count)
+        self._categories = header.get("categories", {})
+
+    def _view(self, section, dtype, count):
+        start, _ = section
+        return np.frombuffer(self._mm, dtype=dtype, count=count, offset=self._data_start + start)
+
+    def _base_row(self, pid):
+        row = int(np.searchsorted(self._ids, pid))
+        if row < len(self._ids) and self._ids[row] == pid:
+            return row
+        return None
+
+    def _decode(self, row):
+        entry = {"id": int(self._ids[row])}
+        for field in STRING_FIELDS:
+            offsets = self._offsets[field]
+            blob_start, _ = self._blobs[field]
+            start, end = int(offsets[row]), int(offsets[row + 1])
+            entry[field] = self._mm[blob_start + start:blob_start + end].decode("utf-8")
+        for field in CATEGORY_FIELDS:
+            column = self._columns.get(field)
+            code = int(column[row]) if column is not None else MISSING
+            entry[field] = self._categories[field][code] if code != MISSING else None
+        for field in INT_FIELDS:
+            column = self._columns.get(field)
+            value = int(column[row]) if column is not None else MISSING
+            entry[field] = value if value != MISSING else None
+        return entry
+
+    # --- Filtering ---
+    def _category_mask(self, field, wanted):
+        column = self._columns.get(field)
+        if column is None:
+            return np.zeros(len(self._ids), dtype=bool)
+        codes = [code for code, value in enumerate(self._categories.get(field, [])) if value.lower() in wanted]
+        return np.isin(column, codes)
+
+    def matching_ids(self, filters):
+        """Sorted project_ids whose attributes pass normalize_filters() output."""
+        mask = np.ones(len(self._ids), dtype=bool)
+        for field in CATEGORY_FIELDS:
+            if field in filters:
+                mask &= self._category_mask(field, set(filters[field]))
+
+        if "year_from" in filters or "year_to" in filters:
+            years = self._columns.get("year")
+            if years is None:
+                mask[:] = False
+            else:
+                mask &= years != MISSING
+                if "year_from" in filters:
+                    mask &= years >= filters["year_from"]
+                if "year_to" in filters:
+                    mask &= years <= filters["year_to"]
+
+        ids = self._ids[mask]
+        if self._overlay:
+            # Overlay entries replace (or delete) their base rows
+            changed = np.fromiter(self._overlay.keys(), dtype='int64', count=len(self._overlay))
+            ids = ids[~np.isin(ids, changed)]
+            extra = [pid for pid, entry in self._overlay.items() if entry is not None and entry_matches(entry, filters)]
+            if extra:
+                ids = np.union1d(ids, np.array(extra, dtype='int64'))
+        return ids
+
+    # --- Dict interface ---
+    def __getitem__(self, pid):
+        pid = int(pid)
+        if pid in self._overlay:
+            entry = self._overlay[pid]
+            if entry is None:
+                raise KeyError(pid)
+            return dict(entry)
+        row = self._base_row(pid)
+        if row is None:
+            raise KeyError(pid)
+        return self._decode(row)
+
+    def get(self, pid, default=None):
+        try:
+            return self[pid]
+        except KeyError:
+            return default
+
+    def __contains__(self, pid):
+        pid = int(pid)
+        if pid in self._overlay:
+            return self._overlay[pid] is not None
+        return self._base_row(pid) is not None
+
+    def __setitem__(self, pid, entry):
+        self._overlay[int(pid)] = dict(entry)
+
+    def __delitem__(self, pid):
+        pid = int(pid)
+        if pid not in self:
+            raise KeyError(pid)
+        if self._base_row(pid) is not None:
+            self._overlay[pid] = None
+        else:
+            del self._overlay[pid]
+
+    def __len__(self):
+        count = len(self._ids)
+        for pid, entry in self._overlay.items():
+            in_base = self._base_row(pid) is not None
+            if entry is None and in_base:
+                count -= 1
+            elif entry is not None and not in_base:
+                count += 1
+        return count
+
+    def __iter__(self):
+        for pid in self._ids:
+            pid = int(pid)
+            if self._overlay.get(pid, 0) is not None:
+                yield pid
+        for pid, entry in self._overlay.items():
+            if entry is not None and self._base_row(pid) is None:
+                yield pid
+
+    def items(self):
+        for pid in self:
+            yield pid, self[pid]
+
+    # --- Writing ---
+    @classmethod
+    def from_entries(cls, entries):
+        """In-memory store (e.g. from a legacy pickle) that is written on the next save()."""
+        store = cls()
+        for entry in entries:
+            store[entry["id"]] = entry
+        return store
+
+    def sorted_entries(self):
+        return sorted((entry for _, entry in self.items()), key=lambda e: e["id"])
+
+    def save(self, path):
+        """Writes the merged store to `path` and returns a freshly mapped store for it."""
+        write_store(path, self.sorted_entries())
+        return MetadataStore(path)
+
+
+def _pad(f):
+    padding = (-f.tell()) % ALIGN
+    if padding:
+        f.write(b"\0" * padding)
+
+
+def _data_start(header_len):
+    """Sections start at the first aligned byte after the header."""
+    end = len(MAGIC) + 8 + header_len
+    return end + ((-end) % ALIGN)
+
+
+class MetadataWriter:
+    """
+    Writes the store file from entries arriving in id order, one chunk at a
+    time, without holding them all: each section is spooled to its own
+    temporary file (or memory buffer) and the sections are joined on close().
+
+        with MetadataWriter(path) as writer:
+            for chunk in chunks:
+                writer.add(chunk)
+    """
+
+    def __init__(self, path, spool_to_disk=True):
+        self.path = path
+        self.count = 0
+        self._last_id = None
+        self._names = ["ids"]
+        for field in STRING_FIELDS:
+            self._names += [f"{field}_offsets", f"{field}_blob"]
+        self._names += list(CATEGORY_FIELDS) + list(INT_FIELDS)
+
+        spool_dir = os.path.dirname(os.path.abspath(path))
+        self._spools = {
+            name: tempfile.TemporaryFile(dir=spool_dir) if spool_to_disk else io.BytesIO()
+            for name in self._names
+        }
+        self._string_ends = {field: 0 for field in STRING_FIELDS}
+        self._dictionaries = {field: {} for field in CATEGORY_FIELDS}
+        for field in STRING_FIELDS:
+            self._spools[f"{field}_offsets"].write(np.zeros(1, dtype='int64').tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._discard()
+
+    def add(self, entries):
+        """Appends entries; ids must be unique and larger than any added before."""
+        entries = list(entries)
+        count = len(entries)
+        if not count:
+            return
+        ids = np.fromiter((e["id"] for e in entries), dtype='int64', count=count)
+        if np.any(np.diff(ids) <= 0) or (self._last_id is not None and ids[0] <= self._last_id):
+            raise ValueError("Metadata entries must be sorted by unique id")
+        self._last_id = int(ids[-1])
+        self._spools["ids"].write(ids.tobytes())
+
+        for field in STRING_FIELDS:
+            encoded = [(e.get(field) or "").encode("utf-8") for e in entries]
+            ends = self._string_ends[field] + np.cumsum(np.fromiter(map(len, encoded), dtype='int64', count=count))
+            self._string_ends[field] = int(ends[-1])
+            self._spools[f"{field}_offsets"].write(ends.tobytes())
+            self._spools[f"{field}_blob"].write(b"".join(encoded))
+
+        for field in CATEGORY_FIELDS:
+            dictionary = self._dictionaries[field]
+            codes = np.fromiter(
+                (MISSING if e.get(field) in (None, "") else dictionary.setdefault(e[field], len(dictionary)) for e in entries),
+                dtype='int32', count=count
+            )
+            self._spools[field].write(codes.tobytes())
+        for field in INT_FIELDS:
+            values = np.fromiter(
+                (MISSING if e.get(field) is None else int(e[field]) for e in entries), dtype='int32', count=count
+            )
+            self._spools[field].write(values.tobytes())
+        self.count += count
+
+    def close(self):
+        # Section positions are relative to the start of the data region
+        sections = {}
+        position = 0
+        for name in self._names:
+            size = self._spools[name].tell()
+            sections[name] = [position, size]
+            position += size + ((-size) % ALIGN)
+
+        header = json.dumps({
+            "count": self.count,
+            "fields": list(STRING_FIELDS) + list(CATEGORY_FIELDS) + list(INT_FIELDS),
+            "categories": {field: list(dictionary) for field, dictionary in self._dictionaries.items()},
+            "sections": sections,
+        }).encode("utf-8")
+
+        with open(self.path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            _pad(f)
+            for name in self._names:
+                spool = self._spools[name]
+                spool.seek(0)
+                shutil.copyfileobj(spool, f, 1024 * 1024)
+                _pad(f)
+        self._discard()
+
+    def _discard(self):
+        for spool in self._spools.values():
+            spool.close()
+
+
+def write_store(path, entries):
+    """Serialises entries (sorted by id) into the store file format."""
+    with MetadataWriter(path, spool_to_disk=False) as writer:
+        writer.add(entries)
@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.config import Config
+
+# The encoder loaded once in each pool process
+_worker_encoder = None
+
+def _init_worker(backend, threads):
+    """Loads the encoder in a pool process, limited to its share of the cores."""
+    global _worker_encoder
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "ONNX_THREADS"):
+        os.environ[name] = str(threads)
+    from src.encoders import create_encoder
+
+    _worker_encoder = create_encoder(backend)
+    if backend == "sentence_transformers":
+        import torch
+        torch.set_num_threads(threads)
+
+def _worker_identity():
+    return _worker_encoder.identity
+
+def _encode_shard(texts, batch_size):
+    start = time.perf_counter()
+    vectors = _worker_encoder.encode(texts, batch_size=batch_size)
+    return os.getpid(), len(texts), time.perf_counter() - start, np.asarray(vectors, dtype='float32')
+
+
+class ParallelEncoder:
+    """
+    Encoder with the same interface as the single-process ones that shards each
+    encode() call across a pool of processes, each with its own model copy.
+
+    Texts are sorted by length before sharding, so every shard (and every batch
+    inside it) holds texts of similar length and little compute goes to padding.
+    Per-worker throughput is kept for stats().
+    """
+
+    def __init__(self, workers=None, backend=None, batch_size=32, threads_per_worker=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = (backend or Config.EMBEDDING_BACKEND).lower()
+        self.batch_size = batch_size
+        threads = threads_per_worker or max(1, (os.cpu_count() or 1) // self.workers)
+
+        print(f"🧠 Starting {self.workers} encoder processes ({self.backend}, {threads} thread(s) each)...")
+        # spawn: forking a process that already runs threads (or torch) is unsafe
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.backend, threads),
+        )
+        # One call per worker starts them all, so model loading isn't part of the first encode()
+        self.identity = [f.result() for f in [self._pool.submit(_worker_identity) for _ in range(self.workers)]][0]
+        self._stats_lock = threading.Lock()
+        self._worker_stats = {}  # pid -> [texts, busy seconds]
+
+    def encode(self, texts, batch_size=None):
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype='float32')
+        batch_size = batch_size or self.batch_size
+
+        # Character length is a cheap stand-in for token length
+        order = np.argsort([len(text) for text in texts], kind='stable')
+        # Enough shards to balance the pool, but whole batches each
+        n_shards = max(1, min(self.workers * 2, len(texts) // batch_size))
+        shards = [shard for shard in np.array_split(order, n_shards) if len(shard)]
+        futures = [
+            self._pool.submit(_encode_shard, [texts[i] for i in shard], batch_size)
+            for shard in shards
+        ]
+
+        vectors = None
+        for shard, future in zip(shards, futures):
+            pid, count, seconds, shard_vectors = future.result()
+            if vectors is None:
+                vectors = np.empty((len(texts), shard_vectors.shape[1]), dtype='float32')
+            vectors[shard] = shard_vectors
+            with self._stats_lock:
+                totals = self._worker_stats.setdefault(pid, [0, 0.0])
+                totals[0] += count
+                totals[1] += seconds
+        return vectors
+
+    def stats(self):
+        """Texts encoded, busy seconds and texts/sec for each worker process."""
+        with self._stats_lock:
+            return [
+                {"pid": pid, "texts": texts, "busy_seconds": round(seconds, 3),
+                 "texts_per_sec": round(texts / seconds, 1) if seconds else 0.0}
+                for pid, (texts, seconds) in sorted(self._worker_stats.items())
+            ]
+
+    def print_stats(self):
+        rows = self.stats()
+        print(f"👷 Encoder workers ({len(rows)}):")
+        for row in rows:
+            print(f"   pid {row['pid']:<8}{row['texts']:>10,} texts{row['busy_seconds']:>10.1f}s busy"
+                  f"{row['texts_per_sec']:>12,.1f} texts/s")
+
+    def close(self):
+        self._pool.shutdown()
@@ -0,0 +1,203 @@
+"""
+Versioned index snapshots.
+
+Every save writes a complete, self-contained directory
+
+    data/snapshots/<version>/project_vectors.index
+                             project_metadata.bin
+                             project_lexical.npz
+                             manifest.json
+
+and only then points data/CURRENT at it with an atomic rename. Readers resolve
+CURRENT once and open files from that directory, so they never see a
+half-written index, and running workers notice a new version by polling CURRENT.
+Snapshots are written into a hidden staging directory first and renamed to
+their version just before publishing.
+"""
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from src.config import Config
+
+INDEX_FILE = "project_vectors.index"
+METADATA_FILE = "project_metadata.bin"
+LEXICAL_FILE = "project_lexical.npz"
+MANIFEST_FILE = "manifest.json"
+STAGING_PREFIX = ".staging-"
+STALE_STAGING_S = 24 * 3600
+
+
+def _fsync_dir(path):
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def atomic_write(path, write_fn):
+    """
+    Writes to a temp file next to `path`, fsyncs it and renames it into place,
+    so a crash never leaves a half-written file behind.
+    """
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        write_fn(tmp_path)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    # Persist the rename itself
+    _fsync_dir(os.path.dirname(path))
+
+# --- Reading ---
+def current_version():
+    """Version CURRENT points at, or None before the first snapshot."""
+    try:
+        with open(Config.CURRENT_SNAPSHOT_PATH, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def snapshot_paths(version):
+    """File paths of a snapshot; version None means the pre-snapshot flat files in data/."""
+    if version is None:
+        return {
+            "index": Config.INDEX_PATH,
+            "metadata": Config.METADATA_STORE_PATH,
+            "lexical": Config.LEXICAL_INDEX_PATH,
+        }
+    directory = os.path.join(Config.SNAPSHOT_DIR, version)
+    return {
+        "index": os.path.join(directory, INDEX_FILE),
+        "metadata": os.path.join(directory, METADATA_FILE),
+        "lexical": os.path.join(directory, LEXICAL_FILE),
+        "manifest": os.path.join(directory, MANIFEST_FILE),
+    }
+
+def resolve():
+    """(version, paths) to load: the current snapshot, else the legacy flat files."""
+    version = current_version()
+    if version is not None and os.path.exists(snapshot_paths(version)["index"]):
+        return version, snapshot_paths(version)
+    return None, snapshot_paths(None)
+
+def read_manifest(version):
+    try:
+        with open(snapshot_paths(version)["manifest"], encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, TypeError, KeyError):
+        return None
+
+# --- Writing ---
+_held = threading.local()
+
+@contextmanager
+def writer_lock():
+    """
+    Serializes promote / publish / prune across processes (indexer script,
+    API workers), so CURRENT only ever moves forward.
+    Reentrant within a thread: a caller can hold it around a whole
+    reload-modify-publish and the nested publish won't deadlock.
+    """
+    if getattr(_held, "depth", 0):
+        _held.depth += 1
+        try:
+            yield
+        finally:
+            _held.depth -= 1
+        return
+
+    os.makedirs(Config.SNAPSHOT_DIR, exist_ok=True)
+    # flock is per open file, so other threads of this process wait here too
+    with open(os.path.join(Config.SNAPSHOT_DIR, ".lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        _held.depth = 1
+        try:
+            yield
+        finally:
+            _held.depth = 0
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _new_version():
+    now = time.time()
+    # Sorts chronologically; the pid keeps concurrent writers apart
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}-{int(now * 1e6) % 1_000_000:06d}-{os.getpid()}"
+
+def staging_paths():
+    """
+    Creates a private directory to write a snapshot into, outside the lock.
+    Returns its paths (same keys as snapshot_paths); promote() turns it into a version.
+    """
+    os.makedirs(Config.SNAPSHOT_DIR, exist_ok=True)
+    directory = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=Config.SNAPSHOT_DIR)
+    return {
+        "index": os.path.join(directory, INDEX_FILE),
+        "metadata": os.path.join(directory, METADATA_FILE),
+        "lexical": os.path.join(directory, LEXICAL_FILE),
+        "manifest": os.path.join(directory, MANIFEST_FILE),
+    }
+
+def promote(staged):
+    """
+    Renames a fully written staging directory to a new version (call under
+    writer_lock(), then publish()). Versions are named when promoted, so
+    they sort in publish order however long each one took to write.
+    """
+    version = _new_version()
+    os.rename(os.path.dirname(staged["index"]), os.path.dirname(snapshot_paths(version)["index"]))
+    return version
+
+def publish(version, manifest):
+    """Makes a fully written snapshot the current one."""
+    paths = snapshot_paths(version)
+    manifest = dict(manifest, version=version, created_at=time.time())
+    with open(paths["manifest"], "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    for key in ("index", "metadata", "lexical", "manifest"):
+        if os.path.exists(paths[key]):
+            with open(paths[key], "rb") as f:
+                os.fsync(f.fileno())
+    _fsync_dir(os.path.dirname(paths["index"]))
+
+    def write_pointer(path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+    atomic_write(Config.CURRENT_SNAPSHOT_PATH, write_pointer)
+
+def discard(version):
+    """Deletes a published snapshot directory."""
+    shutil.rmtree(os.path.dirname(snapshot_paths(version)["index"]), ignore_errors=True)
+
+def discard_staged(staged):
+    """Deletes a staging directory whose write failed."""
+    shutil.rmtree(os.path.dirname(staged["index"]), ignore_errors=True)
+
+def prune(keep=None):
+    """
+    Deletes all but the newest `keep` published snapshots. Workers still serving
+    a deleted one are unaffected: open and mapped files outlive their directory entry.
+    """
+    keep = Config.SNAPSHOT_KEEP if keep is None else keep
+    current = current_version()
+    if current is None or not os.path.isdir(Config.SNAPSHOT_DIR):
+        return []
+    names = os.listdir(Config.SNAPSHOT_DIR)
+    published = sorted(name for name in names if not name.startswith(".") and name <= current)
+    removed = published[:-max(1, keep)]
+    for version in removed:
+        discard(version)
+
+    # Staging dirs left behind by a crashed writer (no build takes a day)
+    for name in names:
+        path = os.path.join(Config.SNAPSHOT_DIR, name)
+        if name.startswith(STAGING_PREFIX) and time.time() - os.path.getmtime(path) > STALE_STAGING_S:
+            shutil.rmtree(path, ignore_errors=True)
+    return removed
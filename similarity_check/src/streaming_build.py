@@ -0,0 +1,242 @@
+import queue
+import threading
+import time
+import faiss
+import numpy as np
+from src import snapshots
+from src.config import Config
+from src.index_factory import create_index, train_index, index_type_of
+from src.lexical_index import LexicalIndexBuilder
+from src.metadata_store import MetadataWriter
+
+_DONE = object()
+
+
+class _Aborted(Exception):
+    """Another stage failed; this one stops quietly."""
+
+
+class Progress:
+    """Prints rows done, rows/sec and ETA at most every `interval` seconds."""
+
+    def __init__(self, total=None, interval=2.0):
+        self.total = total
+        self.interval = interval
+        self.rows = 0
+        self.start = time.perf_counter()
+        self._last_print = 0.0
+
+    def update(self, rows, queues=None, force=False):
+        self.rows += rows
+        now = time.perf_counter()
+        if not force and now - self._last_print < self.interval:
+            return
+        self._last_print = now
+        elapsed = max(now - self.start, 1e-9)
+        rate = self.rows / elapsed
+        line = f"📈 {self.rows:,}"
+        if self.total:
+            eta = (self.total - self.rows) / rate if rate else 0
+            line += f"/{self.total:,} rows ({self.rows / self.total:.1%}), ETA {eta:,.0f}s"
+        else:
+            line += " rows"
+        line += f", {rate:,.0f} rows/s"
+        if queues:
+            # Full queues point at the slow stage after them
+            line += " | queued " + ", ".join(f"{name} {q.qsize()}/{q.maxsize}" for name, q in queues.items())
+        print(line)
+
+
+class StreamingBuilder:
+    """
+    Builds a snapshot from row chunks (e.g. a server-side cursor) as a pipeline:
+
+        fetch thread --queue--> encode thread(s) --queue--> add (caller's thread)
+
+    The bounded queues keep at most `queue_depth` chunks waiting between stages,
+    so fetching, encoding and adding overlap while memory stays flat: metadata
+    is spooled to disk chunk by chunk and only the FAISS index and the compact
+    BM25 postings grow with the corpus.
+
+    With a ParallelEncoder two encode threads keep its process pool busy while
+    one chunk's shards are being collected; chunks are put back in fetch order
+    before they are added.
+    """
+
+    def __init__(self, engine, total=None, queue_depth=None):
+        self.engine = engine
+        self.total = total
+        self.queue_depth = queue_depth or Config.INDEX_QUEUE_DEPTH
+        self.encode_threads = 2 if getattr(engine.model, "workers", 1) > 1 else 1
+        self._stop = threading.Event()
+        self._errors = []
+        self.stage_seconds = {"fetch": 0.0, "encode": 0.0, "add": 0.0}
+
+    # --- Queue helpers that give up once any stage has failed ---
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+        raise _Aborted()
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise _Aborted()
+
+    def _run_stage(self, work):
+        try:
+            work()
+        except _Aborted:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    # --- Stages ---
+    def _fetch(self, chunks, out_q):
+        iterator = iter(chunks)
+        try:
+            seq = 0
+            while True:
+                start = time.perf_counter()
+                chunk = next(iterator, None)
+                self.stage_seconds["fetch"] += time.perf_counter() - start
+                if chunk is None:
+                    break
+                if chunk:
+                    self._put(out_q, (seq, chunk))
+                    seq += 1
+            for _ in range(self.encode_threads):
+                self._put(out_q, _DONE)
+        finally:
+            # Closes the cursor / connection when stopping early
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def _encode(self, in_q, out_q):
+        while True:
+            item = self._get(in_q)
+            if item is _DONE:
+                self._put(out_q, _DONE)
+                return
+            seq, chunk = item
+            start = time.perf_counter()
+            ids, texts, entries = self.engine._prepare_rows(chunk)
+            embeddings = self.engine._encode(texts)
+            self.stage_seconds["encode"] += time.perf_counter() - start
+            self._put(out_q, (seq, (ids, embeddings, entries)))
+
+    def _ordered(self, encode_q):
+        """Encoded chunks in fetch order (encode threads may finish out of order)."""
+        waiting = {}
+        next_seq = 0
+        done = 0
+        while done < self.encode_threads:
+            item = self._get(encode_q)
+            if item is _DONE:
+                done += 1
+                continue
+            seq, encoded = item
+            waiting[seq] = encoded
+            while next_seq in waiting:
+                yield waiting.pop(next_seq)
+                next_seq += 1
+
+    def _training_size(self, index):
+        """Vectors to buffer before training an IVF index (the first rows of the stream)."""
+        if index.is_trained:
+            return 0
+        nlist = faiss.extract_index_ivf(index).nlist
+        needed = nlist * 64
+        if index_type_of(index) == "ivf_pq":
+            needed = max(needed, (1 << Config.PQ_NBITS) * 39)
+        return min(needed, self.total or needed)
+
+    def run(self, chunks):
+        """Builds and publishes the snapshot. Returns the number of projects indexed."""
+        staged = snapshots.staging_paths()
+        fetch_q = queue.Queue(maxsize=self.queue_depth)
+        encode_q = queue.Queue(maxsize=self.queue_depth)
+        queues = {"fetched": fetch_q, "encoded": encode_q}
+        threads = [
+            threading.Thread(target=self._run_stage, args=(lambda: self._fetch(chunks, fetch_q),),
+                             name="index-fetch", daemon=True)
+        ] + [
+            threading.Thread(target=self._run_stage, args=(lambda: self._encode(fetch_q, encode_q),),
+                             name=f"index-encode-{i}", daemon=True)
+            for i in range(self.encode_threads)
+        ]
+        for thread in threads:
+            thread.start()
+
+        progress = Progress(self.total)
+        index = None
+        pending = []  # chunks held back until an IVF index has enough vectors to train
+        lexical = LexicalIndexBuilder()
+        try:
+            with MetadataWriter(staged["metadata"]) as metadata:
+                encoded = self._ordered(encode_q)
+                while True:
+                    try:
+                        ids, embeddings, entries = next(encoded)
+                    except (StopIteration, _Aborted):
+                        break
+
+                    start = time.perf_counter()
+                    if index is None:
+                        index = create_index(embeddings.shape[1], self.total or len(ids))
+                    pending.append((ids, embeddings))
+                    buffered = sum(len(p[0]) for p in pending)
+                    if index.is_trained or buffered >= self._training_size(index):
+                        self._add_pending(index, pending)
+                    metadata.add(entries)
+                    lexical.add(entries)
+                    self.stage_seconds["add"] += time.perf_counter() - start
+                    progress.update(len(ids), queues)
+
+                if self._errors:
+                    raise self._errors[0]
+                if index is not None:
+                    # Streams shorter than the training sample
+                    self._add_pending(index, pending)
+
+            if index is None:
+                print("⚠️ No data to index.")
+                snapshots.discard_staged(staged)
+                return 0
+            progress.update(0, force=True)
+            print(f"💾 Writing snapshot ({index.ntotal:,} vectors)...")
+            lexical.write(staged["lexical"])
+            faiss.write_index(index, staged["index"])
+            self.engine._install_streamed(index, staged)
+        except BaseException:
+            self._stop.set()
+            snapshots.discard_staged(staged)
+            raise
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        elapsed = time.perf_counter() - progress.start
+        busy = ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in self.stage_seconds.items())
+        print(f"✅ Indexed {progress.rows:,} projects in {elapsed:.1f}s "
+              f"({progress.rows / max(elapsed, 1e-9):,.0f} rows/s; stage busy time: {busy})")
+        return progress.rows
+
+    @staticmethod
+    def _add_pending(index, pending):
+        if not pending:
+            return
+        if not index.is_trained:
+            train_index(index, np.concatenate([embeddings for _, embeddings in pending]))
+        for ids, embeddings in pending:
+            index.add_with_ids(embeddings, ids)
+        pending.clear()
@@ -1,20 +1,98 @@
 import os
 import pickle
+import threading
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from src import snapshots
 from src.config import Config
+from src.batching import SearchBatcher
+from src.duplicates import find_duplicates
+from src.embedding_cache import EmbeddingCache
+from src.encoders import create_encoder
+from src.lexical_index import LexicalIndex
+from src.metadata_store import MetadataStore, write_store, normalize_filters
+from src.streaming_build import StreamingBuilder
+from src.index_factory import (
+    create_index, train_index, apply_search_params, index_type_of, supports_remove, remove_ids,
+    all_vectors, filtered_search_params
+)
 
 class VectorEngine:
-    def __init__(self):
+    def __init__(self, model=None, cache=None):
         # Create data directory if it doesn't exist
         if not os.path.exists(Config.DATA_DIR):
             os.makedirs(Config.DATA_DIR)
 
-        print(f"🧠 Loading Embedding Model ({Config.EMBEDDING_MODEL})...")
-        self.model = SentenceTransformer(Config.EMBEDDING_MODEL)
+        # Reuse an already loaded encoder (e.g. when reloading the index)
+        if model is None:
+            model = create_encoder()
+        self.model = model
+
+        # Embeddings are reused across runs and resubmissions
+        if cache is None and Config.EMBEDDING_CACHE_ENABLED:
+            cache = EmbeddingCache(
+                Config.EMBEDDING_CACHE_PATH,
+                # Backends don't produce bit-identical vectors, so each gets its own keys
+                model.identity,
+                memory_items=Config.EMBEDDING_CACHE_MEMORY_ITEMS,
+                max_entries=Config.EMBEDDING_CACHE_MAX_ENTRIES
+            )
+        self.cache = cache
+
         self.index = None
-        self.metadata = []
+        # Read-only mapped index files must be fully loaded before they are modified
+        self._index_mmapped = False
+        # project_id -> {"id", "name", "synopsis", "dept", "year", "status"}
+        self.metadata = MetadataStore()
+        # BM25 over the same projects, fused with the vector results in hybrid mode
+        self.lexical = None
+        # Snapshot the in-memory index matches (None = legacy flat files or unsaved)
+        self.snapshot_version = None
+        # Guards the FAISS index: searches and incremental updates may run on different threads
+        self._lock = threading.RLock()
+
+        # Concurrent search() calls are coalesced into one encode + one index.search
+        self.batcher = None
+        if Config.SEARCH_MAX_BATCH_SIZE > 1:
+            self.batcher = SearchBatcher(
+                self.search_many,
+                max_batch_size=Config.SEARCH_MAX_BATCH_SIZE,
+                max_wait_ms=Config.SEARCH_MAX_WAIT_MS
+            )
+
+    @staticmethod
+    def _project_text(title, synopsis):
+        return f"{title}: {synopsis}"
+
+    def _encode_uncached(self, texts):
+        embeddings = self.model.encode(texts)
+        return np.array(embeddings).astype('float32')
+
+    def _encode(self, texts):
+        if self.cache is None:
+            return self._encode_uncached(texts)
+        return self.cache.encode(texts, self._encode_uncached)
+
+    def _prepare_rows(self, db_rows):
+        """
+        Splits (id, title, synopsis[, dept, year, status]) rows into ids, texts
+        and metadata entries. The optional columns are the search filter attributes.
+        """
+        ids, texts, entries = [], [], []
+        for pid, title, synopsis, *attributes in db_rows:
+            clean_synopsis = synopsis if synopsis else ""
+            dept, year, status = (list(attributes) + [None, None, None])[:3]
+            ids.append(pid)
+            texts.append(self._project_text(title, clean_synopsis))
+            entries.append({
+                "id": pid,
+                "name": title,
+                "synopsis": clean_synopsis,
+                "dept": dept,
+                "year": int(year) if year is not None else None,
+                "status": status
+            })
+        return np.array(ids, dtype='int64'), texts, entries
 
     def build_index(self, db_rows):
         """Creates vectors from DB rows and saves them."""
@@ -23,76 +101,380 @@ class VectorEngine:
             return
 
         print("⚙️  Vectorizing projects...")
-        texts = []
-        self.metadata = []
-
-        for pid, title, synopsis in db_rows:
-            clean_synopsis = synopsis if synopsis else ""
-            full_text = f"{title}: {clean_synopsis}"
-            
-            texts.append(full_text)
-            self.metadata.append({
-                "id": pid, 
-                "name": title, 
-                "synopsis": clean_synopsis
-            })
+        ids, texts, entries = self._prepare_rows(db_rows)
 
         # Generate Embeddings
-        embeddings = self.model.encode(texts)
-        embeddings = np.array(embeddings).astype('float32')
-        
-        # Build FAISS Index
+        embeddings = self._encode(texts)
+
+        # Build FAISS Index (type chosen by Config.INDEX_TYPE)
         dimension = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dimension)
-        self.index.add(embeddings)
+        index = create_index(dimension, len(ids))
+        train_index(index, embeddings)
+        index.add_with_ids(embeddings, ids)
+        print(f"🗂️  Built {index_type_of(index)} index with {index.ntotal} vectors.")
+
+        with self._lock:
+            self.index = index
+            self._index_mmapped = False
+            self.metadata = MetadataStore.from_entries(entries)
+            self.lexical = LexicalIndex.from_entries(entries)
 
         # Save to disk
         self._save()
 
+    def build_index_streaming(self, chunks, total=None, queue_depth=None):
+        """
+        Builds and saves the index from an iterable of row chunks (e.g.
+        DatabaseHandler.iter_projects()) without loading the whole corpus:
+        fetch, encode and add overlap in a bounded pipeline (src/streaming_build.py).
+        `total` is only used for progress and to size IVF indexes.
+        """
+        return StreamingBuilder(self, total, queue_depth).run(chunks)
+
+    def _install_streamed(self, index, staged):
+        """Publishes a snapshot written by StreamingBuilder and serves it from this engine."""
+        with self._lock:
+            self.index = index
+            self._index_mmapped = False
+            version = self._publish(staged)
+            paths = snapshots.snapshot_paths(version)
+            self.metadata = MetadataStore(paths["metadata"])
+            self.lexical = LexicalIndex(paths["lexical"])
+
+    def add_projects(self, db_rows, save=True):
+        """
+        Embeds only the given (id, title, synopsis[, dept, year, status]) rows and adds them to the index.
+        Rows whose project_id is already indexed are replaced.
+        """
+        if not db_rows:
+            return 0
+
+        ids, texts, entries = self._prepare_rows(db_rows)
+        embeddings = self._encode(texts)
+
+        with self._lock:
+            self._ensure_writable()
+            if self.index is None:
+                self.index = create_index(embeddings.shape[1], len(ids))
+                train_index(self.index, embeddings)
+
+            existing = [pid for pid in ids.tolist() if pid in self.metadata]
+            if existing:
+                self._remove_ids(np.array(existing, dtype='int64'))
+
+            self.index.add_with_ids(embeddings, ids)
+            for entry in entries:
+                self.metadata[entry["id"]] = entry
+            if self.lexical is None:
+                self.lexical = LexicalIndex()
+            self.lexical.add(entries)
+
+            if save:
+                self._save()
+
+        print(f"➕ Indexed {len(entries)} project(s). Total: {self.index.ntotal}")
+        return len(entries)
+
+    def remove_projects(self, project_ids, save=True):
+        """Drops the given project_ids from the index. Returns how many were removed."""
+        with self._lock:
+            if self.index is None:
+                return 0
+
+            known = [pid for pid in project_ids if pid in self.metadata]
+            if not known:
+                return 0
+
+            self._ensure_writable()
+            removed = self._remove_ids(np.array(known, dtype='int64'))
+            for pid in known:
+                del self.metadata[pid]
+            if self.lexical is not None:
+                self.lexical.remove(known)
+
+            if save:
+                self._save()
+
+        print(f"➖ Removed {removed} project(s). Total: {self.index.ntotal}")
+        return removed
+
+    def _remove_ids(self, ids):
+        """Removes ids in place, or rebuilds the index for types that can't delete (HNSW)."""
+        if supports_remove(self.index):
+            return remove_ids(self.index, ids)
+
+        before = self.index.ntotal
+        all_ids, vectors = all_vectors(self.index)
+        keep = ~np.isin(all_ids, ids)
+
+        rebuilt = create_index(self.index.d, int(keep.sum()), index_type_of(self.index))
+        train_index(rebuilt, vectors[keep])
+        rebuilt.add_with_ids(vectors[keep], all_ids[keep])
+        self.index = rebuilt
+        return before - rebuilt.ntotal
+
+    def update_project(self, project_id, title, synopsis, save=True, dept=None, year=None, status=None):
+        """Re-embeds a single project after its title, synopsis or attributes changed."""
+        return self.add_projects([(project_id, title, synopsis, dept, year, status)], save=save)
+
     def _save(self):
-        """Internal method to save index and metadata."""
-        print(f"💾 Saving index to {Config.DATA_DIR}...")
-        faiss.write_index(self.index, Config.INDEX_PATH)
-        with open(Config.METADATA_PATH, "wb") as f:
-            pickle.dump(self.metadata, f)
-        print("✅ Index saved successfully.")
+        """Writes index, metadata and lexical index as a new snapshot and makes it current."""
+        print(f"💾 Saving index to {Config.SNAPSHOT_DIR}...")
+
+        with self._lock:
+            staged = snapshots.staging_paths()
+            try:
+                write_store(staged["metadata"], self.metadata.sorted_entries())
+                if self.lexical is not None:
+                    self.lexical.write(staged["lexical"])
+                faiss.write_index(self.index, staged["index"])
+                version = self._publish(staged)
+            except Exception:
+                snapshots.discard_staged(staged)
+                raise
+            # Swap the overlays for the compact files we just wrote
+            paths = snapshots.snapshot_paths(version)
+            self.metadata = MetadataStore(paths["metadata"])
+            if self.lexical is not None:
+                self.lexical = LexicalIndex(paths["lexical"])
+        print(f"✅ Index saved as snapshot {version}.")
+
+    def _publish(self, staged):
+        """Promotes a fully written staging dir to the current snapshot. Returns its version."""
+        with snapshots.writer_lock():
+            version = snapshots.promote(staged)
+            # Set before publishing so our own watcher doesn't reload what we just wrote
+            self.snapshot_version = version
+            snapshots.publish(version, {
+                "vectors": int(self.index.ntotal),
+                "index_type": index_type_of(self.index),
+                "embedding_model": self.model.identity,
+            })
+            snapshots.prune()
+        return version
+
+    def _upgrade_legacy(self, index, metadata):
+        """Converts an old positional IndexFlatL2 + metadata list into an ID-mapped index."""
+        print("🔁 Upgrading legacy index to project_id keyed format...")
+        vectors = index.reconstruct_n(0, index.ntotal)
+        ids = np.array([m["id"] for m in metadata], dtype='int64')
+        upgraded = create_index(index.d, len(ids), "flat")
+        upgraded.add_with_ids(vectors, ids)
+        return upgraded
+
+    @staticmethod
+    def _read_index(path, mmap):
+        """Reads the index, memory-mapping its vectors when the FAISS build supports it."""
+        if mmap:
+            flags = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+            try:
+                return faiss.read_index(path, flags), True
+            except RuntimeError as e:
+                print(f"⚠️ Could not mmap index, reading it fully: {e}")
+        return faiss.read_index(path), False
+
+    def _ensure_writable(self):
+        """Swaps a read-only mapped index for an in-memory copy before mutating it."""
+        if self._index_mmapped:
+            # Copied from memory: the snapshot it was mapped from may have been pruned since
+            self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+            apply_search_params(self.index)
+            self._index_mmapped = False
 
     def load_index(self):
-        """Loads the index from disk."""
-        if os.path.exists(Config.INDEX_PATH) and os.path.exists(Config.METADATA_PATH):
-            self.index = faiss.read_index(Config.INDEX_PATH)
+        """Loads the current snapshot (or the pre-snapshot flat files) from disk."""
+        version, paths = snapshots.resolve()
+        if not os.path.exists(paths["index"]):
+            return False
+
+        legacy_entries = None
+        if os.path.exists(paths["metadata"]):
+            metadata = MetadataStore(paths["metadata"])
+        elif version is None and os.path.exists(Config.METADATA_PATH):
+            # Pickle written by older versions (list of dicts, or dict keyed by id)
             with open(Config.METADATA_PATH, "rb") as f:
-                self.metadata = pickle.load(f)
-            return True
-        return False
+                legacy_entries = pickle.load(f)
+            if isinstance(legacy_entries, dict):
+                legacy_entries = list(legacy_entries.values())
+            metadata = MetadataStore.from_entries(legacy_entries)
+        else:
+            return False
+
+        index, mmapped = self._read_index(paths["index"], mmap=Config.INDEX_MMAP)
+        if not isinstance(index, (faiss.IndexIDMap, faiss.IndexIVF)) and legacy_entries is not None:
+            index = self._upgrade_legacy(index, legacy_entries)
+            mmapped = False
+        apply_search_params(index)
+
+        if os.path.exists(paths["lexical"]):
+            lexical = LexicalIndex(paths["lexical"])
+        else:
+            # Index built before hybrid search existed: derive it from the metadata (saved on the next write)
+            print("🔤 No lexical index on disk, building it from metadata...")
+            lexical = LexicalIndex.from_entries(entry for _, entry in metadata.items())
+
+        with self._lock:
+            self.index = index
+            self._index_mmapped = mmapped
+            self.metadata = metadata
+            self.lexical = lexical
+            self.snapshot_version = version
+        return True
+
+    def index_type(self):
+        return index_type_of(self.index)
+
+    def find_duplicates(self, threshold, block_size=2048):
+        """Near-duplicate clusters already inside the index (see src/duplicates.py)."""
+        if self.index is None:
+            raise FileNotFoundError("Index not loaded. Run indexer first.")
+        with self._lock:
+            index, metadata = self.index, self.metadata
+        return find_duplicates(index, metadata, threshold, block_size)
+
+    def close(self):
+        """Stops the search batcher thread (used when an engine is swapped out)."""
+        if self.batcher is not None:
+            self.batcher.close()
+
+    def search(self, title, synopsis, top_k=3, filters=None):
+        """
+        Searches for similar projects.
+        `filters` ({"dept", "status", "year_from", "year_to"}) are applied inside
+        the index, so up to top_k matching projects are returned.
+        """
+        if self.index is None:
+            raise FileNotFoundError("Index not loaded. Run indexer first.")
+
+        filters = normalize_filters(filters)
+        # Filtered searches have their own search parameters, so they skip the batcher
+        if self.batcher is not None and filters is None:
+            return self.batcher.submit(title, synopsis, top_k).result()
+        return self.search_many([(title, synopsis)], top_k=top_k, filters=filters)[0]
 
-    def search(self, title, synopsis, top_k=3):
-        """Searches for similar projects."""
+    def search_many(self, queries, top_k=3, filters=None):
+        """
+        Searches several (title, synopsis) queries with one batched encode
+        and one index.search. Returns one list of matches per query.
+        """
         if self.index is None:
             raise FileNotFoundError("Index not loaded. Run indexer first.")
+        if not queries:
+            return []
+
+        return self.search_vectors(self.encode_queries(queries), top_k, filters, queries=queries)
+
+    def encode_queries(self, queries):
+        """Encodes (title, synopsis) pairs into query vectors."""
+        query_texts = [self._project_text(title, synopsis) for title, synopsis in queries]
+        return self._encode(query_texts)
+
+    def search_vectors(self, query_vectors, top_k=3, filters=None, queries=None):
+        """
+        One index.search over a matrix of query vectors; one list of matches per row.
+        Passing the (title, synopsis) `queries` as well enables hybrid retrieval.
+        """
+        filters = normalize_filters(filters)
+        hybrid = queries is not None and Config.SEARCH_MODE == "hybrid" and self.lexical is not None
+        k = max(top_k, Config.HYBRID_CANDIDATES) if hybrid else top_k
+
+        if filters is not None:
+            results = self._filtered_search(query_vectors, k, filters)
+        else:
+            with self._lock:
+                distances, indices = self.index.search(query_vectors, k=k)
+                metadata = self.metadata
+            results = [self._to_matches(distances[row], indices[row], metadata) for row in range(len(query_vectors))]
+
+        if not hybrid:
+            return results
+        return [
+            self._fuse(query_vectors[row], self._project_text(*queries[row]), results[row], top_k, filters)
+            for row in range(len(query_vectors))
+        ]
+
+    def _fuse(self, query_vector, query_text, semantic, top_k, filters):
+        """
+        Reciprocal rank fusion of the vector and BM25 candidate lists.
+        Lexical-only hits get their vector distance computed too, so 'similarity'
+        means the same thing for every match.
+        """
+        with self._lock:
+            allowed = self.metadata.matching_ids(filters) if filters is not None else None
+            lexical = self.lexical.search(query_text, Config.HYBRID_CANDIDATES, allowed)
+            index, metadata = self.index, self.metadata
 
-        query_text = f"{title}: {synopsis}"
-        query_vector = self.model.encode([query_text])
-        query_vector = np.array(query_vector).astype('float32')
+        scores = {}
+        for rank, match in enumerate(semantic):
+            scores[match['id']] = scores.get(match['id'], 0.0) + 1.0 / (Config.RRF_K + rank + 1)
+        for rank, (pid, _) in enumerate(lexical):
+            scores[pid] = scores.get(pid, 0.0) + 1.0 / (Config.RRF_K + rank + 1)
 
-        distances, indices = self.index.search(query_vector, k=top_k)
-        
+        by_id = {match['id']: match for match in semantic}
+        bm25 = dict(lexical)
+        fused = []
+        for pid in sorted(scores, key=lambda p: -scores[p])[:top_k]:
+            match = by_id.get(pid)
+            if match is None:
+                if pid not in metadata:
+                    continue
+                vector = index.reconstruct(int(pid))
+                match = self._match(metadata, pid, float(np.sum((vector - query_vector) ** 2)))
+            match['bm25'] = round(bm25.get(pid, 0.0), 4)
+            match['rrf_score'] = round(scores[pid], 6)
+            fused.append(match)
+        return fused
+
+    def _filtered_search(self, query_vectors, top_k, filters):
+        """
+        Restricts the search to projects passing `filters`.
+        Small candidate sets are scored exactly against just their vectors; larger
+        ones use an ID selector inside FAISS, widening the IVF/HNSW search for any
+        query that still came back with fewer than top_k hits.
+        """
+        with self._lock:
+            index, metadata = self.index, self.metadata
+            allowed = metadata.matching_ids(filters)
+            k = min(top_k, len(allowed))
+            if k == 0:
+                return [[] for _ in range(len(query_vectors))]
+
+            if len(allowed) <= Config.FILTER_EXACT_MAX and index_type_of(index) != "flat":
+                distances, positions = faiss.knn(query_vectors, index.reconstruct_batch(allowed), k)
+                indices = np.where(positions >= 0, allowed[np.maximum(positions, 0)], -1)
+            else:
+                selector = faiss.IDSelectorBatch(len(allowed), faiss.swig_ptr(allowed))
+                distances, indices = index.search(
+                    query_vectors, k=k, params=filtered_search_params(index, selector)
+                )
+                short = np.where((indices == -1).any(axis=1))[0]
+                if len(short):
+                    wide_distances, wide_indices = index.search(
+                        query_vectors[short], k=k, params=filtered_search_params(index, selector, widen=True)
+                    )
+                    distances[short], indices[short] = wide_distances, wide_indices
+
+        return [self._to_matches(distances[row], indices[row], metadata) for row in range(len(query_vectors))]
+
+    @staticmethod
+    def _match(metadata, pid, raw_distance):
+        match = metadata[pid].copy()
+
+        # RAW DISTANCE (Lower is better)
+        # CONVERTED SCORE (0 to 100%, Higher is better)
+        # This is a simple estimation: 1.0 distance is "far", 0.0 is "exact copy"
+        similarity_percent = max(0, (1.5 - raw_distance) / 1.5 * 100)
+
+        match['distance'] = raw_distance
+        match['similarity'] = round(similarity_percent, 2)
+        return match
+
+    @staticmethod
+    def _to_matches(distances, indices, metadata):
         results = []
-        for i in range(top_k):
-            idx = indices[0][i]
-            if idx != -1 and idx < len(self.metadata):
-                match = self.metadata[idx].copy()
-                
-                # RAW DISTANCE (Lower is better)
-                raw_score = float(distances[0][i])
-                
-                # CONVERTED SCORE (0 to 100%, Higher is better)
-                # This is a simple estimation: 1.0 distance is "far", 0.0 is "exact copy"
-                similarity_percent = max(0, (1.5 - raw_score) / 1.5 * 100)
-                
-                match['distance'] = raw_score
-                match['similarity'] = round(similarity_percent, 2)
-                
-                results.append(match)
-        
-        return results
\ No newline at end of file
+        for raw_distance, pid in zip(distances, indices):
+            pid = int(pid)
+            if pid != -1 and pid in metadata:
+                results.append(VectorEngine._match(metadata, pid, float(raw_distance)))
+
+        return results
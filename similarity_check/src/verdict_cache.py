@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class VerdictCache:
+    """
+    Persistent cache of LLM verdicts.
+
+    The key covers the new proposal text, the matched project ids with their
+    current title/synopsis, and the LLM model, so an edited match or a model
+    change never serves a stale verdict. Entries also expire after `ttl_seconds`
+    and can be dropped explicitly when a matched project changes.
+    """
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdicts (
+                key TEXT PRIMARY KEY,
+                verdict TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS verdict_projects (
+                key TEXT NOT NULL,
+                project_id INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_verdict_projects_pid ON verdict_projects (project_id)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(model_name, new_project, matches):
+        proposal = " ".join(f"{new_project['title']}: {new_project['synopsis']}".split())
+        evidence = sorted(
+            (str(m.get('id')), m.get('name', ''), m.get('synopsis', '')) for m in matches
+        )
+        payload = json.dumps([model_name, proposal, evidence], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT verdict, created_at FROM verdicts WHERE key = ?", (key,)
+            ).fetchone()
+            if row and time.time() - row[1] <= self.ttl_seconds:
+                self.hits += 1
+                return row[0]
+            if row:
+                self._delete_keys([key])
+                self._conn.commit()
+            self.misses += 1
+            return None
+
+    def put(self, key, verdict, project_ids):
+        with self._lock:
+            self._delete_keys([key])
+            self._conn.execute(
+                "INSERT INTO verdicts (key, verdict, created_at) VALUES (?, ?, ?)",
+                (key, verdict, time.time())
+            )
+            self._conn.executemany(
+                "INSERT INTO verdict_projects (key, project_id) VALUES (?, ?)",
+                [(key, int(pid)) for pid in project_ids if pid is not None]
+            )
+            self._conn.commit()
+
+    def invalidate_projects(self, project_ids):
+        """Drops every verdict that used one of these projects as evidence."""
+        ids = [int(pid) for pid in project_ids]
+        if not ids:
+            return 0
+        with self._lock:
+            placeholders = ",".join("?" * len(ids))
+            keys = [row[0] for row in self._conn.execute(
+                f"SELECT DISTINCT key FROM verdict_projects WHERE project_id IN ({placeholders})", ids
+            )]
+            self._delete_keys(keys)
+            self._conn.commit()
+            return len(keys)
+
+    def purge_expired(self):
+        with self._lock:
+            cutoff = time.time() - self.ttl_seconds
+            keys = [row[0] for row in self._conn.execute(
+                "SELECT key FROM verdicts WHERE created_at < ?", (cutoff,)
+            )]
+            self._delete_keys(keys)
+            self._conn.commit()
+            return len(keys)
+
+    def _delete_keys(self, keys):
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            self._conn.execute(f"DELETE FROM verdicts WHERE key IN ({placeholders})", chunk)
+            self._conn.execute(f"DELETE FROM verdict_projects WHERE key IN ({placeholders})", chunk)
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+                "entries": entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
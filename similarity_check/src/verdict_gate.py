@@ -0,0 +1,114 @@
+import json
+import threading
+from src.config import Config
+
+def vector_verdict(matches, top_similarity, threshold, analysis, source, reason=None):
+    """Verdict JSON (same schema as the LLM output) built from vector similarity alone."""
+    verdict = {
+        "analysis": analysis,
+        "comparison": [
+            {
+                "match_name": m.get('name', 'Unknown Title'),
+                "similarity_note": f"Vector similarity {m.get('similarity', 0)}%."
+            }
+            for m in matches
+        ],
+        "verdict": {
+            # Without the LLM, anything above the review threshold needs a human look
+            "status": "Suspicious" if top_similarity >= threshold else "Unique",
+            "score": round(top_similarity),
+            "reasoning": (
+                "An existing project is semantically close; manual review recommended."
+                if top_similarity >= threshold else
+                "No existing project is semantically close to this proposal."
+            )
+        },
+        "source": source
+    }
+    if reason:
+        verdict["fallback_reason"] = reason
+    return json.dumps(verdict)
+
+
+class VerdictGate:
+    """
+    Sits between VectorEngine.search and the LLM judge.
+    When even the closest match is below the threshold the proposal is clearly
+    unique, so a verdict with the same JSON schema is generated locally and the
+    remote call is skipped.
+    """
+
+    def __init__(self, judge, threshold=None, async_judge=None):
+        self.judge = judge
+        self.async_judge = async_judge
+        self.threshold = Config.JUDGE_SKIP_BELOW if threshold is None else threshold
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.judged = 0
+
+    @staticmethod
+    def top_similarity(matches):
+        return max((float(m.get('similarity', 0)) for m in matches), default=0.0)
+
+    def should_skip(self, matches):
+        return self.threshold > 0 and self.top_similarity(matches) < self.threshold
+
+    def local_verdict(self, new_project, matches):
+        """Vector-only verdict in the same format the LLM returns."""
+        top = self.top_similarity(matches)
+        analysis = (
+            f"'{new_project['title']}' was not sent for AI review: the closest existing "
+            f"project is {top}% similar, below the {self.threshold}% review threshold."
+        )
+        return vector_verdict(matches, top, self.threshold, analysis, "vector_gate")
+
+    def fallback_verdict(self, new_project, matches, reason):
+        """Used when the LLM provider is unavailable (circuit open, timeouts, errors)."""
+        top = self.top_similarity(matches)
+        analysis = f"AI review unavailable; verdict based on vector similarity only (best match {top}%)."
+        return vector_verdict(matches, top, self.threshold, analysis, "vector_fallback", reason)
+
+    def get_verdict(self, new_project, similar_projects):
+        """Same interface as GeminiJudge.get_verdict."""
+        if self.should_skip(similar_projects):
+            with self._lock:
+                self.skipped += 1
+            return self.local_verdict(new_project, similar_projects)
+
+        with self._lock:
+            self.judged += 1
+        return self.judge.get_verdict(new_project, similar_projects)
+
+    async def get_verdict_async(self, new_project, similar_projects):
+        """Async variant backed by AsyncGeminiJudge."""
+        if self.should_skip(similar_projects):
+            with self._lock:
+                self.skipped += 1
+            return self.local_verdict(new_project, similar_projects)
+
+        with self._lock:
+            self.judged += 1
+        return await self.async_judge.get_verdict(new_project, similar_projects)
+
+    async def stream_verdict(self, new_project, similar_projects):
+        """Yields ("token", text) events from the async judge, then ("verdict", json)."""
+        if self.should_skip(similar_projects):
+            with self._lock:
+                self.skipped += 1
+            yield "verdict", self.local_verdict(new_project, similar_projects)
+            return
+
+        with self._lock:
+            self.judged += 1
+        async for event in self.async_judge.stream_verdict(new_project, similar_projects):
+            yield event
+
+    def stats(self):
+        with self._lock:
+            total = self.skipped + self.judged
+            return {
+                "threshold": self.threshold,
+                "skipped": self.skipped,
+                "judged": self.judged,
+                "skip_rate": round(self.skipped / total, 4) if total else 0,
+            }
@@ -0,0 +1,115 @@
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned verdict in the format the judge prompt asks for
+STUB_VERDICT = {
+    "analysis": "Stub analysis generated by stub_llm_server.py.",
+    "comparison": [],
+    "verdict": {"status": "Unique", "score": 12, "reasoning": "Stub verdict."}
+}
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """
+    Minimal OpenAI-compatible /chat/completions endpoint for local testing of the judges.
+    Point the judge at it with OPENROUTER_BASE_URL=http://127.0.0.1:<port>/v1
+    """
+    latency = 0.0
+    fail_rate = 0.0
+    fail_status = 503
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        if not request.get("stream"):
+            time.sleep(self.latency)
+        if random.random() < self.fail_rate:
+            self._send_json(self.fail_status, {"error": {"message": "Stub failure"}})
+            return
+
+        content = json.dumps(STUB_VERDICT)
+        if request.get("stream"):
+            self._stream(content, request.get("model", "stub"))
+            return
+
+        self._send_json(200, {
+            "id": "stub-completion",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    def _stream(self, content, model):
+        """Sends the completion as OpenAI-style SSE chunks, a few characters at a time."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+        delay = self.latency / max(1, len(pieces))
+        for i, piece in enumerate(pieces):
+            chunk = {
+                "id": "stub-completion",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": piece},
+                    "finish_reason": "stop" if i == len(pieces) - 1 else None
+                }]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_server(host="127.0.0.1", port=8089, latency_ms=0, fail_rate=0.0, fail_status=503):
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,), {
+        "latency": latency_ms / 1000.0,
+        "fail_rate": fail_rate,
+        "fail_status": fail_status,
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with an error")
+    parser.add_argument("--fail-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.latency_ms, args.fail_rate, args.fail_status)
+    print(f"🧪 Stub LLM listening on http://{args.host}:{args.port}/v1")
+    server.serve_forever()